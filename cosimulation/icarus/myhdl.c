@@ -3,6 +3,12 @@
 #include <assert.h>
 #include <string.h>
 #include <stdio.h>
+#ifndef _WIN32
+#include <poll.h>
+#include <stdint.h>
+#include <sys/mman.h>
+#define SHM 1
+#endif
 #include "vpi_user.h"
 
 #define MAXLINE 4096
@@ -10,6 +16,25 @@
 #define MAXARGS 1024
 // #define DEBUG 1
 
+/* Binary protocol, see myhdl/_Cosimulation.py */
+#define PROTOCOL 5
+#define GREETING "\0MYHDL\0"
+#define GREETINGLEN 7
+#define MSG_FROM 'F'
+#define MSG_TO 'T'
+#define MSG_START 'S'
+#define MSG_OK 'O'
+#define MSG_VALUES 'V'
+#define MSG_SHM 'M'
+#define MSG_RESET 'R'
+#define MSG_BATCH 'B'
+
+/* Shared memory transport, see myhdl/_Cosimulation.py */
+#define RINGSIZE (1 << 20)
+#define RINGHEADER 256
+#define SPIN 2000
+#define TIMEOUT 10
+
 /* Sized variables */
 #ifndef PLI_TYPES
 #define PLI_TYPES
@@ -34,6 +59,56 @@ static char changeFlag[MAXARGS];
 
 static char bufcp[MAXLINE];
 
+/* version of the binary protocol, 0 for the text protocol */
+static int protocol = 0;
+
+/* outgoing and incoming binary messages */
+static unsigned char *msg = NULL;
+static size_t msglen = 0;
+static size_t msgcap = 0;
+static unsigned char *reply = NULL;
+static size_t replylen = 0;
+static size_t replycap = 0;
+
+/* arguments of the system tasks, for the binary protocol */
+static vpiHandle from_handles[MAXARGS];
+static int from_sizes[MAXARGS];
+static int from_count = 0;
+static vpiHandle to_handles[MAXARGS];
+static int to_sizes[MAXARGS];
+static int to_count = 0;
+static s_vpi_vecval *vector = NULL;
+static int vectorcap = 0;
+
+/* batched VALUES: ours in window, MyHDL's in reply from batchpos on */
+static int batching = 0;
+static unsigned char *window = NULL;
+static size_t windowlen = 0;
+static size_t windowcap = 0;
+static size_t batchpos = 0;
+static const unsigned char *values = NULL;
+static size_t valueslen = 0;
+
+#ifdef SHM
+/* a ring of bytes with a single producer and consumer */
+struct ring {
+	unsigned char *mem;
+};
+#define HEAD(r) ((uint64_t *) (r)->mem)
+#define TAIL(r) ((uint64_t *) ((r)->mem + 64))
+/* the waiting flags of the consumer and of the producer */
+#define FLAG(r, producer) ((uint64_t *) ((r)->mem + ((producer) ? 192 : 128)))
+#define DATA(r) ((r)->mem + RINGHEADER)
+
+static int shm = 0;
+static int spin = 0;
+static struct ring rx;
+static struct ring tx;
+/* this side sleeps on its own eventfd, and wakes up MyHDL on the other */
+static int efd = -1;
+static int peerfd = -1;
+#endif
+
 static myhdl_time64_t myhdl_time;
 static myhdl_time64_t verilog_time;
 static myhdl_time64_t pli_time;
@@ -48,6 +123,27 @@ static PLI_INT32 delta_callback(p_cb_data cb_data);
 static PLI_INT32 change_callback(p_cb_data cb_data);
 
 static int init_pipes();
+static void write_all(const void *buf, size_t n);
+static int read_all(void *buf, size_t n);
+static void msg_reserve(size_t n);
+static void msg_start(char kind);
+static void msg_put_u16(unsigned int v);
+static void msg_put_u32(PLI_UINT32 v);
+static void msg_put_u64(myhdl_time64_t v);
+static void msg_put_name(vpiHandle handle);
+static void msg_send();
+static int msg_recv();
+static int msg_exchange();
+static PLI_UINT32 get_u32(const unsigned char *p);
+static myhdl_time64_t get_u64(const unsigned char *p);
+#ifdef SHM
+static void init_shm(const char *fds);
+static int ring_ready(struct ring *r, int producer);
+static int ring_wait(struct ring *r, int producer);
+static void ring_signal(struct ring *r, int producer);
+static int ring_write(struct ring *r, const unsigned char *p, size_t n);
+static int ring_read(struct ring *r, unsigned char *p, size_t n);
+#endif
 
 static myhdl_time64_t timestruct_to_time(const struct t_vpi_time*ts);
 
@@ -62,6 +158,8 @@ static myhdl_time64_t timestruct_to_time(const struct t_vpi_time*ts) {
 static int init_pipes() {
 	char *w;
 	char *r;
+	char *p;
+	char greeting[GREETINGLEN + 1];
 
 	static int init_pipes_flag = 0;
 
@@ -87,9 +185,325 @@ static int init_pipes() {
 	rpipe = atoi(r);
 #endif
 	init_pipes_flag = 1;
+
+	/* MyHDL offers the highest version of the binary protocol it supports */
+	if ((p = getenv("MYHDL_PROTOCOL")) != NULL && atoi(p) > 0) {
+		protocol = atoi(p) < PROTOCOL ? atoi(p) : PROTOCOL;
+		memcpy(greeting, GREETING, GREETINGLEN);
+		greeting[GREETINGLEN] = (char) protocol;
+		write_all(greeting, GREETINGLEN + 1);
+#ifdef SHM
+		if ((p = getenv("MYHDL_SHM")) != NULL) {
+			init_shm(p);
+		}
+#endif
+	}
 	return (0);
 }
 
+#ifdef SHM
+static void init_shm(const char *fds) {
+	int memfd, efd0, efd1;
+	unsigned char *mem;
+
+	if (sscanf(fds, "%d %d %d", &memfd, &efd0, &efd1) != 3) {
+		return;
+	}
+	mem = mmap(NULL, 2 * (RINGHEADER + RINGSIZE), PROT_READ | PROT_WRITE,
+			MAP_SHARED, memfd, 0);
+	if (mem == MAP_FAILED) {
+		/* stay on the pipes */
+		return;
+	}
+	close(memfd);
+	msg_start(MSG_SHM);
+	msg_send();
+	/* the first ring goes to MyHDL, the first eventfd is that of MyHDL */
+	tx.mem = mem;
+	rx.mem = mem + RINGHEADER + RINGSIZE;
+	efd = efd1;
+	peerfd = efd0;
+	spin = sysconf(_SC_NPROCESSORS_ONLN) > 1 ? SPIN : 0;
+	shm = 1;
+}
+
+static int ring_ready(struct ring *r, int producer) {
+	uint64_t head = __atomic_load_n(HEAD(r), __ATOMIC_ACQUIRE);
+	uint64_t tail = __atomic_load_n(TAIL(r), __ATOMIC_ACQUIRE);
+
+	return producer ? head - tail < RINGSIZE : head != tail;
+}
+
+/* return 0 when MyHDL is down */
+static int ring_wait(struct ring *r, int producer) {
+	struct pollfd fds[2];
+	uint64_t count;
+	int i;
+	int alive = 1;
+
+	for (i = 0; i <= spin; i++) {
+		if (ring_ready(r, producer)) {
+			return (1);
+		}
+	}
+	__atomic_store_n(FLAG(r, producer), 1, __ATOMIC_SEQ_CST);
+	fds[0].fd = efd;
+	fds[0].events = POLLIN;
+	fds[1].fd = rpipe;
+	fds[1].events = POLLIN;
+	/* the timeout covers a wakeup that is lost as the flag is set */
+	while (alive && !ring_ready(r, producer)) {
+		if (poll(fds, 2, TIMEOUT) <= 0) {
+			continue;
+		}
+		if (fds[0].revents & POLLIN) {
+			if (read(efd, &count, sizeof(count)) < 0) {
+				continue;
+			}
+		}
+		if (fds[1].revents && !ring_ready(r, producer)) {
+			alive = 0;
+		}
+	}
+	__atomic_store_n(FLAG(r, producer), 0, __ATOMIC_SEQ_CST);
+	return (alive);
+}
+
+/* wake up the other side, if it waits */
+static void ring_signal(struct ring *r, int producer) {
+	uint64_t one = 1;
+
+	if (__atomic_load_n(FLAG(r, !producer), __ATOMIC_SEQ_CST)) {
+		if (write(peerfd, &one, sizeof(one)) < 0) {
+			vpi_printf("ERROR: cannot wake up MyHDL\n");
+		}
+	}
+}
+
+static int ring_write(struct ring *r, const unsigned char *p, size_t n) {
+	uint64_t head, tail;
+	size_t k, start;
+
+	while (n > 0) {
+		if (!ring_wait(r, 1)) {
+			return (0);
+		}
+		head = __atomic_load_n(HEAD(r), __ATOMIC_RELAXED);
+		tail = __atomic_load_n(TAIL(r), __ATOMIC_ACQUIRE);
+		start = head % RINGSIZE;
+		k = RINGSIZE - (head - tail);
+		if (k > RINGSIZE - start) {
+			k = RINGSIZE - start;
+		}
+		if (k > n) {
+			k = n;
+		}
+		memcpy(DATA(r) + start, p, k);
+		__atomic_store_n(HEAD(r), head + k, __ATOMIC_SEQ_CST);
+		ring_signal(r, 1);
+		p += k;
+		n -= k;
+	}
+	return (1);
+}
+
+static int ring_read(struct ring *r, unsigned char *p, size_t n) {
+	uint64_t head, tail;
+	size_t k, start;
+
+	while (n > 0) {
+		if (!ring_wait(r, 0)) {
+			return (0);
+		}
+		head = __atomic_load_n(HEAD(r), __ATOMIC_ACQUIRE);
+		tail = __atomic_load_n(TAIL(r), __ATOMIC_RELAXED);
+		start = tail % RINGSIZE;
+		k = head - tail;
+		if (k > RINGSIZE - start) {
+			k = RINGSIZE - start;
+		}
+		if (k > n) {
+			k = n;
+		}
+		memcpy(p, DATA(r) + start, k);
+		__atomic_store_n(TAIL(r), tail + k, __ATOMIC_SEQ_CST);
+		ring_signal(r, 0);
+		p += k;
+		n -= k;
+	}
+	return (1);
+}
+#endif
+
+static void write_all(const void *buf, size_t n) {
+	const char *p = buf;
+	ssize_t k;
+
+#ifdef SHM
+	if (shm) {
+		/* a failure shows up in the next read */
+		ring_write(&tx, buf, n);
+		return;
+	}
+#endif
+	while (n > 0) {
+		k = write(wpipe, p, n);
+		assert(k > 0);
+		p += k;
+		n -= k;
+	}
+}
+
+/* return 0 when MyHDL is down */
+static int read_all(void *buf, size_t n) {
+	char *p = buf;
+	ssize_t k;
+
+#ifdef SHM
+	if (shm) {
+		return (ring_read(&rx, buf, n));
+	}
+#endif
+	while (n > 0) {
+		if ((k = read(rpipe, p, n)) <= 0) {
+			return (0);
+		}
+		p += k;
+		n -= k;
+	}
+	return (1);
+}
+
+static void msg_reserve(size_t n) {
+	if (msglen + n > msgcap) {
+		msgcap = 2 * (msglen + n);
+		msg = realloc(msg, msgcap);
+		assert(msg != NULL);
+	}
+}
+
+static void msg_start(char kind) {
+	/* room for the length */
+	msglen = 4;
+	msg_reserve(1);
+	msg[msglen++] = kind;
+}
+
+static void msg_put_u16(unsigned int v) {
+	msg_reserve(2);
+	msg[msglen++] = v & 0xFF;
+	msg[msglen++] = (v >> 8) & 0xFF;
+}
+
+static void msg_put_u32(PLI_UINT32 v) {
+	msg_reserve(4);
+	msg[msglen++] = v & 0xFF;
+	msg[msglen++] = (v >> 8) & 0xFF;
+	msg[msglen++] = (v >> 16) & 0xFF;
+	msg[msglen++] = (v >> 24) & 0xFF;
+}
+
+static void msg_put_u64(myhdl_time64_t v) {
+	msg_put_u32((PLI_UINT32) (v & 0xFFFFFFFF));
+	msg_put_u32((PLI_UINT32) (v >> 32));
+}
+
+static void msg_put_name(vpiHandle handle) {
+	char *name = vpi_get_str(vpiName, handle);
+	size_t n = strlen(name);
+
+	msg_put_u32(vpi_get(vpiSize, handle));
+	msg_put_u16(n);
+	msg_reserve(n);
+	memcpy(msg + msglen, name, n);
+	msglen += n;
+}
+
+static void msg_send() {
+	size_t n = msglen - 4;
+
+	msg[0] = n & 0xFF;
+	msg[1] = (n >> 8) & 0xFF;
+	msg[2] = (n >> 16) & 0xFF;
+	msg[3] = (n >> 24) & 0xFF;
+	write_all(msg, msglen);
+}
+
+/* return 0 when MyHDL is down */
+static int msg_recv() {
+	unsigned char header[4];
+
+	if (!read_all(header, 4)) {
+		return (0);
+	}
+	replylen = get_u32(header);
+	if (replylen + 1 > replycap) {
+		replycap = 2 * (replylen + 1);
+		reply = realloc(reply, replycap);
+		assert(reply != NULL);
+	}
+	if (!read_all(reply, replylen)) {
+		return (0);
+	}
+	return (1);
+}
+
+/* send the VALUES message and point values to the answer of MyHDL */
+/* return 0 when MyHDL is down or resets */
+static int msg_exchange() {
+	size_t n;
+
+	if (!batching) {
+		msg_send();
+		if (!msg_recv()) {
+			return (0);
+		}
+		values = reply;
+		valueslen = replylen;
+	} else {
+		n = msglen - 4;
+		msg[0] = n & 0xFF;
+		msg[1] = (n >> 8) & 0xFF;
+		msg[2] = (n >> 16) & 0xFF;
+		msg[3] = (n >> 24) & 0xFF;
+		if (windowlen + msglen > windowcap) {
+			windowcap = 2 * (windowlen + msglen);
+			window = realloc(window, windowcap);
+			assert(window != NULL);
+		}
+		memcpy(window + windowlen, msg, msglen);
+		windowlen += msglen;
+		if (batchpos >= replylen) {
+			/* the VALUES of MyHDL are used up */
+			n = windowlen - 4;
+			window[0] = n & 0xFF;
+			window[1] = (n >> 8) & 0xFF;
+			window[2] = (n >> 16) & 0xFF;
+			window[3] = (n >> 24) & 0xFF;
+			write_all(window, windowlen);
+			windowlen = 5;
+			if (!msg_recv() || reply[0] != MSG_BATCH) {
+				return (0);
+			}
+			batchpos = 1;
+		}
+		valueslen = get_u32(reply + batchpos);
+		values = reply + batchpos + 4;
+		batchpos += 4 + valueslen;
+	}
+	/* a reset can't rewind the simulation: exit instead */
+	return (values[0] != MSG_RESET);
+}
+
+static PLI_UINT32 get_u32(const unsigned char *p) {
+	return (PLI_UINT32) p[0] | ((PLI_UINT32) p[1] << 8)
+			| ((PLI_UINT32) p[2] << 16) | ((PLI_UINT32) p[3] << 24);
+}
+
+static myhdl_time64_t get_u64(const unsigned char *p) {
+	return (myhdl_time64_t) get_u32(p) | ((myhdl_time64_t) get_u32(p + 4) << 32);
+}
+
 static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data) {
 	vpiHandle reg_iter, reg_handle;
 	s_vpi_time verilog_time_s;
@@ -117,6 +531,8 @@ static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data) {
 		return (0);
 	}
 	sprintf(buf, "FROM 0 ");
+	msg_start(MSG_FROM);
+	msg_put_u64(0);
 	pli_time = 0;
 	delta = 0;
 
@@ -129,20 +545,38 @@ static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data) {
 			vpi_control(vpiFinish, 1); /* abort simulation */
 			return (0);
 		}
+		if (protocol) {
+			if (from_count == MAXARGS) {
+				vpi_printf("ERROR: $from_myhdl max #args (%d) exceeded\n",
+						MAXARGS);
+				vpi_control(vpiFinish, 1); /* abort simulation */
+				return (0);
+			}
+			from_handles[from_count] = reg_handle;
+			from_sizes[from_count] = vpi_get(vpiSize, reg_handle);
+			from_count++;
+			msg_put_name(reg_handle);
+			continue;
+		}
 		strcat(buf, vpi_get_str(vpiName, reg_handle));
 		strcat(buf, " ");
 		sprintf(s, "%d ", vpi_get(vpiSize, reg_handle));
 		strcat(buf, s);
 	}
-	n = write(wpipe, buf, strlen(buf));
+	if (protocol) {
+		msg_send();
+		n = msg_recv();
+	} else {
+		n = write(wpipe, buf, strlen(buf));
+		n = read(rpipe, buf, MAXLINE);
+	}
 
-	if ((n = read(rpipe, buf, MAXLINE)) == 0) {
+	if (n == 0) {
 		vpi_printf("Info: MyHDL simulator down\n");
 		vpi_control(vpiFinish, 1); /* abort simulation */
 		return (0);
 	}
 	assert(n > 0);
-	buf[n] = '\0';
 
 	return (0);
 }
@@ -178,6 +612,8 @@ static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data) {
 		return (0);
 	}
 	sprintf(buf, "TO 0 ");
+	msg_start(MSG_TO);
+	msg_put_u64(0);
 	pli_time = 0;
 	delta = 0;
 
@@ -196,11 +632,19 @@ static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data) {
 		if (i == MAXARGS) {
 			vpi_printf("ERROR: $to_myhdl max #args (%d) exceeded\n", MAXARGS);
 			vpi_control(vpiFinish, 1); /* abort simulation */
+			return (0);
+		}
+		if (protocol) {
+			to_handles[i] = net_handle;
+			to_sizes[i] = vpi_get(vpiSize, net_handle);
+			to_count = i + 1;
+			msg_put_name(net_handle);
+		} else {
+			strcat(buf, vpi_get_str(vpiName, net_handle));
+			strcat(buf, " ");
+			sprintf(s, "%d ", vpi_get(vpiSize, net_handle));
+			strcat(buf, s);
 		}
-		strcat(buf, vpi_get_str(vpiName, net_handle));
-		strcat(buf, " ");
-		sprintf(s, "%d ", vpi_get(vpiSize, net_handle));
-		strcat(buf, s);
 		changeFlag[i] = 0;
 		id = malloc(sizeof(int));
 		*id = i;
@@ -209,14 +653,19 @@ static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data) {
 		vpi_register_cb(&cb_data_s);
 		i++;
 	}
-	n = write(wpipe, buf, strlen(buf));
+	if (protocol) {
+		msg_send();
+		n = msg_recv();
+	} else {
+		n = write(wpipe, buf, strlen(buf));
+		n = read(rpipe, buf, MAXLINE);
+	}
 
-	if ((n = read(rpipe, buf, MAXLINE)) == 0) {
+	if (n == 0) {
 		vpi_printf("ABORT from $to_myhdl\n");
 		vpi_control(vpiFinish, 1); /* abort simulation */
 		return (0);
 	}
-	buf[n] = '\0';
 	assert(n > 0);
 
 	// register read-only callback //
@@ -256,6 +705,8 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data) {
 	char buf[MAXLINE];
 	int n;
 	int i;
+	int k;
+	int words;
 	char *myhdl_time_string;
 	myhdl_time64_t delay;
 
@@ -263,9 +714,31 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data) {
 
 	if (start_flag) {
 		start_flag = 0;
-		n = write(wpipe, "START", 5);
+		if (protocol) {
+			msg_start(MSG_START);
+			if (protocol >= 5) {
+				/* no restart flag: vvp can't rewind to time 0 */
+				msg_reserve(1);
+				msg[msglen++] = 0;
+			}
+			msg_send();
+			n = msg_recv();
+			/* MyHDL batches from version 4 */
+			if (n && protocol >= 4 && replylen > 1 && reply[1]) {
+				batching = 1;
+				windowcap = MAXLINE;
+				window = malloc(windowcap);
+				assert(window != NULL);
+				window[4] = MSG_BATCH;
+				windowlen = 5;
+				batchpos = replylen;
+			}
+		} else {
+			n = write(wpipe, "START", 5);
+			n = read(rpipe, buf, MAXLINE);
+		}
 		// vpi_printf("INFO: RO cb at start-up\n");
-		if ((n = read(rpipe, buf, MAXLINE)) == 0) {
+		if (n == 0) {
 			vpi_printf("ABORT from RO cb at start-up\n");
 			vpi_control(vpiFinish, 1); /* abort simulation */
 		}
@@ -285,36 +758,62 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data) {
 	assert(
 			(verilog_time & 0xFFFFFFFF)
 					== ((pli_time * 1000 + delta) & 0xFFFFFFFF));
-	sprintf(buf, "%llu ", pli_time);
-	net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
-	value_s.format = vpiHexStrVal;
-	i = 0;
-	while ((net_handle = vpi_scan(net_iter)) != NULL) {
-		if (changeFlag[i]) {
-			strcat(buf, vpi_get_str(vpiName, net_handle));
-			strcat(buf, " ");
-			vpi_get_value(net_handle, &value_s);
-			strcat(buf, value_s.value.str);
-			strcat(buf, " ");
-			changeFlag[i] = 0;
+	if (protocol) {
+		msg_start(MSG_VALUES);
+		msg_put_u64(pli_time);
+		value_s.format = vpiVectorVal;
+		for (i = 0; i < to_count; i++) {
+			if (changeFlag[i]) {
+				vpi_get_value(to_handles[i], &value_s);
+				msg_put_u32(i);
+				words = (to_sizes[i] + 31) / 32;
+				for (k = 0; k < words; k++) {
+					msg_put_u32(value_s.value.vector[k].aval);
+				}
+				for (k = 0; k < words; k++) {
+					msg_put_u32(value_s.value.vector[k].bval);
+				}
+				changeFlag[i] = 0;
+			}
 		}
-		i++;
-	}
-	n = write(wpipe, buf, strlen(buf));
-	if ((n = read(rpipe, buf, MAXLINE)) == 0) {
-		// vpi_printf("ABORT from RO cb\n");
-		vpi_control(vpiFinish, 1); /* abort simulation */
-		return (0);
-	}
-	assert(n > 0);
-	buf[n] = '\0';
+		if (!msg_exchange()) {
+			vpi_control(vpiFinish, 1); /* abort simulation */
+			return (0);
+		}
+		assert(valueslen >= 9 && values[0] == MSG_VALUES);
+		myhdl_time = get_u64(values + 1);
+	} else {
+		sprintf(buf, "%llu ", pli_time);
+		net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+		value_s.format = vpiHexStrVal;
+		i = 0;
+		while ((net_handle = vpi_scan(net_iter)) != NULL) {
+			if (changeFlag[i]) {
+				strcat(buf, vpi_get_str(vpiName, net_handle));
+				strcat(buf, " ");
+				vpi_get_value(net_handle, &value_s);
+				strcat(buf, value_s.value.str);
+				strcat(buf, " ");
+				changeFlag[i] = 0;
+			}
+			i++;
+		}
+		n = write(wpipe, buf, strlen(buf));
+		if ((n = read(rpipe, buf, MAXLINE)) == 0) {
+			// vpi_printf("ABORT from RO cb\n");
+			vpi_control(vpiFinish, 1); /* abort simulation */
+			return (0);
+		}
+		assert(n > 0);
+		buf[n] = '\0';
 
-	/* save copy for later callback */
-	strcpy(bufcp, buf);
+		/* save copy for later callback */
+		strcpy(bufcp, buf);
 
-	myhdl_time_string = strtok(buf, " ");
-	myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string, (char **) NULL,
-			10);
+		myhdl_time_string = strtok(buf, " ");
+		myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string,
+				(char **) NULL, 10);
+	}
 	delay = (myhdl_time - pli_time) * 1000;
 	assert(delay >= 0);
 	assert(delay <= 0xFFFFFFFF);
@@ -383,23 +882,54 @@ static PLI_INT32 delta_callback(p_cb_data cb_data) {
 	s_vpi_time time_s;
 	vpiHandle reg_iter, reg_handle;
 	s_vpi_value value_s;
+	const unsigned char *p;
+	int i;
+	int k;
+	int words;
 
 	if (delta == 0) {
 		return (0);
 	}
 
-	/* skip time value */
-	strtok(bufcp, " ");
+	if (protocol) {
+		/* version 1: the values of all regs follow the time, if any changed */
+		/* version 2: the index and the value of each changed reg */
+		p = values + 9;
+		value_s.format = vpiVectorVal;
+		for (i = 0; p < values + valueslen; i++) {
+			if (protocol > 1) {
+				i = get_u32(p);
+				p += 4;
+				assert(i < from_count);
+			}
+			words = (from_sizes[i] + 31) / 32;
+			if (words > vectorcap) {
+				vectorcap = 2 * words;
+				vector = realloc(vector, vectorcap * sizeof(s_vpi_vecval));
+				assert(vector != NULL);
+			}
+			for (k = 0; k < words; k++) {
+				vector[k].aval = get_u32(p);
+				vector[k].bval = 0;
+				p += 4;
+			}
+			value_s.value.vector = vector;
+			vpi_put_value(from_handles[i], &value_s, NULL, vpiNoDelay);
+		}
+	} else {
+		/* skip time value */
+		strtok(bufcp, " ");
 
-	reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
+		reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
 
-	value_s.format = vpiHexStrVal;
-	while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
-		reg_handle = vpi_scan(reg_iter);
-		vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
-	}
-	if (reg_iter != NULL) {
-		vpi_free_object(reg_iter);
+		value_s.format = vpiHexStrVal;
+		while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
+			reg_handle = vpi_scan(reg_iter);
+			vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
+		}
+		if (reg_iter != NULL) {
+			vpi_free_object(reg_iter);
+		}
 	}
 
 	// register readonly callback //
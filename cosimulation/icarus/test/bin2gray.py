@@ -1,15 +1,12 @@
-import os
-
-from myhdl import Cosimulation
+from myhdl import Cosimulation, cosimCompile
 
 cmd = "iverilog -o bin2gray.o -Dwidth=%s " + \
       "../../test/verilog/bin2gray.v " + \
       "../../test/verilog/dut_bin2gray.v "
+sources = ["../../test/verilog/bin2gray.v",
+           "../../test/verilog/dut_bin2gray.v"]
       
 def bin2gray(B, G):
     width = len(B)
-    os.system(cmd % width)
+    cosimCompile(cmd % width, "bin2gray.o", sources)
     return Cosimulation("vvp -m ../myhdl.vpi bin2gray.o", B=B, G=G)
-               
-
-    
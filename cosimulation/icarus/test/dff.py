@@ -1,12 +1,11 @@
-import os
-
-from myhdl import Cosimulation
+from myhdl import Cosimulation, cosimCompile
 
 cmd = "iverilog -o dff.o " + \
       "../../test/verilog/dff.v " + \
       "../../test/verilog/dut_dff.v "
+sources = ["../../test/verilog/dff.v", "../../test/verilog/dut_dff.v"]
       
 def dff(q, d, clk, reset):
-    os.system(cmd)
+    cosimCompile(cmd, "dff.o", sources)
     return Cosimulation("vvp -m ../myhdl.vpi dff.o", **locals())
                
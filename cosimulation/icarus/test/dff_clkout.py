@@ -1,15 +1,12 @@
-import os
-import os.path as path
-
-from myhdl import Cosimulation
+from myhdl import Cosimulation, cosimCompile
 
 cmd = "iverilog -o dff_clkout.o " + \
       "../../test/verilog/dff_clkout.v " + \
       "../../test/verilog/dut_dff_clkout.v "
+sources = ["../../test/verilog/dff_clkout.v",
+           "../../test/verilog/dut_dff_clkout.v"]
       
 def dff_clkout(clkout, q, d, clk, reset):
-    if path.exists("dff_clkout"):
-        os.remove("dff_clkout")
-    os.system(cmd)
+    cosimCompile(cmd, "dff_clkout.o", sources)
     return Cosimulation("vvp -m ../myhdl.vpi dff_clkout.o", **locals())
                
@@ -1,12 +1,11 @@
-import os
-
-from myhdl import Cosimulation
+from myhdl import Cosimulation, cosimCompile
 
 cmd = "iverilog -o inc.o -Dn=%s " + \
       "../../test/verilog/inc.v " + \
       "../../test/verilog/dut_inc.v "
+sources = ["../../test/verilog/inc.v", "../../test/verilog/dut_inc.v"]
       
 def inc(count, enable, clock, reset, n):
-    os.system(cmd % n)
+    cosimCompile(cmd % n, "inc.o", sources)
     return Cosimulation("vvp -m ../myhdl.vpi inc.o", **locals())
                
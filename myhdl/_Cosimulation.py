@@ -17,18 +17,121 @@
 #  License along with this library; if not, write to the Free Software
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 
-""" Module that provides the Cosimulation class """
+""" Module that provides the Cosimulation class
+
+The HDL simulator talks to MyHDL over a pair of pipes. The original
+protocol exchanges lines of text, with values as hex strings. When the
+VPI module supports it, the binary protocol is used instead. MyHDL
+offers the highest version it supports in the MYHDL_PROTOCOL environment
+variable, and the VPI module answers with a greeting that holds the
+version it will speak. A VPI module that doesn't know the binary
+protocol ignores the variable and starts the text handshake.
+
+A binary message is a 32 bit length, followed by the message body.
+The first byte of the body is the message kind. All numbers are little
+endian. Times are 64 bit words. A value of n bits is sent as the
+(n + 31) // 32 words of 32 bits of its aval part, followed by as many
+words of its bval part for values that can be x or z, as in the
+vpiVectorVal format of VPI.
+
+FROM, TO -- time, then for each signal its size (32 bits), the length
+            of its name (16 bits) and its name
+START -- empty, or from version 5, a byte of flags: 1 when the HDL
+         simulator restarts on RESET
+OK -- empty
+VALUES -- time, then from the HDL simulator, the index (32 bits) and the
+          aval and bval parts of each changed signal; from MyHDL, in
+          version 1, nothing or the aval parts of all signals, and in
+          version 2, the index and the aval part of each changed signal
+SHM -- empty, from the HDL simulator before the FROM and TO messages,
+       when it switches to the shared memory transport
+RESET -- empty, from MyHDL in version 3, instead of the VALUES message;
+         the HDL simulator answers OK and restarts the handshake for
+         the next Cosimulation object of a persistent simulator, or
+         exits if it can't restart. From version 5, MyHDL only sends it
+         when the START message had the restart flag.
+BATCH -- from version 4, a sequence of VALUES messages, each with its
+         length, instead of single VALUES messages
+
+In version 4, the OK answer to START is followed by a byte, that is 1
+when MyHDL batches. MyHDL then doesn't wait for the values of the HDL
+simulator at each time step. It collects its VALUES messages in a BATCH,
+that it sends when it needs the values of the HDL simulator. The HDL
+simulator runs through the time steps of the BATCH, collects its own
+VALUES messages in a BATCH, and sends it when it has used up the VALUES
+of MyHDL. MyHDL applies the last values of a BATCH, so it only batches
+while nothing in the simulation can read the signals of the HDL simulator.
+
+With the shared memory transport, the messages go through two rings in
+a shared memory region, one for each direction, instead of the pipes.
+MyHDL offers it in the MYHDL_SHM environment variable, with the file
+descriptors of the memory and of an eventfd for each side, first that
+of MyHDL. A ring is a stream of bytes with a single producer and a
+single consumer, that count the bytes they wrote and read at the start
+of the ring. A side that has to wait spins for a while, then sets its
+waiting flag in the ring and sleeps on its own eventfd, which the other
+side signals when the flag is set. A side waits for one ring at a time,
+so that it only takes the wakeups that are meant for it. The pipes stay
+open, to detect the end of the other side. The Python side accesses the
+counts and the flags as aligned 64 bit words, and orders them with the
+data by memory fences.
+
+"""
 import sys
 import os
 #import shlex
+import atexit
+import ctypes
+import ctypes.util
+import hashlib
+import mmap
+import platform
+import select
+import struct
+import shutil
 import subprocess
+import tempfile
 from os import set_inheritable
+from types import CodeType, FunctionType, MethodType, ModuleType
 
 from myhdl._intbv import intbv
+from myhdl._Signal import _Signal
+from myhdl._Waiter import _StaticWaiter
 from myhdl import _simulator, CosimulationError
 
 _MAXLINE = 4096
 
+# binary protocol
+_PROTOCOL = 5
+_GREETING = b"\0MYHDL\0"
+_FROM = b"F"
+_TO = b"T"
+_START = b"S"
+_OK = b"O"
+_VALUES = b"V"
+_SHM = b"M"
+_RESET = b"R"
+_BATCH = b"B"
+# the flags of START
+_RESTART = 1
+_u16 = struct.Struct('<H')
+_u32 = struct.Struct('<I')
+_u64 = struct.Struct('<Q')
+_bufsize = 1 << 16
+
+# shared memory transport
+_ringsize = 1 << 20
+_ringheader = 256
+_spin = 2000 if (os.cpu_count() or 1) > 1 else 0
+_timeout = 10
+# memory_order_seq_cst of C11
+_SEQ_CST = 5
+# the fence of the shared memory transport, once looked up
+_fences = []
+
+# idle persistent HDL simulators, by command, protocol and transport
+_servers = {}
+
 
 class _error:
     pass
@@ -38,28 +141,394 @@ _error.TimeZero = "myhdl vpi call when not at time 0"
 _error.NoCommunication = "No signals communicating to myhdl"
 _error.SimulationEnd = "Premature simulation end"
 _error.OSError = "OSError"
+_error.Protocol = "Unsupported cosimulation protocol"
+_error.Message = "Unexpected cosimulation message"
+_error.Transport = "Unsupported cosimulation transport"
+_error.Compile = "HDL compilation failed"
 
 
-class Cosimulation(object):
+class _Channel(object):
 
-    """ Cosimulation class. """
+    """ Binary messages over a pair of pipes. """
 
-    def __init__(self, exe="", **kwargs):
-        """ Construct a cosimulation object. """
-        rt, wt = os.pipe()
-        rf, wf = os.pipe()
+    def __init__(self, rfd, wfd, data=b""):
+        self.rfd = rfd
+        self.wfd = wfd
+        self.buf = bytearray(data)
+        self.pos = 0
 
-        # Disable inheritance for ends that we don't want the child to have
-        set_inheritable(rt, False)
-        set_inheritable(wf, False)
+    def _read(self, n):
+        return os.read(self.rfd, n)
 
-        # Enable inheritance for child ends
-        set_inheritable(wt, True)
-        set_inheritable(rf, True)
+    def _write(self, data):
+        return os.write(self.wfd, data)
 
-        self._rt = rt
-        self._wf = wf
+    def close(self):
+        """ Release what the channel holds of the shared memory. """
+        pass
+
+    def send(self, msg):
+        data = memoryview(_u32.pack(len(msg)) + msg)
+        while data:
+            data = data[self._write(data):]
+
+    def _fill(self, n):
+        buf = self.buf
+        if self.pos:
+            del buf[:self.pos]
+            self.pos = 0
+        while len(buf) < n:
+            data = self._read(max(_bufsize, n - len(buf)))
+            if not data:
+                raise CosimulationError(_error.SimulationEnd)
+            buf += data
+
+    def recv(self):
+        """ Return the body of the next message. """
+        buf = self.buf
+        pos = self.pos
+        if pos == len(buf):
+            # in lockstep, a read mostly returns a single message
+            data = self._read(_bufsize)
+            if len(data) >= 4 and _u32.unpack_from(data)[0] + 4 == len(data):
+                return data[4:]
+            buf[:] = data
+            self.pos = pos = 0
+            if not data:
+                raise CosimulationError(_error.SimulationEnd)
+        if len(buf) < pos + 4:
+            self._fill(4)
+            pos = 0
+        n, = _u32.unpack_from(buf, pos)
+        if len(buf) < pos + 4 + n:
+            self._fill(4 + n)
+            pos = 0
+        self.pos = pos + 4 + n
+        return bytes(buf[pos + 4:self.pos])
+
+
+def _fence():
+    """ Return a function that makes a full memory fence, or None.
+
+    The fence of libatomic is a function, that ctypes can call. Without
+    it, x86 processors keep the order of the stores, and of the loads,
+    that the transport relies on.
+    """
+    if not _fences:
+        fence = None
+        name = ctypes.util.find_library('atomic')
+        try:
+            func = ctypes.CDLL(name).atomic_thread_fence
+        except (OSError, AttributeError, TypeError):
+            if platform.machine().lower() in ('x86_64', 'amd64', 'i386',
+                                              'i686', 'x86'):
+                fence = lambda: None
+        else:
+            func.argtypes = [ctypes.c_int]
+            func.restype = None
+            fence = lambda: func(_SEQ_CST)
+        _fences.append(fence)
+    return _fences[0]
+
+
+class _Ring(object):
+
+    """ Byte ring in shared memory, with a single producer and consumer.
+
+    The head and the tail count the bytes that were written and read.
+    Each is on its own cache line, as are the waiting flags of the
+    consumer and of the producer. They are accessed through ctypes
+    views, as single aligned words. A fence orders the data before the
+    count that publishes it.
+
+    """
+
+    def __init__(self, mem, offset, efd, peerfd, alive):
+        word = ctypes.c_uint64.from_buffer
+        self.mem = mem
+        self.head = word(mem, offset)
+        self.tail = word(mem, offset + 64)
+        self.readers = word(mem, offset + 128)
+        self.writers = word(mem, offset + 192)
+        self.base = offset + _ringheader
+        self.fence = _fence()
+        # this side sleeps on efd, and wakes up the other on peerfd
+        self.efd = efd
+        self.peerfd = peerfd
+        self.poll = select.poll()
+        self.poll.register(efd, select.POLLIN)
+        self.poll.register(alive, select.POLLIN)
+
+    def _wait(self, ready, flag):
+        for i in range(_spin):
+            if ready():
+                return
+        flag.value = 1
+        # the other side sees the flag, or this side sees it ready
+        self.fence()
+        try:
+            # the timeout covers a wakeup that is lost as the flag is set
+            while not ready():
+                for fd, event in self.poll.poll(_timeout):
+                    if fd == self.efd:
+                        os.eventfd_read(fd)
+                    elif not ready():
+                        raise CosimulationError(_error.SimulationEnd)
+        finally:
+            flag.value = 0
+
+    def close(self):
+        """ Release the views, which keep the memory from being closed. """
+        self.head = self.tail = self.readers = self.writers = None
+
+    def read(self, n):
+        """ Return up to n bytes, and at least one. """
+        mem = self.mem
+        head = self.head
+        tail = self.tail.value
+        avail = head.value - tail
+        if not avail:
+            self._wait(lambda: head.value != tail, self.readers)
+            avail = head.value - tail
+        # the data is loaded after the head that published it
+        self.fence()
+        n = min(n, avail)
+        start = self.base + tail % _ringsize
+        end = start + n
+        if end <= self.base + _ringsize:
+            data = mem[start:end]
+        else:
+            end = self.base + _ringsize
+            data = mem[start:end] + mem[self.base:self.base + n - (end - start)]
+        # and before the tail that frees its space
+        self.fence()
+        self.tail.value = tail + n
+        self.fence()
+        if self.writers.value:
+            os.eventfd_write(self.peerfd, 1)
+        return data
+
+    def write(self, data):
+        """ Write up to all of data, and at least one byte. """
+        mem = self.mem
+        tail = self.tail
+        head = self.head.value
+        space = _ringsize - (head - tail.value)
+        if not space:
+            self._wait(lambda: head - tail.value < _ringsize, self.writers)
+            space = _ringsize - (head - tail.value)
+        # the data is stored after the tail that freed its space
+        self.fence()
+        n = min(len(data), space)
+        start = self.base + head % _ringsize
+        end = start + n
+        if end <= self.base + _ringsize:
+            mem[start:end] = data[:n]
+        else:
+            end = self.base + _ringsize
+            mem[start:end] = data[:end - start]
+            mem[self.base:self.base + n - (end - start)] = data[end - start:n]
+        # and before the head that publishes it
+        self.fence()
+        self.head.value = head + n
+        self.fence()
+        if self.readers.value:
+            os.eventfd_write(self.peerfd, 1)
+        return n
+
+
+class _ShmChannel(_Channel):
+
+    """ Binary messages over a pair of rings in shared memory. """
 
+    def __init__(self, rfd, wfd, rx, tx):
+        _Channel.__init__(self, rfd, wfd)
+        self._read = rx.read
+        self._write = tx.write
+        self._rings = (rx, tx)
+
+    def close(self):
+        for ring in self._rings:
+            ring.close()
+
+
+def _shmRings(mem, efds, alive, peer=False):
+    """ Return the receive and the transmit ring of a side. """
+    efd, peerfd = efds[::-1] if peer else efds
+    rings = [_Ring(mem, i * (_ringheader + _ringsize), efd, peerfd, alive)
+             for i in range(2)]
+    return rings[::-1] if peer else rings
+
+
+def _words(size):
+    """ Return the number of bytes of the 32 bit words of a value. """
+    return (size + 31) // 32 * 4
+
+
+def _parseText(data):
+    s = data.decode()
+    if not s:
+        raise CosimulationError(_error.SimulationEnd)
+    e = s.split()
+    if e[0] in ("FROM", "TO"):
+        sigs = [(e[i], int(e[i + 1])) for i in range(2, len(e) - 1, 2)]
+        return e[0], int(e[1]), sigs
+    return e[0], 0, []
+
+
+def _parseBinary(msg):
+    kind = msg[:1]
+    if kind == _START:
+        return "START", 0, []
+    if kind not in (_FROM, _TO):
+        raise CosimulationError(_error.Message, repr(kind))
+    time, = _u64.unpack_from(msg, 1)
+    sigs = []
+    pos = 9
+    while pos < len(msg):
+        size, = _u32.unpack_from(msg, pos)
+        n, = _u16.unpack_from(msg, pos + 4)
+        pos += 6 + n
+        sigs.append((msg[pos - n:pos].decode(), size))
+    return ("FROM" if kind == _FROM else "TO"), time, sigs
+
+
+def _value(s, mask, aval, bval):
+    """ Return the value of a signal from its aval and bval parts. """
+    if bval:
+        if bval != mask:
+            return intbv(0)
+        elif aval == mask:
+            return s._init
+        elif aval == 0:
+            return None
+        return intbv(0)
+    if s._nrbits and s._min is not None and s._min < 0:
+        if aval >= (1 << (s._nrbits - 1)):
+            aval |= (-1 << s._nrbits)
+    return aval
+
+
+def _hdlSignals(sigs):
+    """ Return the signals driven by the HDL simulator, with the shadow
+    signals that follow them. """
+    ids = {id(s) for s in sigs}
+    sigs = list(sigs)
+    shadows = [s for s in _simulator._context()._signals
+               if hasattr(s, '_waiter')]
+    changed = True
+    while changed:
+        changed = False
+        for s in shadows:
+            if id(s) in ids:
+                continue
+            sources = list(getattr(s, '_sigargs', ()))
+            sources.append(getattr(s, '_sig', None))
+            if any(id(src) in ids for src in sources):
+                ids.add(id(s))
+                sigs.append(s)
+                changed = True
+    return sigs
+
+
+def _codeNames(code):
+    """ Return the global and free names of a code object and the code
+    objects nested in it. """
+    names = set(code.co_names) | set(code.co_freevars)
+    for c in code.co_consts:
+        if isinstance(c, CodeType):
+            names |= _codeNames(c)
+    return names
+
+
+def _namespace(func):
+    """ Return the names that a function can look up. """
+    namespace = dict(func.__globals__)
+    for n, cell in zip(func.__code__.co_freevars, func.__closure__ or ()):
+        try:
+            namespace[n] = cell.cell_contents
+        except ValueError:
+            pass
+    return namespace
+
+
+def _readSignals(arg):
+    """ Return the signals that a simulation argument can read, or None
+    when they can't be known.
+
+    The signals are those that the code of a block refers to, directly,
+    as attributes of the objects it refers to, or through the functions
+    it calls. The reads of generators and waiters are not known.
+    """
+    if isinstance(arg, Cosimulation):
+        return list(arg._fromSigs)
+    if not hasattr(arg, 'symdict'):
+        return None
+    sigs = list(arg.sigdict.values())
+    funcs = [(arg.funcobj.__code__, arg.symdict)]
+    seen = set()
+    while funcs:
+        code, namespace = funcs.pop()
+        if code in seen:
+            continue
+        seen.add(code)
+        for n in _codeNames(code):
+            obj = namespace.get(n)
+            if isinstance(obj, MethodType):
+                funcs.append((obj.__func__.__code__, _namespace(obj.__func__)))
+                obj = obj.__self__
+            if isinstance(obj, FunctionType):
+                funcs.append((obj.__code__, _namespace(obj)))
+            elif isinstance(obj, (_Signal, list)):
+                sigs.append(obj)
+            elif (hasattr(obj, '__dict__') and
+                  not isinstance(obj, (Cosimulation, ModuleType, type))):
+                sigs.extend(vars(obj).values())
+    reads = []
+    for s in sigs:
+        if isinstance(s, _Signal):
+            reads.append(s)
+        elif isinstance(s, list):
+            reads.extend(e for e in s if isinstance(e, _Signal))
+    return reads
+
+
+def _stop(server):
+    rt, wf, efds, mem, child, channel = server[:6]
+    os.close(rt)
+    os.close(wf)
+    for fd in efds:
+        os.close(fd)
+    if mem is not None:
+        if channel is not None:
+            channel.close()
+        mem.close()
+    child.wait()
+
+
+class Cosimulation(object):
+
+    """ Cosimulation class.
+
+    The protocol attribute selects the protocol that is offered to the
+    HDL simulator: 'binary', with a fallback to text, or 'text'. The
+    transport attribute selects how binary messages are exchanged:
+    'pipe', or 'shm' for shared memory, with a fallback to pipes. When
+    the persistent attribute is set, an HDL simulator that announces that
+    it can restart is reset at the end of a simulation, and reused by the
+    next object with the same command. The window attribute sets the number of time
+    steps that are batched, for an HDL simulator that only depends on
+    MyHDL, not the other way around.
+
+    """
+
+    protocol = 'binary'
+    transport = 'pipe'
+    persistent = False
+    window = 0
+
+    def __init__(self, exe="", **kwargs):
+        """ Construct a cosimulation object. """
         self._fromSignames = fromSignames = []
         self._fromSizes = fromSizes = []
         self._fromSigs = fromSigs = []
@@ -68,57 +537,64 @@ class Cosimulation(object):
         self._toSigs = toSigs = []
         self._toSigDict = toSigDict = {}
         self._hasChange = 0
+        self._changed = []
         self._getMode = 1
+        self._batched = False
+        self._restarts = False
 
-        env = os.environ.copy()
-
-        # In Windows the FDs aren't inheritable when using Popen,
-        # only the HANDLEs are
-        if sys.platform != "win32":
-            env['MYHDL_TO_PIPE'] = str(wt)
-            env['MYHDL_FROM_PIPE'] = str(rf)
-        else:
-            import msvcrt
-            env['MYHDL_TO_PIPE'] = str(msvcrt.get_osfhandle(wt))
-            env['MYHDL_FROM_PIPE'] = str(msvcrt.get_osfhandle(rf))
+        if self.protocol not in ('binary', 'text'):
+            raise CosimulationError(_error.Protocol, repr(self.protocol))
+        if self.transport not in ('pipe', 'shm'):
+            raise CosimulationError(_error.Transport, repr(self.transport))
 
         if isinstance(exe, str):
 #             exe = shlex.split(exe)
             exe = exe.split(' ')
 
+        self._key = None
+        if self.persistent:
+            self._key = (tuple(exe), self.protocol, self.transport)
+        if _servers.get(self._key):
+            # an idle simulator that restarted the handshake
+            (self._rt, self._wf, self._efds, self._mem, self._child,
+             self._channel, self._version) = _servers[self._key].pop()
+            data = None
+        else:
+            data = self._spawn(exe)
+        rt = self._rt
+        wf = self._wf
 
-        try:
-            sp = subprocess.Popen(exe, env=env, close_fds=False)
-        except OSError as e:
-            raise CosimulationError(_error.OSError, str(e))
-
-        self._child = sp
-
-        os.close(wt)
-        os.close(rf)
         while 1:
-            s = os.read(rt, _MAXLINE).decode()
-            if not s:
-                raise CosimulationError(_error.SimulationEnd)
-            e = s.split()
-            if e[0] == "FROM":
-                if int(e[1]) != 0:
+            if self._channel is not None:
+                msg = self._channel.recv()
+                if msg == _SHM and self._mem is not None:
+                    rx, tx = _shmRings(self._mem, self._efds, rt)
+                    self._channel = _ShmChannel(rt, wf, rx, tx)
+                    continue
+                if msg[:1] == _START and self._version >= 5:
+                    self._restarts = len(msg) > 1 and bool(msg[1] & _RESTART)
+                kind, time, sigs = _parseBinary(msg)
+            else:
+                if data is None:
+                    data = os.read(rt, _MAXLINE)
+                kind, time, sigs = _parseText(data)
+                data = None
+            if kind == "FROM":
+                if time != 0:
                     raise CosimulationError(_error.TimeZero, "$from_myhdl")
-                for i in range(2, len(e) - 1, 2):
-                    n = e[i]
+                for n, size in sigs:
                     if n in fromSignames:
                         raise CosimulationError(_error.DuplicateSigNames, n)
                     if not n in kwargs:
                         raise CosimulationError(_error.SigNotFound, n)
                     fromSignames.append(n)
                     fromSigs.append(kwargs[n])
-                    fromSizes.append(int(e[i + 1]))
-                os.write(wf, b"OK")
-            elif e[0] == "TO":
-                if int(e[1]) != 0:
+                    fromSizes.append(size)
+                self._ack()
+            elif kind == "TO":
+                if time != 0:
                     raise CosimulationError(_error.TimeZero, "$to_myhdl")
-                for i in range(2, len(e) - 1, 2):
-                    n = e[i]
+                for n, size in sigs:
                     if n in toSignames:
                         raise CosimulationError(_error.DuplicateSigNames, n)
                     if not n in kwargs:
@@ -126,16 +602,149 @@ class Cosimulation(object):
                     toSignames.append(n)
                     toSigs.append(kwargs[n])
                     toSigDict[n] = kwargs[n]
-                    toSizes.append(int(e[i + 1]))
-                os.write(wf, b"OK")
-            elif e[0] == "START":
+                    toSizes.append(size)
+                self._ack()
+            elif kind == "START":
                 if not toSignames:
                     raise CosimulationError(_error.NoCommunication)
-                os.write(wf, b"OK")
+                self._batched = self.window > 0 and self._version >= 4
+                if self._version >= 4:
+                    self._channel.send(_OK + bytes([self._batched]))
+                else:
+                    self._ack()
                 break
             else:
                 raise CosimulationError("Unexpected cosim input")
 
+        if self._channel is not None:
+            self._fromCodec = [(s, _words(size), (1 << size) - 1)
+                               for s, size in zip(fromSigs, fromSizes)]
+            self._toCodec = [(s, _words(size), (1 << size) - 1)
+                             for s, size in zip(toSigs, toSizes)]
+            self._get = self._getBinary
+            if self._version == 1:
+                self._put = self._putBinary
+            else:
+                self._put = self._putChanges
+            if self._batched:
+                self._get = self._getBatch
+                self._put = self._putBatch
+                self._batch = []
+                self._window = self.window
+                # the values of the HDL simulator that are still to come
+                self._pending = 1
+                self._sync = False
+                # whether each time step is synchronized, once known
+                self._lockstep = None
+                self._hdlSigs = toSigs
+
+    def _spawn(self, exe):
+        """ Start the HDL simulator and return its first output. """
+        rt, wt = os.pipe()
+        rf, wf = os.pipe()
+
+        # Disable inheritance for ends that we don't want the child to have
+        set_inheritable(rt, False)
+        set_inheritable(wf, False)
+
+        # Enable inheritance for child ends
+        set_inheritable(wt, True)
+        set_inheritable(rf, True)
+
+        self._rt = rt
+        self._wf = wf
+        self._channel = None
+        self._version = 0
+
+        env = os.environ.copy()
+        if self.protocol == 'binary':
+            env['MYHDL_PROTOCOL'] = str(_PROTOCOL)
+        self._mem = None
+        self._efds = ()
+        if self.transport == 'shm' and self.protocol == 'binary':
+            if not hasattr(os, 'eventfd'):
+                raise CosimulationError(_error.Transport,
+                                        "shm needs os.memfd_create and os.eventfd")
+            if _fence() is None:
+                raise CosimulationError(_error.Transport,
+                                        "shm needs libatomic on this platform")
+            memfd = os.memfd_create("myhdl", 0)
+            os.ftruncate(memfd, 2 * (_ringheader + _ringsize))
+            self._efds = (os.eventfd(0), os.eventfd(0))
+            for fd in (memfd,) + self._efds:
+                set_inheritable(fd, True)
+            env['MYHDL_SHM'] = "%d %d %d" % ((memfd,) + self._efds)
+
+        # In Windows the FDs aren't inheritable when using Popen,
+        # only the HANDLEs are
+        if sys.platform != "win32":
+            env['MYHDL_TO_PIPE'] = str(wt)
+            env['MYHDL_FROM_PIPE'] = str(rf)
+        else:
+            import msvcrt
+            env['MYHDL_TO_PIPE'] = str(msvcrt.get_osfhandle(wt))
+            env['MYHDL_FROM_PIPE'] = str(msvcrt.get_osfhandle(rf))
+
+        try:
+            sp = subprocess.Popen(exe, env=env, close_fds=False)
+        except OSError as e:
+            raise CosimulationError(_error.OSError, str(e))
+
+        self._child = sp
+
+        os.close(wt)
+        os.close(rf)
+        if self._efds:
+            self._mem = mmap.mmap(memfd, 2 * (_ringheader + _ringsize))
+            os.close(memfd)
+        data = os.read(rt, _MAXLINE)
+        if data.startswith(_GREETING) and len(data) > len(_GREETING):
+            version = data[len(_GREETING)]
+            if not 1 <= version <= _PROTOCOL:
+                raise CosimulationError(_error.Protocol, "version %d" % version)
+            self._channel = _Channel(rt, wf, data[len(_GREETING) + 1:])
+            self._version = version
+        return data
+
+    def _server(self):
+        return (self._rt, self._wf, self._efds, self._mem, self._child,
+                self._channel, self._version)
+
+    def _close(self):
+        if self._batched:
+            # let the HDL simulator run to the end
+            try:
+                self._flush()
+            except (CosimulationError, OSError):
+                pass
+        if (self._key is not None and self._restarts and
+                self._child.poll() is None):
+            # keep the simulator for the next Cosimulation object
+            try:
+                self._channel.send(_RESET)
+                while self._channel.recv() != _OK:
+                    pass
+            except (CosimulationError, OSError):
+                pass
+            else:
+                _servers.setdefault(self._key, []).append(self._server())
+                return
+        _stop(self._server())
+
+    @staticmethod
+    def shutdown():
+        """ Stop the idle persistent HDL simulators. """
+        for servers in _servers.values():
+            for server in servers:
+                _stop(server)
+        _servers.clear()
+
+    def _ack(self):
+        if self._channel is not None:
+            self._channel.send(_OK)
+        else:
+            os.write(self._wf, b"OK")
+
     def _get(self):
         if not self._getMode:
             return
@@ -178,11 +787,187 @@ class Cosimulation(object):
                 if buf[-1] == 'L':
                     buf = buf[:-1]  # strip trailing L
                 buflist.append(buf)
+            del self._changed[:]
         os.write(self._wf, (" ".join(buflist)).encode())
         self._getMode = 1
 
-    def _waiter(self):
-        sigs = tuple(self._fromSigs)
-        while 1:
-            yield sigs
-            self._hasChange = 1
+    def _getBinary(self):
+        if not self._getMode:
+            return
+        msg = self._channel.recv()
+        if msg[:1] != _VALUES:
+            raise CosimulationError(_error.Message, repr(msg[:1]))
+        codec = self._toCodec
+        pos = 9
+        while pos < len(msg):
+            i, = _u32.unpack_from(msg, pos)
+            s, n, mask = codec[i]
+            pos += 4 + 2 * n
+            s.next = _value(s, mask,
+                            int.from_bytes(msg[pos - 2 * n:pos - n], 'little'),
+                            int.from_bytes(msg[pos - n:pos], 'little'))
+
+        self._getMode = 0
+
+    def sync(self):
+        """ Synchronize a batched cosimulation at the current time step.
+
+        The signals driven by the HDL simulator get its values in the next
+        delta cycle.
+
+        """
+        self._sync = True
+
+    def _findReaders(self, arglist):
+        """ Synchronize each time step when the arguments of a simulation
+        can read the signals driven by the HDL simulator.
+
+        These signals only get the last values of a batch, when it ends.
+        """
+        if not self._batched:
+            return
+        self._hdlSigs = sigs = _hdlSignals(self._toSigs)
+        ids = {id(s) for s in sigs}
+        for arg in arglist:
+            if arg == True:
+                continue
+            reads = _readSignals(arg)
+            if reads is None or any(id(s) in ids for s in reads):
+                self._lockstep = True
+                return
+
+    def _getBatch(self):
+        if not self._getMode:
+            return
+        self._getMode = 0
+        lockstep = self._lockstep
+        if lockstep is None:
+            # tracing and capturing need the changes at their own times
+            self._lockstep = lockstep = any(
+                s._tracing or s._capture is not None for s in self._hdlSigs)
+        if lockstep or self._sync or len(self._batch) >= self._window:
+            self._flush()
+
+    def _flush(self):
+        """ Send the batched values, and apply the last values of the HDL
+        simulator. """
+        self._sync = False
+        channel = self._channel
+        if self._batch:
+            self._pending += len(self._batch)
+            channel.send(_BATCH + b"".join(self._batch))
+            del self._batch[:]
+        codec = self._toCodec
+        last = {}
+        while self._pending:
+            msg = channel.recv()
+            if msg[:1] != _BATCH:
+                raise CosimulationError(_error.Message, repr(msg[:1]))
+            pos = 1
+            while pos < len(msg):
+                end = pos + 4 + _u32.unpack_from(msg, pos)[0]
+                pos += 13
+                while pos < end:
+                    i, = _u32.unpack_from(msg, pos)
+                    n = codec[i][1]
+                    pos += 4 + 2 * n
+                    last[i] = msg[pos - 2 * n:pos]
+                self._pending -= 1
+        for i, data in last.items():
+            s, n, mask = codec[i]
+            s.next = _value(s, mask, int.from_bytes(data[:n], 'little'),
+                            int.from_bytes(data[n:], 'little'))
+
+    def _putBinary(self, time):
+        msg = [_VALUES, _u64.pack(time)]
+        if self._hasChange:
+            self._hasChange = 0
+            for s, n, mask in self._fromCodec:
+                msg.append((int(s._val) & mask).to_bytes(n, 'little'))
+            del self._changed[:]
+        self._channel.send(b"".join(msg))
+        self._getMode = 1
+
+    def _changes(self, time):
+        msg = [_VALUES, _u64.pack(time)]
+        if self._hasChange:
+            self._hasChange = 0
+            codec = self._fromCodec
+            for i in self._changed:
+                s, n, mask = codec[i]
+                msg.append(_u32.pack(i))
+                msg.append((int(s._val) & mask).to_bytes(n, 'little'))
+            del self._changed[:]
+        return b"".join(msg)
+
+    def _putChanges(self, time):
+        self._channel.send(self._changes(time))
+        self._getMode = 1
+
+    def _putBatch(self, time):
+        msg = self._changes(time)
+        self._batch.append(_u32.pack(len(msg)) + msg)
+        self._getMode = 1
+
+    def _waiters(self):
+        """ Return a waiter per from-signal, that records its changes. """
+        changed = self._changed
+
+        def waiter(i):
+            def change():
+                self._hasChange = 1
+                changed.append(i)
+            return _StaticWaiter(change, (self._fromSigs[i],))
+
+        return [waiter(i) for i in range(len(self._fromSigs))]
+
+
+atexit.register(Cosimulation.shutdown)
+
+
+class _CosimCompileClass(object):
+
+    """ Run an HDL compile command, with a cache of its output.
+
+    The output is cached under a hash of the command and of the names and
+    contents of the sources, so that it is only compiled again when one
+    of them changes.
+
+    """
+
+    __slots__ = ("directory",)
+
+    def __init__(self):
+        self.directory = None
+
+    def __call__(self, cmd, output, sources):
+        directory = self.directory
+        if directory is None:
+            directory = os.path.join(
+                os.environ.get('XDG_CACHE_HOME',
+                               os.path.expanduser(os.path.join('~', '.cache'))),
+                'myhdl')
+        h = hashlib.sha256(repr(cmd).encode())
+        for name in sources:
+            with open(name, 'rb') as f:
+                data = f.read()
+            h.update(b"\0%s\0%d\0" % (name.encode(), len(data)))
+            h.update(data)
+        entry = os.path.join(directory, h.hexdigest())
+        if os.path.exists(entry):
+            shutil.copy(entry, output)
+            return output
+        if os.path.exists(output):
+            os.remove(output)
+        if subprocess.call(cmd, shell=isinstance(cmd, str)) or \
+                not os.path.exists(output):
+            raise CosimulationError(_error.Compile, str(cmd))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory)
+        os.close(fd)
+        shutil.copy(output, tmp)
+        os.replace(tmp, entry)
+        return output
+
+
+cosimCompile = _CosimCompileClass()
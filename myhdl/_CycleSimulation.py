@@ -0,0 +1,278 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the CycleSimulation class """
+
+
+from myhdl import (_simulator, SimulationError, StopSimulation,
+                   _SuspendSimulation)
+from myhdl._Simulation import _flatten, _finalizeAfter, _checkContext
+from myhdl._Simulation import _error as _simError
+from myhdl._capture import Capture
+from myhdl._always_comb import _AlwaysComb
+from myhdl._always_seq import _AlwaysSeq
+from myhdl._levelize import _CombNetwork
+from myhdl._Waiter import _StaticWaiter
+from myhdl._util import _printExcInfo
+
+
+class _error:
+    pass
+
+
+_error.ClockType = "clock argument should be a Signal"
+_error.NotSynchronous = \
+    "Only always_seq blocks on the clock and always_comb blocks allowed"
+_error.MixedEdges = "All always_seq blocks should use the same clock edge"
+_error.CombClock = "always_comb block should not read the clock"
+
+
+def _argName(arg):
+    if hasattr(arg, 'callername'):
+        return "%s.%s" % (arg.callername, arg.name)
+    return getattr(arg, '__name__', repr(arg))
+
+
+def _seqFunc(seq):
+    """ Return the function that a clock edge runs for an always_seq block. """
+    reset = seq.reset
+    if reset is None:
+        return seq.func
+    reset_sigs = seq.reset_sigs
+    reset_vars = seq.reset_vars
+    func = seq.func
+
+    def func_reset():
+        if reset == reset.active:
+            reset_sigs()
+            reset_vars()
+        else:
+            func()
+    return func_reset
+
+
+def _resetFunc(seq):
+    """ Return the function that an async reset edge runs for a block. """
+    reset_sigs = seq.reset_sigs
+    reset_vars = seq.reset_vars
+
+    def func():
+        reset_sigs()
+        reset_vars()
+    return func
+
+
+class CycleSimulation(object):
+
+    """ Cycle-based simulation of a fully synchronous design.
+
+    Methods:
+    run -- run a simulation for a number of clock cycles
+    capture -- capture the value changes of signals in memory
+
+    """
+
+    def __init__(self, *args, clock):
+        """ Construct a cycle-based simulation object.
+
+        *args -- list of arguments. Each argument is an always_seq block
+                 on the clock, an always_comb block, or a nested sequence
+                 or block of those.
+        clock -- the clock signal. It is driven by the simulation itself,
+                 and should not be driven by the design.
+
+        """
+        if not hasattr(clock, 'posedge'):
+            raise SimulationError(_error.ClockType, repr(clock))
+        edge = None
+        seqs = []
+        combs = []
+        for arg in _flatten(*args):
+            if isinstance(arg, _AlwaysSeq) and arg.senslist[0].sig is clock:
+                if edge is None:
+                    edge = arg.senslist[0]
+                elif arg.senslist[0] is not edge:
+                    raise SimulationError(_error.MixedEdges, _argName(arg))
+                seqs.append(arg)
+            elif isinstance(arg, _AlwaysComb):
+                if any(s is clock for s in arg.senslist):
+                    raise SimulationError(_error.CombClock, _argName(arg))
+                combs.append(arg)
+            else:
+                raise SimulationError(_error.NotSynchronous, _argName(arg))
+
+        self._clock = clock
+        self._context = context = _simulator._context()
+        if clock._sim is not context:
+            raise SimulationError(_simError.OtherContext, "clock")
+        _checkContext(seqs + combs, context)
+        self._edgeVal = edge is not clock.negedge
+        self._seqs = [_seqFunc(seq) for seq in seqs]
+        # the remaining processes are triggered by signal updates: the
+        # levelized combinatorial logic, the asynchronous resets, and the
+        # shadow signals that follow their source
+        waiters = []
+        self._network = None
+        if combs:
+            self._network = _CombNetwork(combs)
+            waiters.append(self._network)
+        for seq in seqs:
+            reset = seq.reset
+            if reset is not None and reset.isasync:
+                waiters.append(_StaticWaiter(_resetFunc(seq),
+                                             seq.senslist[1:]))
+        for s in context._signals:
+            if hasattr(s, '_waiter'):
+                waiters.append(s._waiter)
+        self._waiters = waiters
+        if context._nrSims > 0:
+            raise SimulationError(_simError.MultipleSim)
+        context._nrSims += 1
+        self._started = False
+        self._finished = False
+        self._captures = []
+        context._time = 0
+        del context._siglist[:]
+        for s in context._signals:
+            s._dirty = False
+        context._nrUpdates = context._nrDupUpdates = 0
+
+    def _finalize(self):
+        context = self._context
+        try:
+            if context._tracing:
+                context._tracing = 0
+                # raises the error of a threaded trace writer, if any
+                context._tf.close()
+        finally:
+            # clean up for potential new run with same signals
+            for s in context._signals:
+                s._clear()
+            for capture in self._captures:
+                capture.stop()
+            context._nrSims = 0
+            self._finished = True
+
+    def quit(self):
+        self._finalize()
+
+    def capture(self, sigs):
+        """ Capture the value changes of signals in memory.
+
+        Return a Capture object, as Simulation.capture.
+        """
+        capture = Capture(sigs)
+        self._captures.append(capture)
+        return capture
+
+    def _settle(self):
+        """ Update signals and run triggered processes until stable. """
+        context = self._context
+        _siglist = context._siglist
+        waiters = self._waiters
+        network = self._network
+        actives = {}
+        exc = []
+        _extend = waiters.extend
+        while _siglist or waiters:
+            if _siglist:
+                context._nrUpdates += len(_siglist)
+                for s in _siglist:
+                    # outputs of the network are updated when it runs
+                    if s._dirty:
+                        s._dirty = False
+                        _extend(s._update())
+                del _siglist[:]
+            while waiters:
+                waiter = waiters.pop()
+                try:
+                    waiter.next(waiters, actives, exc)
+                except StopIteration:
+                    continue
+            if network is not None and network.pending:
+                network.run(waiters)
+            if actives:
+                for wl in actives.values():
+                    wl.purge()
+                actives = {}
+            if exc:
+                raise exc[0]
+
+    def _cycle(self):
+        context = self._context
+        clock = self._clock
+        # each edge of the clock takes a time step, so that the clock has
+        # a period of two time steps
+        context._time += 1
+        if context._tracing:
+            context._tf.timestep(context._time)
+        clock.next = not self._edgeVal
+        self._settle()
+        context._time += 1
+        if context._tracing:
+            context._tf.timestep(context._time)
+        clock.next = self._edgeVal
+        self._settle()
+        for func in self._seqs:
+            func()
+        self._settle()
+
+    def run(self, cycles=None, quiet=0):
+        """ Run the simulation for a number of clock cycles.
+
+        cycles -- number of clock cycles (default: forever)
+        quiet -- don't print StopSimulation messages (default: off)
+
+        """
+        if self._finished:
+            raise StopSimulation("Simulation has already finished")
+        _simulator._enter(self._context)
+        try:
+            return self._run(cycles, quiet)
+        finally:
+            _simulator._exit()
+
+    def _run(self, cycles, quiet):
+        context = self._context
+        try:
+            if not self._started:
+                self._started = True
+                self._settle()
+            if cycles is None:
+                while 1:
+                    self._cycle()
+            for i in range(cycles):
+                self._cycle()
+            raise _SuspendSimulation("Simulated %s cycles" % cycles)
+        except _SuspendSimulation:
+            if not quiet:
+                _printExcInfo()
+            if context._tracing:
+                context._tf.flush()
+            return 1
+        except StopSimulation:
+            if not quiet:
+                _printExcInfo()
+            self._finalize()
+            return 0
+        except Exception:
+            if context._tracing:
+                context._tf.failure()
+            _finalizeAfter(self)
+            raise
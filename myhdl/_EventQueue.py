@@ -0,0 +1,201 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the future event queue of the simulator.
+
+Events are (time, event) pairs, where event is a _Waiter or an object
+with an apply method, such as a _SignalWrap. Events scheduled for the
+same time are returned in the order in which they were pushed.
+
+This module provides the following queue implementations:
+_EventQueue -- binary heap, the default
+_TimingWheel -- timing wheel with an overflow heap for far-future events
+
+"""
+from heapq import heappush, heappop
+from itertools import count
+
+
+class _EventQueue(object):
+
+    """ Priority queue of future events, implemented as a binary heap. """
+
+    __slots__ = ('_heap', '_count')
+
+    def __init__(self):
+        self._heap = []
+        # tie breaker that keeps events at equal times in FIFO order
+        self._count = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    __nonzero__ = __bool__
+
+    def push(self, t, event):
+        """ Schedule event at time t. """
+        heappush(self._heap, (t, next(self._count), event))
+
+    def nextTime(self):
+        """ Return the time of the earliest scheduled event. """
+        return self._heap[0][0]
+
+    def pop(self, t):
+        """ Remove and return the list of all events scheduled at time t. """
+        heap = self._heap
+        events = []
+        while heap and heap[0][0] == t:
+            events.append(heappop(heap)[2])
+        return events
+
+    def clear(self):
+        del self._heap[:]
+        self._count = count()
+
+    def events(self):
+        """ Return a list of the scheduled events, in no particular order. """
+        return [e for t, n, e in self._heap]
+
+    def copy(self):
+        """ Return a copy of the queue that holds the same events. """
+        q = _EventQueue()
+        q._heap = list(self._heap)
+        n = next(self._count)
+        self._count = count(n)
+        q._count = count(n)
+        return q
+
+
+class _TimingWheel(object):
+
+    """ Timing wheel of future events.
+
+    Events that are less than size time steps ahead of the current time
+    go into the slot of their time in a circular array, which makes
+    insertion and extraction O(1). Events further ahead go into an
+    overflow heap. This works best when most events are scheduled a small,
+    constant delay ahead, as with clock generators.
+
+    """
+
+    __slots__ = ('_slots', '_size', '_mask', '_now', '_nrEvents',
+                 '_heap', '_count')
+
+    def __init__(self, size=1024):
+        if size <= 0 or size & (size - 1):
+            raise ValueError("timing wheel size should be a power of 2")
+        self._size = size
+        self._mask = size - 1
+        self._slots = [[] for i in range(size)]
+        self._now = 0
+        self._nrEvents = 0
+        self._heap = []
+        self._count = count()
+
+    def __len__(self):
+        return self._nrEvents + len(self._heap)
+
+    def __bool__(self):
+        return bool(self._nrEvents or self._heap)
+
+    __nonzero__ = __bool__
+
+    def push(self, t, event):
+        """ Schedule event at time t. """
+        if t - self._now < self._size:
+            self._slots[t & self._mask].append(event)
+            self._nrEvents += 1
+        else:
+            heappush(self._heap, (t, next(self._count), event))
+
+    def nextTime(self):
+        """ Return the time of the earliest scheduled event.
+
+        The wheel advances to that time, so it should be called
+        only when all events of the current time have been popped.
+        """
+        heap = self._heap
+        if self._nrEvents:
+            slots, mask = self._slots, self._mask
+            t = self._now
+            while not slots[t & mask]:
+                t += 1
+            if heap and heap[0][0] < t:
+                t = heap[0][0]
+        else:
+            t = heap[0][0]
+        self._now = t
+        return t
+
+    def pop(self, t):
+        """ Remove and return the list of all events scheduled at time t.
+
+        t should be the value returned by the last nextTime call.
+        """
+        heap = self._heap
+        events = []
+        while heap and heap[0][0] == t:
+            events.append(heappop(heap)[2])
+        i = t & self._mask
+        slot = self._slots[i]
+        if slot:
+            self._slots[i] = []
+            self._nrEvents -= len(slot)
+            # far-future events for t were pushed before near ones
+            if events:
+                events.extend(slot)
+            else:
+                events = slot
+        return events
+
+    def clear(self):
+        for slot in self._slots:
+            del slot[:]
+        self._now = 0
+        self._nrEvents = 0
+        del self._heap[:]
+        self._count = count()
+
+    def events(self):
+        """ Return a list of the scheduled events, in no particular order. """
+        events = [e for t, n, e in self._heap]
+        for slot in self._slots:
+            events.extend(slot)
+        return events
+
+    def copy(self):
+        """ Return a copy of the queue that holds the same events. """
+        q = _TimingWheel(self._size)
+        q._slots = [list(slot) for slot in self._slots]
+        q._now = self._now
+        q._nrEvents = self._nrEvents
+        q._heap = list(self._heap)
+        n = next(self._count)
+        self._count = count(n)
+        q._count = count(n)
+        return q
+
+
+# scheduler names accepted by the Simulation constructor
+_schedulers = {'heap': _EventQueue,
+               'wheel': _TimingWheel,
+               }
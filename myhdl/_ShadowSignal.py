@@ -27,7 +27,6 @@ from copy import deepcopy
 from myhdl._Signal import _Signal
 from myhdl._Waiter import _SignalWaiter, _SignalTupleWaiter
 from myhdl._intbv import intbv
-from myhdl._simulator import _siglist
 from myhdl._bin import bin
 
 # shadow signals
@@ -390,7 +389,7 @@ class _TristateSignal(_ShadowSignal):
                     res = None
                     break
             self._next = res
-            _siglist.append(self)
+            self._markDirty()
 
     def toVerilog(self):
         lines = []
@@ -427,4 +426,4 @@ class _TristateDriver(_Signal):
             # restore original value to cater for intbv handler
             self._next = self._sig._orival
             self._setNextVal(val)
-        _siglist.append(self)
+        self._markDirty()
@@ -29,16 +29,11 @@ negedge -- callable to model a falling edge on a signal in a yield statement
 from copy import copy, deepcopy
 
 from myhdl import _simulator as sim
-from myhdl._simulator import _futureEvents
-from myhdl._simulator import _siglist
-from myhdl._simulator import _signals
 from myhdl._intbv import intbv
 from myhdl._bin import bin
 
 # from myhdl._enum import EnumItemType
 
-_schedule = _futureEvents.append
-
 
 def _isListOfSigs(obj):
     """ Check if obj is a non-empty list of signals. """
@@ -51,6 +46,14 @@ def _isListOfSigs(obj):
         return False
 
 
+def _trigger(static, waiters):
+    """ Add the static waiters that are not triggered yet to waiters. """
+    for w in static:
+        if not w.triggered:
+            w.triggered = True
+            waiters.append(w)
+
+
 class _WaiterList(list):
 
     def purge(self):
@@ -116,11 +119,12 @@ class _Signal(object):
 
     __slots__ = ('_next', '_val', '_min', '_max', '_type', '_init',
                  '_eventWaiters', '_posedgeWaiters', '_negedgeWaiters',
+                 '_eventStatic', '_posedgeStatic', '_negedgeStatic',
                  '_code', '_tracing', '_nrbits', '_checkVal',
                  '_setNextVal', '_copyVal2Next', '_printVcd',
                  '_driven', '_read', '_name', '_used', '_inList',
                  '_waiter', 'toVHDL', 'toVerilog', '_slicesigs',
-                 '_numeric'
+                 '_numeric', '_dirty', '_sim', '_capture'
                  )
 
     def __init__(self, val=None):
@@ -168,21 +172,27 @@ class _Signal(object):
         self._eventWaiters = _WaiterList()
         self._posedgeWaiters = _PosedgeWaiterList(self)
         self._negedgeWaiters = _NegedgeWaiterList(self)
+        self._eventStatic = self._posedgeStatic = self._negedgeStatic = ()
         self._code = ""
         self._slicesigs = []
         self._tracing = 0
-        _signals.append(self)
+        self._capture = None
+        self._dirty = False
+        self._sim = sim._context()
+        self._sim._signals.append(self)
 
     def _clear(self):
         del self._eventWaiters[:]
         del self._posedgeWaiters[:]
         del self._negedgeWaiters[:]
+        self._eventStatic = self._posedgeStatic = self._negedgeStatic = ()
         self._val = deepcopy(self._init)
         self._next = deepcopy(self._init)
         self._name = self._driven = None
         self._read = False # dont clear self._used
         self._inList = False 
         self._numeric = True
+        self._dirty = False
         for s in self._slicesigs:
             s._clear()
 
@@ -191,12 +201,18 @@ class _Signal(object):
         if val != next:
             waiters = self._eventWaiters[:]
             del self._eventWaiters[:]
+            if self._eventStatic:
+                _trigger(self._eventStatic, waiters)
             if not val and next:
                 waiters.extend(self._posedgeWaiters[:])
                 del self._posedgeWaiters[:]
+                if self._posedgeStatic:
+                    _trigger(self._posedgeStatic, waiters)
             elif not next and val:
                 waiters.extend(self._negedgeWaiters[:])
                 del self._negedgeWaiters[:]
+                if self._negedgeStatic:
+                    _trigger(self._negedgeStatic, waiters)
             if next is None:
                 self._val = None
             elif isinstance(val, intbv):
@@ -207,10 +223,25 @@ class _Signal(object):
                 self._val = deepcopy(next)
             if self._tracing:
                 self._printVcd()
+            if self._capture is not None:
+                self._capture()
             return waiters
         else:
             return []
 
+    def _subscribe(self, waiter, trigger):
+        """ Subscribe a static waiter to the signal.
+
+        trigger -- the signal itself, or its posedge or negedge
+        """
+        if trigger is self:
+            self._eventStatic += (waiter,)
+        elif trigger is self._posedgeWaiters:
+            self._posedgeStatic += (waiter,)
+        else:
+            assert trigger is self._negedgeWaiters
+            self._negedgeStatic += (waiter,)
+
     # support for the 'val' attribute
     @property
     def val(self):
@@ -221,7 +252,11 @@ class _Signal(object):
     def next(self):
         #        if self._next is self._val:
         #            self._next = deepcopy(self._val)
-        _siglist.append(self)
+        if self._dirty:
+            self._sim._nrDupUpdates += 1
+        else:
+            self._dirty = True
+            self._sim._siglist.append(self)
         return self._next
 
     @next.setter
@@ -229,7 +264,19 @@ class _Signal(object):
         if isinstance(val, _Signal):
             val = val._val
         self._setNextVal(val)
-        _siglist.append(self)
+        if self._dirty:
+            self._sim._nrDupUpdates += 1
+        else:
+            self._dirty = True
+            self._sim._siglist.append(self)
+
+    def _markDirty(self):
+        """ Put the signal in the update list, at most once per delta cycle. """
+        if self._dirty:
+            self._sim._nrDupUpdates += 1
+        else:
+            self._dirty = True
+            self._sim._siglist.append(self)
 
     # support for the 'posedge' attribute
     @property
@@ -314,25 +361,26 @@ class _Signal(object):
 
     # vcd print methods
     def _printVcdStr(self):
-        print("s%s %s" % (str(self._val), self._code), file=sim._tf)
+        self._sim._tf.write("s%s %s\n" % (self._val, self._code))
 
     def _printVcdHex(self):
         if self._val is None:
-            print("sz %s" % self._code, file=sim._tf)
+            self._sim._tf.write("sz %s\n" % self._code)
         else:
-            print("s%s %s" % (hex(self._val), self._code), file=sim._tf)
+            self._sim._tf.write("s%s %s\n" % (hex(self._val), self._code))
 
     def _printVcdBit(self):
         if self._val is None:
-            print("z%s" % self._code, file=sim._tf)
+            self._sim._tf.write("z%s\n" % self._code)
         else:
-            print("%d%s" % (self._val, self._code), file=sim._tf)
+            self._sim._tf.write("%d%s\n" % (self._val, self._code))
 
     def _printVcdVec(self):
         if self._val is None:
-            print("b%s %s" % ('z' * self._nrbits, self._code), file=sim._tf)
+            self._sim._tf.write("b%s %s\n" % ('z' * self._nrbits, self._code))
         else:
-            print("b%s %s" % (bin(self._val, self._nrbits), self._code), file=sim._tf)
+            self._sim._tf.write("b%s %s\n" % (bin(self._val, self._nrbits),
+                                                self._code))
 
     ### use call interface for shadow signals ###
     def __call__(self, left, right=None):
@@ -593,10 +641,10 @@ class _DelayedSignal(_Signal):
 
     def _update(self):
         if self._next != self._nextZ:
-            self._timeStamp = sim._time
+            self._timeStamp = self._sim._time
         self._nextZ = self._next
-        t = sim._time + self._delay
-        _schedule((t, _SignalWrap(self, self._next, self._timeStamp)))
+        t = self._sim._time + self._delay
+        self._sim._futureEvents.push(t, _SignalWrap(self, self._next, self._timeStamp))
         return []
 
     def _apply(self, next, timeStamp):
@@ -604,15 +652,23 @@ class _DelayedSignal(_Signal):
         if timeStamp == self._timeStamp and val != next:
             waiters = self._eventWaiters[:]
             del self._eventWaiters[:]
+            if self._eventStatic:
+                _trigger(self._eventStatic, waiters)
             if not val and next:
                 waiters.extend(self._posedgeWaiters[:])
                 del self._posedgeWaiters[:]
+                if self._posedgeStatic:
+                    _trigger(self._posedgeStatic, waiters)
             elif not next and val:
                 waiters.extend(self._negedgeWaiters[:])
                 del self._negedgeWaiters[:]
+                if self._negedgeStatic:
+                    _trigger(self._negedgeStatic, waiters)
             self._val = copy(next)
             if self._tracing:
                 self._printVcd()
+            if self._capture is not None:
+                self._capture()
             return waiters
         else:
             return []
@@ -18,22 +18,23 @@
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 
 """ Module that provides the Simulation class """
-import os
-from operator import itemgetter
+import warnings
 from types import GeneratorType
 
 from myhdl import StopSimulation, _SuspendSimulation
 from myhdl import _simulator, SimulationError
 from myhdl._Cosimulation import Cosimulation
-from myhdl._simulator import _signals, _siglist, _futureEvents
+from myhdl._Signal import _Signal
 from myhdl._Waiter import _Waiter
 from myhdl._Waiter import _inferWaiter
-from myhdl._Waiter import _SignalTupleWaiter
 from myhdl._util import _printExcInfo
 from myhdl._instance import _Instantiator
+from myhdl._always_comb import _AlwaysComb
+from myhdl._levelize import _CombNetwork
+from myhdl._checkpoint import _checkpoint, _checkRestore, _fork
+from myhdl._capture import Capture
 from myhdl._block import _Block
-
-schedule = _futureEvents.append
+from myhdl._EventQueue import _schedulers
 
 
 class _error:
@@ -43,6 +44,8 @@ class _error:
 _error.ArgType = "Inappriopriate argument type"
 _error.MultipleCosim = "Only a single cosimulator argument allowed"
 _error.DuplicatedArg = "Duplicated argument"
+_error.Scheduler = "Unknown scheduler"
+_error.OtherContext = "Signal belongs to another simulation context"
 
 # flatten Block objects out
 
@@ -69,46 +72,111 @@ class Simulation(object):
 
     Methods:
     run -- run a simulation for some duration
+    checkpoint -- return a checkpoint of the simulation state
+    restore -- restore the simulation state from a checkpoint
+    fork -- fork the simulation process
+    capture -- capture the value changes of signals in memory
 
     """
-    _no_of_instances = 0
 
-    def __init__(self, *args):
+    def __init__(self, *args, scheduler='heap', static=True, levelize=False):
         """ Construct a simulation object.
 
         *args -- list of arguments. Each argument is a generator or
                  a nested sequence of generators.
+        scheduler -- future event queue implementation: 'heap' (default),
+                     or 'wheel' for designs dominated by events at a few
+                     small, fixed delays, such as clock generators
+        static -- subscribe always blocks with a fixed sensitivity list
+                  once to their signals, instead of after each wakeup
+                  (default: on)
+        levelize -- evaluate always_comb blocks in topological order,
+                    updating their outputs immediately (default: off)
 
         """
-        _simulator._time = 0
-        arglist = _flatten(*args)
-        self._waiters, self._cosims = _makeWaiters(arglist)
-        if Simulation._no_of_instances > 0:
+        if scheduler not in _schedulers:
+            raise SimulationError(_error.Scheduler, str(scheduler))
+        self._context = context = _simulator._context()
+        self._arglist = arglist = _flatten(*args)
+        _checkContext(arglist, context)
+        context._time = 0
+        self._waiters, self._cosims, self._network = \
+            _makeWaiters(arglist, static, levelize)
+        if context._nrSims > 0:
             raise SimulationError(_error.MultipleSim)
-        Simulation._no_of_instances += 1
+        context._nrSims += 1
         self._finished = False
-        del _futureEvents[:]
-        del _siglist[:]
+        self._captures = []
+        context._futureEvents = _schedulers[scheduler]()
+        del context._siglist[:]
+        for s in context._signals:
+            s._dirty = False
+        context._nrUpdates = context._nrDupUpdates = 0
 
     def _finalize(self):
         cosims = self._cosims
         if cosims:
             for cosim in cosims:
-                os.close(cosim._rt)
-                os.close(cosim._wf)
-                cosim._child.wait()
-        if _simulator._tracing:
-            _simulator._tracing = 0
-            _simulator._tf.close()
-        # clean up for potential new run with same signals
-        for s in _signals:
-            s._clear()
-        Simulation._no_of_instances = 0
-        self._finished = True
+                cosim._close()
+        context = self._context
+        try:
+            if context._tracing:
+                context._tracing = 0
+                # raises the error of a threaded trace writer, if any
+                context._tf.close()
+        finally:
+            # clean up for potential new run with same signals
+            for s in context._signals:
+                s._clear()
+            for capture in self._captures:
+                capture.stop()
+            context._nrSims = 0
+            self._finished = True
 
     def quit(self):
         self._finalize()
 
+    def capture(self, sigs):
+        """ Capture the value changes of signals in memory.
+
+        Return a Capture object, that records the current values of the
+        signals, and their changes until it is stopped or the simulation
+        finishes.
+        """
+        capture = Capture(sigs)
+        self._captures.append(capture)
+        return capture
+
+    def checkpoint(self):
+        """ Return a checkpoint of the simulation state.
+
+        The processes that can still run should be always blocks:
+        the state of other generators can't be checkpointed.
+        """
+        return _checkpoint(self)
+
+    def restore(self, checkpoint):
+        """ Restore the simulation state from a checkpoint.
+
+        A simulation that has finished can be restored as well.
+        """
+        _checkRestore(self, checkpoint)
+        if self._finished:
+            context = self._context
+            if context._nrSims > 0:
+                raise SimulationError(_error.MultipleSim)
+            context._nrSims += 1
+            self._finished = False
+        checkpoint.restore()
+
+    def fork(self):
+        """ Fork the simulation process, as os.fork.
+
+        Return 0 in the child process, and the process id of the child
+        in the parent. The child doesn't write the trace file.
+        """
+        return _fork(self)
+
     def run(self, duration=None, quiet=0):
         """ Run the simulation for some duration.
 
@@ -121,18 +189,29 @@ class Simulation(object):
         # From this point it will propagate to the caller, that can catch it.
         if self._finished:
             raise StopSimulation("Simulation has already finished")
+        _simulator._enter(self._context)
+        try:
+            return self._run(duration, quiet)
+        finally:
+            _simulator._exit()
+
+    def _run(self, duration, quiet):
+        context = self._context
         waiters = self._waiters
+        futureEvents = context._futureEvents
         maxTime = None
         if duration:
-            stop = _Waiter(None)
+            stop = _Waiter(None, context=context)
             stop.hasRun = 1
-            maxTime = _simulator._time + duration
-            schedule((maxTime, stop))
+            maxTime = context._time + duration
+            futureEvents.push(maxTime, stop)
         cosims = self._cosims
-        t = _simulator._time
+        network = self._network
+        t = context._time
         actives = {}
-        tracing = _simulator._tracing
-        tracefile = _simulator._tf
+        tracing = context._tracing
+        tracefile = context._tf
+        _siglist = context._siglist
         exc = []
         _pop = waiters.pop
         _append = waiters.append
@@ -141,9 +220,12 @@ class Simulation(object):
         while 1:
             try:
 
-                for s in _siglist:
-                    _extend(s._update())
-                del _siglist[:]
+                if _siglist:
+                    context._nrUpdates += len(_siglist)
+                    for s in _siglist:
+                        s._dirty = False
+                        _extend(s._update())
+                    del _siglist[:]
 
                 while waiters:
                     waiter = _pop()
@@ -152,6 +234,10 @@ class Simulation(object):
                     except StopIteration:
                         continue
 
+                if network is not None and network.pending:
+                    network.run(waiters)
+                    continue
+
                 if cosims:
                     any_cosim_changes = False
                     for cosim in cosims:
@@ -180,27 +266,21 @@ class Simulation(object):
                     raise exc[0]
 
                 # future events
-                if _futureEvents:
+                if futureEvents:
                     if t == maxTime:
                         raise _SuspendSimulation(
                             "Simulated %s timesteps" % duration)
-                    _futureEvents.sort(key=itemgetter(0))
-                    t = _simulator._time = _futureEvents[0][0]
+                    t = context._time = futureEvents.nextTime()
                     if tracing:
-                        print("#%s" % t, file=tracefile)
+                        tracefile.timestep(t)
                     if cosims:
                         for cosim in cosims:
                             cosim._put(t)
-                    while _futureEvents:
-                        newt, event = _futureEvents[0]
-                        if newt == t:
-                            if isinstance(event, _Waiter):
-                                _append(event)
-                            else:
-                                _extend(event.apply())
-                            del _futureEvents[0]
+                    for event in futureEvents.pop(t):
+                        if isinstance(event, _Waiter):
+                            _append(event)
                         else:
-                            break
+                            _extend(event.apply())
                 else:
                     raise StopSimulation("No more events")
 
@@ -220,28 +300,81 @@ class Simulation(object):
 
             except Exception as e:
                 if tracing:
-                    tracefile.flush()
+                    tracefile.failure()
                 # if the exception came from a yield, make sure we can resume
                 if exc and e is exc[0]:
                     pass  # don't finalize
                 else:
-                    self._finalize()
+                    _finalizeAfter(self)
                 # now reraise the exepction
                 raise
 
 
-def _makeWaiters(arglist):
+def _finalizeAfter(sim):
+    """ Finalize a simulation that an exception ends.
+
+    An error while finalizing is reported as a warning, so that the
+    exception propagates.
+    """
+    try:
+        sim._finalize()
+    except Exception as e:
+        warnings.warn("error while finalizing the simulation: %s: %s" %
+                      (type(e).__name__, e), RuntimeWarning)
+
+
+def _argSignals(arg):
+    """ Return the signals of a simulation argument, with their names. """
+    sigs = []
+    if isinstance(arg, _Instantiator):
+        sigs.extend(arg.sigdict.items())
+        for n, l in arg.losdict.items():
+            sigs.extend(("%s[%s]" % (n, i), s) for i, s in enumerate(l))
+        for item in getattr(arg, 'senslist', ()):
+            s = getattr(item, 'sig', item)
+            sigs.append((getattr(s, '_name', None) or repr(s), s))
+        sigs = [("%s.%s" % (arg.name, n), s) for n, s in sigs]
+    elif isinstance(arg, Cosimulation):
+        sigs.extend(zip(arg._fromSignames, arg._fromSigs))
+        sigs.extend(zip(arg._toSignames, arg._toSigs))
+    return sigs
+
+
+def _checkContext(arglist, context):
+    """ Raise an error for a signal of the arguments of a simulation that
+    belongs to another context.
+
+    Its changes would go to the other context, that doesn't run them.
+    """
+    for arg in arglist:
+        for n, s in _argSignals(arg):
+            if isinstance(s, _Signal) and s._sim is not context:
+                raise SimulationError(_error.OtherContext, n)
+    for s in context._signals:
+        # the sources of shadow signals
+        sources = list(getattr(s, '_sigargs', ()))
+        sources.append(getattr(s, '_sig', None))
+        for src in sources:
+            if isinstance(src, _Signal) and src._sim is not context:
+                raise SimulationError(_error.OtherContext, repr(src))
+
+
+def _makeWaiters(arglist, static=True, levelize=False):
     waiters = []
     ids = set()
     cosims = []
+    combs = []
     for arg in arglist:
         if isinstance(arg, GeneratorType):
             waiters.append(_inferWaiter(arg))
+        elif levelize and isinstance(arg, _AlwaysComb):
+            combs.append(arg)
         elif isinstance(arg, _Instantiator):
-            waiters.append(arg.waiter)
+            waiter = static and arg.staticWaiter
+            waiters.append(waiter or arg.waiter)
         elif isinstance(arg, Cosimulation):
             cosims.append(arg)
-            waiters.append(_SignalTupleWaiter(arg._waiter()))
+            waiters.extend(arg._waiters())
         elif isinstance(arg, _Waiter):
             waiters.append(arg)
         elif arg == True:
@@ -252,7 +385,13 @@ def _makeWaiters(arglist):
             raise SimulationError(_error.DuplicatedArg)
         ids.add(id(arg))
     # add waiters for shadow signals
-    for sig in _signals:
+    for sig in _simulator._context()._signals:
         if hasattr(sig, '_waiter'):
             waiters.append(sig._waiter)
-    return waiters, cosims
+    network = None
+    if combs:
+        network = _CombNetwork(combs)
+        waiters.append(network)
+    for cosim in cosims:
+        cosim._findReaders(arglist)
+    return waiters, cosims, network
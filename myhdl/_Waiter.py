@@ -29,22 +29,23 @@ from myhdl._delay import delay
 from myhdl._join import join
 from myhdl._Signal import _Signal, _WaiterList, posedge, negedge
 from myhdl import _simulator
-from myhdl._simulator import _futureEvents
-
-
-schedule = _futureEvents.append
 
 
 class _Waiter(object):
 
-    __slots__ = ('caller', 'generator', 'hasRun', 'nrTriggers', 'semaphore')
+    __slots__ = ('caller', 'generator', 'hasRun', 'nrTriggers', 'semaphore',
+                 'context')
 
-    def __init__(self, generator, caller=None):
+    def __init__(self, generator, caller=None, context=None):
         self.caller = caller
         self.generator = generator
         self.hasRun = 0
         self.nrTriggers = 1
         self.semaphore = 0
+        # the simulation context, looked up once rather than on each delay
+        if context is None:
+            context = _simulator._context()
+        self.context = context
 
     def next(self, waiters, actives, exc):
 
@@ -59,7 +60,7 @@ class _Waiter(object):
             clone = self
         else:
             self.hasRun = 1
-            clone = _Waiter(self.generator, self.caller)
+            clone = _Waiter(self.generator, self.caller, self.context)
 
         try:
             clause = next(self.generator)
@@ -94,14 +95,16 @@ class _Waiter(object):
                 if nr > 1:
                     actives[id(wl)] = wl
             elif isinstance(clause, delay):
-                t = _simulator._time
-                schedule((t + clause._time, clone))
+                context = self.context
+                context._futureEvents.push(context._time + clause._time,
+                                           clone)
             elif isinstance(clause, GeneratorType):
-                waiters.append(_Waiter(clause, clone))
+                waiters.append(_Waiter(clause, clone, self.context))
             elif isinstance(clause, _Instantiator):
-                waiters.append(_Waiter(clause.gen, clone))
+                waiters.append(_Waiter(clause.gen, clone, self.context))
             elif isinstance(clause, join):
-                waiters.append(_Waiter(clause._generator(), clone))
+                waiters.append(_Waiter(clause._generator(), clone,
+                                       self.context))
             elif clause is None:
                 waiters.append(clone)
             elif isinstance(clause, Exception):
@@ -119,10 +122,12 @@ class _DelayWaiter(_Waiter):
 
     def __init__(self, generator):
         self.generator = generator
+        self.context = _simulator._context()
 
     def next(self, waiters, actives, exc):
         clause = next(self.generator)
-        schedule((_simulator._time + clause._time, self))
+        context = self.context
+        context._futureEvents.push(context._time + clause._time, self)
 
 
 class _EdgeWaiter(_Waiter):
@@ -190,6 +195,47 @@ class _SignalTupleWaiter(_Waiter):
             actives[id(wl)] = wl
 
 
+class _StaticWaiter(_Waiter):
+
+    """ Waiter for a function with a static sensitivity list.
+
+    On its first run, the waiter subscribes to the signals and edges of
+    its sensitivity list. From then on, signal updates put it on the
+    waiters list directly, at most once per delta cycle, and it simply
+    calls the function. This avoids the generator resumption, the waiter
+    list re-registration and the clones of the other waiters.
+
+    """
+
+    __slots__ = ('func', 'senslist', 'runFirst', 'subscribed', 'triggered',
+                 'hasRun')
+
+    def __init__(self, func, senslist, runFirst=False):
+        self.func = func
+        self.senslist = senslist
+        self.runFirst = runFirst
+        self.subscribed = False
+        self.triggered = False
+        self.hasRun = 0
+
+    def next(self, waiters, actives, exc):
+        self.triggered = False
+        if self.subscribed:
+            self.func()
+        else:
+            self._subscribe()
+
+    def _subscribe(self):
+        if self.runFirst:
+            self.func()
+        for trigger in self.senslist:
+            if isinstance(trigger, _Signal):
+                trigger._subscribe(self, trigger)
+            else:
+                trigger.sig._subscribe(self, trigger)
+        self.subscribed = True
+
+
 #_kind = enum("SIGNAL_TUPLE", "EDGE_TUPLE", "SIGNAL", "EDGE", "DELAY", "UNDEFINED")
 class _kind(object):
     SIGNAL_TUPLE = 1
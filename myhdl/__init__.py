@@ -21,6 +21,9 @@
 
 This module provides the following myhdl objects:
 Simulation -- simulation class
+CycleSimulation -- cycle-based simulation class for synchronous designs
+SimulationContext -- class that owns the state of a simulation
+runSims -- function that runs many simulations on a process pool
 StopSimulation -- exception that stops a simulation
 now -- function that returns the current time
 Signal -- factory function to model hardware signals
@@ -151,9 +154,12 @@ from ._Signal import posedge, negedge, Signal, SignalType
 from ._ShadowSignal import ConcatSignal
 from ._ShadowSignal import TristateSignal
 from ._simulator import now
+from ._simulator import SimulationContext
 from ._delay import delay
-from ._Cosimulation import Cosimulation
+from ._Cosimulation import Cosimulation, cosimCompile
 from ._Simulation import Simulation
+from ._CycleSimulation import CycleSimulation
+from ._capture import Capture
 from ._misc import instances, downrange
 from ._always_comb import always_comb
 from ._always_seq import always_seq, ResetSignal
@@ -162,6 +168,8 @@ from ._instance import instance
 from ._block import block
 from ._enum import enum, EnumType, EnumItemType
 from ._traceSignals import traceSignals
+from ._waveform import Waveform, diffWaveforms
+from ._runSims import runSims, SimResult
 
 from myhdl import conversion
 from .conversion import toVerilog
@@ -186,7 +194,13 @@ __all__ = ["bin",
            "downrange",
            "StopSimulation",
            "Cosimulation",
+           "cosimCompile",
            "Simulation",
+           "CycleSimulation",
+           "Capture",
+           "SimulationContext",
+           "runSims",
+           "SimResult",
            "instances",
            "instance",
            "block",
@@ -198,6 +212,8 @@ __all__ = ["bin",
            "EnumType",
            "EnumItemType",
            "traceSignals",
+           "Waveform",
+           "diffWaveforms",
            "toVerilog",
            "toVHDL",
            "conversion",
@@ -26,7 +26,7 @@ from myhdl._delay import delay
 from myhdl._Signal import _Signal
 from myhdl._Signal import _WaiterList
 from myhdl._Waiter import _Waiter, _SignalWaiter, _SignalTupleWaiter, \
-    _DelayWaiter, _EdgeWaiter, _EdgeTupleWaiter
+    _DelayWaiter, _EdgeWaiter, _EdgeTupleWaiter, _StaticWaiter
 from myhdl._instance import _Instantiator, _getCallInfo
 
 
@@ -123,6 +123,13 @@ class _Always(_Instantiator):
                 w = _EdgeTupleWaiter
         return w
 
+    @property
+    def staticWaiter(self):
+        for s in self.senslist:
+            if isinstance(s, delay):
+                return None
+        return _StaticWaiter(self.func, self.senslist)
+
     def genfunc(self):
         senslist = self.senslist
         if len(senslist) == 1:
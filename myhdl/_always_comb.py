@@ -25,6 +25,7 @@ from myhdl._Signal import _Signal, _isListOfSigs
 from myhdl._util import _isGenFunc
 from myhdl._instance import _getCallInfo
 from myhdl._always import _Always
+from myhdl._Waiter import _StaticWaiter
 
 
 class _error:
@@ -70,6 +71,10 @@ class _AlwaysComb(_Always):
         if len(self.senslist) == 0:
             raise AlwaysCombError(_error.EmptySensitivityList)
 
+    @property
+    def staticWaiter(self):
+        return _StaticWaiter(self.func, self.senslist, runFirst=True)
+
     def genfunc(self):
         senslist = self.senslist
         if len(senslist) == 1:
@@ -25,6 +25,7 @@ from myhdl._util import _isGenFunc
 from myhdl._Signal import _Signal, _WaiterList, _isListOfSigs
 from myhdl._always import _Always, _get_sigdict
 from myhdl._instance import _getCallInfo
+from myhdl._Waiter import _StaticWaiter
 
 # evacuate this later
 AlwaysSeqError = AlwaysError
@@ -129,6 +130,23 @@ class _AlwaysSeq(_Always):
             _, reg, init = v
             reg._val = init
 
+    @property
+    def staticWaiter(self):
+        if self.reset is None:
+            return _StaticWaiter(self.func, self.senslist)
+        reset = self.reset
+        reset_sigs = self.reset_sigs
+        reset_vars = self.reset_vars
+        func = self.func
+
+        def func_reset():
+            if reset == reset.active:
+                reset_sigs()
+                reset_vars()
+            else:
+                func()
+        return _StaticWaiter(func_reset, self.senslist)
+
     def genfunc_reset(self):
         senslist = self.senslist
         if len(senslist) == 1:
@@ -20,22 +20,6 @@
 """ module with the bin function.
 
 """
-def _int2bitstring(num):
-    if num == 0:
-        return '0'
-    if abs(num) == 1:
-        return '1'
-    bits = []
-    p, q = divmod(num, 2)
-    bits.append(str(q))
-    while not (abs(p) == 1):
-        p, q = divmod(p, 2)
-        bits.append(str(q))
-    bits.append('1')
-    bits.reverse()
-    return ''.join(bits)
-
-
 def bin(num, width=0):
     """Return a binary string representation.
 
@@ -44,10 +28,10 @@ def bin(num, width=0):
     width -- specifies the desired string (sign bit padding)
     """
     num = int(num)
-    s = _int2bitstring(num)
+    if num < 0:
+        # two's complement, in at least the bits that hold the sign
+        width = max(width, (~num).bit_length() + 1)
+        num &= (1 << width) - 1
     if width:
-        pad = '0'
-        if num < 0:
-            pad = '1'
-        return (width - len(s)) * pad + s
-    return s
+        return format(num, '0%db' % width)
+    return format(num, 'b')
@@ -19,13 +19,14 @@
 
 """ Block with the @block decorator function. """
 import inspect
+import sys
 
 #from functools import wraps
 import functools
 
 import myhdl
 from myhdl import BlockError, BlockInstanceError, Cosimulation
-from myhdl._instance import _Instantiator
+from myhdl._instance import _CallInfo, _Instantiator
 from myhdl._util import _flatten
 from myhdl._extractHierarchy import (_makeMemInfo,
                                      _UserVerilogCode, _UserVhdlCode,
@@ -40,14 +41,6 @@ _error.ArgType = "%s: A block should return block or instantiator objects"
 _error.InstanceError = "%s: subblock %s should be encapsulated in a block decorator"
 
 
-class _CallInfo(object):
-
-    def __init__(self, name, modctxt, symdict):
-        self.name = name
-        self.modctxt = modctxt
-        self.symdict = symdict
-
-
 def _getCallInfo():
     """Get info on the caller of a BlockInstance.
 
@@ -62,29 +55,19 @@ def _getCallInfo():
 
     """
 
-    stack = inspect.stack()
-    # caller may be undefined if instantiation from a Python module
-    callerrec = None
-    funcrec = stack[3]
-    name = funcrec[3]
-    if len(stack) > 4:
-        callerrec = stack[4]
+    frame = sys._getframe(3)
     # special case for list comprehension's extra scope in PY3
-    if name == '<listcomp>':
-        funcrec = stack[4]
-        if len(stack) > 5:
-            callerrec = stack[5]
-
-    name = funcrec[3]
-    frame = funcrec[0]
-    symdict = dict(frame.f_globals)
-    symdict.update(frame.f_locals)
+    if frame.f_code.co_name == '<listcomp>':
+        frame = frame.f_back
+    # caller may be undefined if instantiation from a Python module
+    caller = frame.f_back
     modctxt = False
-    if callerrec is not None:
-        f_locals = callerrec[0].f_locals
+    if caller is not None:
+        f_locals = caller.f_locals
         if 'self' in f_locals:
             modctxt = isinstance(f_locals['self'], _Block)
-    return _CallInfo(name, modctxt, symdict)
+    return _CallInfo(frame.f_code.co_name, modctxt, frame.f_globals,
+                     dict(frame.f_locals))
 
 
 ### I don't think this is the right place for uniqueifying the name.
@@ -0,0 +1,176 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the in-memory capture of value changes.
+
+A captured signal has a _capture function, that its _update method
+calls after each value change, like the _printVcd method of a traced
+signal. The function appends the time and the value to two arrays.
+Integer values go to typed arrays of 64 bit integers. When a value
+doesn't fit, such as None or a wide vector, the values of the signal
+move to a list of Python objects.
+
+"""
+from array import array
+
+from myhdl import SimulationError
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal
+
+
+class _error:
+    pass
+
+
+_error.ArgType = "Capture argument should be a signal"
+_error.Captured = "Signal is already captured"
+_error.NotCaptured = "Signal is not captured"
+
+
+class _SignalCapture(object):
+
+    """ Times and values of the changes of a signal. """
+
+    def __init__(self, s):
+        self.sig = s
+        self.times = array('q')
+        if s._type is bool or s._type is intbv or s._type == (int,):
+            self.values = array('q')
+        else:
+            self.values = []
+
+    def _widen(self):
+        self.values = list(self.values)
+        self.start()
+
+    def start(self):
+        s = self.sig
+        context = s._sim
+        tappend = self.times.append
+        vappend = self.values.append
+        widen = self._widen
+
+        # the value is appended first: if it doesn't fit, the values
+        # are widened and the change is recorded again
+        if self.values.__class__ is not array:
+            def capture():
+                val = s._val
+                vappend(val._val if isinstance(val, intbv) else val)
+                tappend(context._time)
+        elif s._type is intbv:
+            def capture():
+                try:
+                    vappend(s._val._val)
+                except (AttributeError, OverflowError):
+                    widen()
+                    s._capture()
+                    return
+                tappend(context._time)
+        else:
+            def capture():
+                try:
+                    vappend(s._val)
+                except (TypeError, OverflowError):
+                    widen()
+                    s._capture()
+                    return
+                tappend(context._time)
+        s._capture = capture
+
+    def stop(self):
+        self.sig._capture = None
+
+
+class Capture(object):
+
+    """ Value changes of signals, captured in memory during a simulation.
+
+    Methods:
+    times -- return the times of the changes of a signal
+    values -- return the values of the changes of a signal
+    changes -- return the changes of a signal as (time, value) tuples
+    arrays -- return the changes of a signal as two NumPy arrays
+    stop -- stop capturing
+
+    """
+
+    def __init__(self, sigs):
+        sigs = list(sigs)
+        for s in sigs:
+            if not isinstance(s, _Signal):
+                raise SimulationError(_error.ArgType, repr(s))
+            if s._capture is not None:
+                raise SimulationError(_error.Captured, repr(s))
+        self._sigs = {}
+        for s in sigs:
+            c = self._sigs[id(s)] = _SignalCapture(s)
+            c.start()
+            # the value at the start of the capture
+            s._capture()
+        self.active = True
+
+    def _get(self, sig):
+        c = self._sigs.get(id(sig))
+        if c is None:
+            raise SimulationError(_error.NotCaptured, repr(sig))
+        return c
+
+    def times(self, sig):
+        """ Return the times of the changes of a signal.
+
+        The times are in an array of 64 bit integers. The array grows
+        while the capture is active.
+        """
+        return self._get(sig).times
+
+    def values(self, sig):
+        """ Return the values of the changes of a signal.
+
+        The values are in an array of 64 bit integers if they fit, and in
+        a list otherwise. Vectors are captured as integers.
+        """
+        return self._get(sig).values
+
+    def changes(self, sig):
+        """ Return the changes of a signal as a list of (time, value). """
+        c = self._get(sig)
+        return list(zip(c.times, c.values))
+
+    def arrays(self, sig):
+        """ Return the changes of a signal as two NumPy arrays.
+
+        The times are 64 bit integers. The values are 64 bit integers if
+        they fit, and Python objects otherwise.
+        """
+        import numpy
+        c = self._get(sig)
+        times = numpy.frombuffer(c.times, dtype=numpy.int64).copy()
+        if c.values.__class__ is array:
+            values = numpy.frombuffer(c.values, dtype=numpy.int64).copy()
+        else:
+            values = numpy.empty(len(c.values), dtype=object)
+            values[:] = c.values
+        return times, values
+
+    def stop(self):
+        """ Stop capturing. The captured changes stay available. """
+        if self.active:
+            self.active = False
+            for c in self._sigs.values():
+                c.stop()
@@ -0,0 +1,281 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides checkpoints and forks of a simulation.
+
+A checkpoint holds the simulation time, the future events, the values
+and waiter lists of the signals, the flags of the waiters, and the
+variables of the always blocks. Generators can't be copied, so the
+waiters are shared between a simulation and its checkpoints. This is
+correct for the generators of always blocks and shadow signals, because
+between events they are always suspended at the same yield statement.
+Other generators should have finished when a checkpoint is taken.
+
+A fork copies the whole simulation process instead, with os.fork.
+
+"""
+import os
+import sys
+from copy import deepcopy
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+from myhdl import SimulationError
+from myhdl._enum import EnumType, EnumItemType
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal, _DelayedSignal, _isListOfSigs
+from myhdl._always import _Always
+from myhdl._Waiter import _Waiter
+
+
+class _error:
+    pass
+
+
+_error.Finished = "Simulation has already finished"
+_error.Generator = "Cannot checkpoint the state of generators"
+_error.Cell = "Cannot checkpoint the state of closure variable"
+_error.Cosim = "Cannot checkpoint or fork a cosimulation"
+_error.Trace = "Cannot checkpoint a simulation with signal tracing"
+_error.OtherSim = "Checkpoint belongs to another simulation"
+_error.NoFork = "Fork is not supported on this platform"
+
+
+# waiter attributes that change while a simulation runs
+_waiterFlags = ('hasRun', 'triggered', 'subscribed', 'nrTriggers',
+                'semaphore', 'pending')
+
+
+def _liveWaiters(sim, events):
+    """ Return the waiters a simulation can still run. """
+    waiters = list(sim._waiters)
+    waiters.extend(e for e in events if isinstance(e, _Waiter))
+    for s in sim._context._signals:
+        waiters.extend(s._eventWaiters)
+        waiters.extend(s._posedgeWaiters)
+        waiters.extend(s._negedgeWaiters)
+        waiters.extend(s._eventStatic)
+        waiters.extend(s._posedgeStatic)
+        waiters.extend(s._negedgeStatic)
+    network = sim._network
+    if network is not None:
+        waiters.append(network)
+        waiters.extend(network.members)
+    return list({id(w): w for w in waiters}.values())
+
+
+def _generatorName(gen):
+    return getattr(gen, '__name__', repr(gen))
+
+
+def _checkGenerators(sim, waiters):
+    """ Raise an error if some waiters run generators with a state. """
+    loops = set()
+    for arg in sim._arglist:
+        if isinstance(arg, _Always):
+            loops.add(id(arg.gen))
+    for s in sim._context._signals:
+        if hasattr(s, '_waiter'):
+            loops.add(id(s._waiter.generator))
+    names = set()
+    for w in waiters:
+        gen = getattr(w, 'generator', None)
+        if gen is not None and id(gen) not in loops:
+            names.add(_generatorName(gen))
+    if names:
+        raise SimulationError(_error.Generator, ", ".join(sorted(names)))
+
+
+def _closureCells(sim):
+    """ Return the closure cells of the always blocks of a simulation.
+
+    Each cell comes with a name for error messages.
+    """
+    cells = {}
+    for arg in sim._arglist:
+        if isinstance(arg, _Always) and arg.func.__closure__:
+            code = arg.func.__code__
+            for n, cell in zip(code.co_freevars, arg.func.__closure__):
+                cells[id(cell)] = ("%s.%s" % (code.co_name, n), cell)
+    return list(cells.values())
+
+
+# objects that a closure cell can hold without state of its own
+_stateless = (FunctionType, BuiltinFunctionType, MethodType, ModuleType,
+              type, EnumType)
+
+# objects that are saved by value
+_immutable = (bool, int, float, complex, str, bytes, tuple, frozenset,
+              range, EnumItemType)
+
+
+def _isInterface(obj):
+    """ Return True for an object whose attributes are signals or constants.
+
+    The state of such an interface is that of its signals.
+    """
+    attrs = getattr(obj, '__dict__', None)
+    if not attrs:
+        return False
+    for v in attrs.values():
+        if not (isinstance(v, _Signal) or _isListOfSigs(v) or v is None or
+                isinstance(v, _stateless + _immutable)):
+            return False
+    return True
+
+
+def _saveCell(name, cell):
+    """ Return the saved content of a closure cell, or None.
+
+    None means that the cell has no state to save: it is empty, or holds
+    signals, whose state is saved with the signals, or objects without a
+    state. Raise a SimulationError for objects that can't be saved.
+    """
+    try:
+        obj = cell.cell_contents
+    except ValueError:
+        return None
+    if isinstance(obj, intbv):
+        return cell, obj, obj._val
+    if isinstance(obj, _Signal) or _isListOfSigs(obj):
+        return None
+    if isinstance(obj, list):
+        if any(isinstance(e, _Signal) for e in obj):
+            raise SimulationError(_error.Cell, name)
+        return cell, obj, deepcopy(obj)
+    if obj is None or isinstance(obj, _immutable):
+        return cell, obj, obj
+    if isinstance(obj, _stateless) or _isInterface(obj):
+        return None
+    raise SimulationError(_error.Cell, name)
+
+
+def _restoreCell(cell, obj, saved):
+    # mutable objects are restored in place, as other code may share them
+    if isinstance(obj, intbv):
+        obj._val = saved
+    elif isinstance(obj, list):
+        obj[:] = deepcopy(saved)
+    else:
+        cell.cell_contents = saved
+
+
+class _Checkpoint(object):
+
+    """ State of a simulation at some time. """
+
+    def __init__(self, sim):
+        context = sim._context
+        self.sim = sim
+        self.time = context._time
+        self.futureEvents = context._futureEvents.copy()
+        self.siglist = list(context._siglist)
+        self.waiters = list(sim._waiters)
+        self.signals = []
+        for s in context._signals:
+            state = (s, deepcopy(s._val), deepcopy(s._next), s._dirty,
+                     list(s._eventWaiters), list(s._posedgeWaiters),
+                     list(s._negedgeWaiters), s._eventStatic,
+                     s._posedgeStatic, s._negedgeStatic)
+            self.signals.append(state)
+        self.delayed = [(s, deepcopy(s._nextZ), s._timeStamp)
+                        for s in context._signals
+                        if isinstance(s, _DelayedSignal)]
+        waiters = _liveWaiters(sim, self.futureEvents.events())
+        _checkGenerators(sim, waiters)
+        self.flags = []
+        for w in waiters:
+            for name in _waiterFlags:
+                if hasattr(w, name):
+                    self.flags.append((w, name, getattr(w, name)))
+        self.cells = []
+        for name, cell in _closureCells(sim):
+            saved = _saveCell(name, cell)
+            if saved is not None:
+                self.cells.append(saved)
+
+    def restore(self):
+        sim = self.sim
+        context = sim._context
+        context._time = self.time
+        context._futureEvents = self.futureEvents.copy()
+        context._siglist[:] = self.siglist
+        sim._waiters[:] = self.waiters
+        for (s, val, next, dirty, event, posedge, negedge,
+             eventStatic, posedgeStatic, negedgeStatic) in self.signals:
+            s._val = deepcopy(val)
+            s._next = deepcopy(next)
+            s._dirty = dirty
+            s._eventWaiters[:] = event
+            s._posedgeWaiters[:] = posedge
+            s._negedgeWaiters[:] = negedge
+            s._eventStatic = eventStatic
+            s._posedgeStatic = posedgeStatic
+            s._negedgeStatic = negedgeStatic
+        for s, nextZ, timeStamp in self.delayed:
+            s._nextZ = deepcopy(nextZ)
+            s._timeStamp = timeStamp
+        for w, name, value in self.flags:
+            setattr(w, name, value)
+        for cell, obj, saved in self.cells:
+            _restoreCell(cell, obj, saved)
+
+
+def _checkpoint(sim):
+    if sim._finished:
+        raise SimulationError(_error.Finished)
+    if sim._cosims:
+        raise SimulationError(_error.Cosim)
+    if sim._context._tracing:
+        raise SimulationError(_error.Trace)
+    return _Checkpoint(sim)
+
+
+def _checkRestore(sim, checkpoint):
+    if checkpoint.sim is not sim:
+        raise SimulationError(_error.OtherSim)
+
+
+def _fork(sim):
+    if not hasattr(os, 'fork'):
+        raise SimulationError(_error.NoFork)
+    if sim._finished:
+        raise SimulationError(_error.Finished)
+    if sim._cosims:
+        raise SimulationError(_error.Cosim)
+    context = sim._context
+    # don't let both processes write the same buffered output
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if context._tracing:
+        context._tf.flush()
+    pid = os.fork()
+    if pid == 0 and context._tracing:
+        # the parent keeps writing the trace file. The child doesn't close
+        # it, but even a file object that is dropped is closed when it is
+        # collected, and a compressor writes its trailer then. So the
+        # descriptor of the child is pointed at the null device instead.
+        context._tracing = 0
+        f = context._tf.file
+        if f is not None:
+            null = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(null, f.fileno())
+            os.close(null)
+        for s in context._signals:
+            s._tracing = 0
+    return pid
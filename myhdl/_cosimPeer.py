@@ -0,0 +1,241 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" A stand-in for an HDL simulator in a cosimulation
+
+The stand-in talks to MyHDL like the VPI module of an HDL simulator,
+with the text protocol or the binary protocol over pipes or shared
+memory, so that the cosimulation can be tested and benchmarked without
+an HDL simulator. Its design copies a register din to a net dout of the
+width given on the command line:
+
+    Cosimulation([sys.executable, "-m", "myhdl._cosimPeer", "32"],
+                 din=din, dout=dout)
+
+With --stages N, the design also has a pipeline of N registers q0 to
+qN-1, that shifts at each time step. A new random value enters q0 with
+the probability given by --activity. With --text, the stand-in speaks
+the text protocol, like a VPI module that doesn't know the binary one.
+With the binary protocol, the stand-in restarts from time 0 when MyHDL
+resets it, so that it can serve as a persistent simulator, and it
+batches its values when MyHDL does. With --no-restart, it announces
+that it can't restart, like the VPI module of Icarus.
+
+"""
+import argparse
+import mmap
+import os
+import random
+import sys
+
+from myhdl import CosimulationError
+from myhdl._Cosimulation import (_Channel, _ShmChannel, _shmRings, _words,
+                                 _error, _GREETING, _MAXLINE, _PROTOCOL,
+                                 _FROM, _TO, _START, _OK, _VALUES,
+                                 _SHM, _RESET, _BATCH, _RESTART,
+                                 _ringheader, _ringsize, _u16, _u32, _u64)
+
+
+class _Reset(Exception):
+    pass
+
+
+class _TextPeer(object):
+
+    """ The HDL side of the text protocol. """
+
+    def __init__(self, rf, wt):
+        self._rf = rf
+        self._wt = wt
+
+    def _recv(self):
+        data = os.read(self._rf, _MAXLINE)
+        if not data:
+            raise CosimulationError(_error.SimulationEnd)
+        return data.decode().split()
+
+    def handshake(self, kind, sigs):
+        msg = [kind, "0"]
+        for name, size in sigs:
+            msg += [name, str(size)]
+        os.write(self._wt, (" ".join(msg) + " ").encode())
+        self._recv()
+
+    def start(self):
+        os.write(self._wt, b"START")
+        self._recv()
+
+    def values(self, time, sigs, changes):
+        msg = [str(time)]
+        for i, v in changes:
+            msg += [sigs[i][0], "%x" % v]
+        os.write(self._wt, " ".join(msg).encode())
+
+    def reply(self):
+        e = self._recv()
+        return int(e[0]), int(e[1], 16) if len(e) > 1 else None
+
+
+class _BinaryPeer(object):
+
+    """ The HDL side of the binary protocol. """
+
+    def __init__(self, channel, version, restart=True):
+        self._channel = channel
+        self._start = _START
+        if version >= 5:
+            self._start += bytes([_RESTART if restart else 0])
+        self._pos = 9 if version == 1 else 13
+        self._n = 0
+        self._batched = False
+        self._window = []
+        self._replies = []
+
+    def handshake(self, kind, sigs):
+        msg = [_FROM if kind == "FROM" else _TO, _u64.pack(0)]
+        for name, size in sigs:
+            msg.append(_u32.pack(size) + _u16.pack(len(name)) + name.encode())
+        self._channel.send(b"".join(msg))
+        self._channel.recv()
+        if kind == "FROM":
+            self._n = _words(sigs[0][1])
+
+    def start(self):
+        self._channel.send(self._start)
+        ok = self._channel.recv()
+        self._batched = ok[1:] == b"\1"
+        self._window = []
+        self._replies = []
+
+    def values(self, time, sigs, changes):
+        msg = [_VALUES, _u64.pack(time)]
+        for i, v in changes:
+            n = _words(sigs[i][1])
+            msg += [_u32.pack(i), v.to_bytes(n, 'little'), bytes(n)]
+        msg = b"".join(msg)
+        if self._batched:
+            self._window += [_u32.pack(len(msg)), msg]
+        else:
+            self._channel.send(msg)
+
+    def _recv(self):
+        if self._batched:
+            if not self._replies:
+                self._channel.send(_BATCH + b"".join(self._window))
+                self._window = []
+                batch = self._channel.recv()
+                if batch == _RESET:
+                    return batch
+                pos = 1
+                while pos < len(batch):
+                    n, = _u32.unpack_from(batch, pos)
+                    self._replies.append(batch[pos + 4:pos + 4 + n])
+                    pos += 4 + n
+                self._replies.reverse()
+            return self._replies.pop()
+        return self._channel.recv()
+
+    def reply(self):
+        reply = self._recv()
+        if reply == _RESET:
+            self._channel.send(_OK)
+            raise _Reset
+        t, = _u64.unpack_from(reply, 1)
+        if len(reply) > 9:
+            pos = self._pos
+            return t, int.from_bytes(reply[pos:pos + self._n], 'little')
+        return t, None
+
+
+def _connect(text=False, restart=True):
+    """ Return the HDL side of the protocol that MyHDL offers. """
+    wt = int(os.environ['MYHDL_TO_PIPE'])
+    rf = int(os.environ['MYHDL_FROM_PIPE'])
+    version = min(int(os.environ.get('MYHDL_PROTOCOL', 0)), _PROTOCOL)
+    if text or not version:
+        return _TextPeer(rf, wt)
+    os.write(wt, _GREETING + bytes([version]))
+    channel = _Channel(rf, wt)
+    if 'MYHDL_SHM' in os.environ:
+        memfd, efd0, efd1 = map(int, os.environ['MYHDL_SHM'].split())
+        mem = mmap.mmap(memfd, 2 * (_ringheader + _ringsize))
+        channel.send(_SHM)
+        rx, tx = _shmRings(mem, (efd0, efd1), rf, peer=True)
+        channel = _ShmChannel(rf, wt, rx, tx)
+    return _BinaryPeer(channel, version, restart)
+
+
+def _run(peer, args):
+    """ Simulate the design from time 0. """
+    width = args.width
+    sigs = [('dout', width)] + [('q%d' % i, width) for i in range(args.stages)]
+    rand = random.Random(args.seed)
+    peer.handshake("FROM", [('din', width)])
+    peer.handshake("TO", sigs)
+    peer.start()
+
+    time = 0
+    values = [0] * len(sigs)
+    changes = []
+    while 1:
+        # the read-only callback: the changes of the time step
+        peer.values(time, sigs, changes)
+        changes = []
+        t, din = peer.reply()
+        if t != time:
+            # the clock edge of the pipeline
+            time = t
+            q = values[1:]
+            if q:
+                if rand.random() < args.activity:
+                    q.insert(0, rand.getrandbits(width))
+                else:
+                    q.insert(0, q[0])
+            for i, v in enumerate(q[:-1], 1):
+                if v != values[i]:
+                    values[i] = v
+                    changes.append((i, v))
+        elif din is not None and din != values[0]:
+            # a delta cycle that drives din
+            values[0] = din
+            changes.append((0, din))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m myhdl._cosimPeer")
+    parser.add_argument("width", type=int, nargs="?", default=32)
+    parser.add_argument("--stages", type=int, default=0)
+    parser.add_argument("--activity", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text", action="store_true")
+    parser.add_argument("--no-restart", dest="restart", action="store_false")
+    args = parser.parse_args(argv[1:])
+    peer = _connect(args.text, args.restart)
+    while 1:
+        try:
+            _run(peer, args)
+        except _Reset:
+            continue
+        except (CosimulationError, BrokenPipeError):
+            # MyHDL is done
+            break
+
+
+if __name__ == '__main__':
+    main(sys.argv)
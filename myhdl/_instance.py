@@ -18,7 +18,7 @@
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 
 """ Module with the always function. """
-import inspect
+import sys
 from types import FunctionType
 
 from myhdl import InstanceError
@@ -36,10 +36,20 @@ _error.ArgType = "decorated object should be a generator function"
 
 class _CallInfo(object):
 
-    def __init__(self, name, modctxt, symdict):
+    def __init__(self, name, modctxt, f_globals, f_locals):
         self.name = name
         self.modctxt = modctxt
-        self.symdict = symdict
+        self._globals = f_globals
+        self._locals = f_locals
+        self._symdict = None
+
+    @property
+    def symdict(self):
+        """ The globals and locals of the caller, merged on first use. """
+        if self._symdict is None:
+            self._symdict = dict(self._globals)
+            self._symdict.update(self._locals)
+        return self._symdict
 
 
 def _getCallInfo():
@@ -54,17 +64,16 @@ def _getCallInfo():
     3: the caller of the block function, e.g. the BlockInstance.
     """
     from myhdl import _block
-    funcrec = inspect.stack()[2]
-    name = funcrec[3]
-    frame = funcrec[0]
-    symdict = dict(frame.f_globals)
-    symdict.update(frame.f_locals)
+    frame = sys._getframe(2)
     modctxt = False
-    callerrec = inspect.stack()[3]
-    f_locals = callerrec[0].f_locals
-    if 'self' in f_locals:
-        modctxt = isinstance(f_locals['self'], _block._Block)
-    return _CallInfo(name, modctxt, symdict)
+    caller = frame.f_back
+    if caller is not None:
+        f_locals = caller.f_locals
+        if 'self' in f_locals:
+            modctxt = isinstance(f_locals['self'], _block._Block)
+    # the locals change as the block function goes on
+    return _CallInfo(frame.f_code.co_name, modctxt, frame.f_globals,
+                     dict(frame.f_locals))
 
 
 def instance(genfunc):
@@ -88,11 +97,9 @@ class _Instantiator(object):
         self.gen = genfunc()
         # infer symdict
         f = self.funcobj
-        varnames = f.__code__.co_varnames
-        symdict = {}
-        for n, v in callinfo.symdict.items():
-            if n not in varnames:
-                symdict[n] = v
+        symdict = dict(callinfo.symdict)
+        for n in f.__code__.co_varnames:
+            symdict.pop(n, None)
         self.symdict = symdict
 
         # print modname, genfunc.__name__
@@ -121,6 +128,11 @@ class _Instantiator(object):
     def waiter(self):
         return self._waiter()(self.gen)
 
+    @property
+    def staticWaiter(self):
+        """ Waiter with a static subscription, or None if not applicable """
+        return None
+
     def _waiter(self):
         return _inferWaiter
 
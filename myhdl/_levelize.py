@@ -0,0 +1,164 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides levelized evaluation of always_comb blocks.
+
+The always_comb blocks of a simulation are sorted in topological order,
+based on their input and output signals. When any of them is triggered,
+the kernel evaluates the triggered blocks in a single pass in that order
+at the end of the delta cycle. The outputs of each block are updated
+immediately, so that blocks further down the network see the new values
+in the same pass.
+
+"""
+from myhdl import SimulationError
+from myhdl._Signal import _Signal, _isListOfSigs
+from myhdl._Waiter import _Waiter
+
+
+class _error:
+    pass
+
+
+_error.CombLoop = "Combinational loop between always_comb blocks"
+
+
+def _combOutputs(comb):
+    outputs = []
+    for n in sorted(comb.outputs):
+        s = comb.symdict[n]
+        if isinstance(s, _Signal):
+            outputs.append(s)
+        elif _isListOfSigs(s):
+            outputs.extend(s)
+    return outputs
+
+
+def _combName(comb):
+    return "%s.%s" % (comb.callername, comb.name)
+
+
+def _levelize(combs):
+    """ Return the always_comb blocks and their outputs in topological order.
+
+    Raise a SimulationError if the blocks contain a combinational loop.
+    """
+    outputs = [_combOutputs(c) for c in combs]
+    readers = {}
+    for i, c in enumerate(combs):
+        for s in c.senslist:
+            readers.setdefault(id(s), []).append(i)
+    succs = []
+    indegree = [0] * len(combs)
+    for i in range(len(combs)):
+        succ = set()
+        for s in outputs[i]:
+            succ.update(readers.get(id(s), ()))
+        succs.append(sorted(succ))
+        for j in succ:
+            indegree[j] += 1
+    order = []
+    ready = [i for i in range(len(combs)) if not indegree[i]]
+    ready.reverse()
+    while ready:
+        i = ready.pop()
+        order.append(i)
+        for j in reversed(succs[i]):
+            indegree[j] -= 1
+            if not indegree[j]:
+                ready.append(j)
+    if len(order) < len(combs):
+        # blocks left over are on a loop or downstream of one:
+        # keep only those that reach a loop as well
+        left = set(range(len(combs))) - set(order)
+        changed = True
+        while changed:
+            changed = False
+            for i in sorted(left):
+                if not left.intersection(succs[i]):
+                    left.remove(i)
+                    changed = True
+        names = ", ".join(_combName(combs[i]) for i in sorted(left))
+        raise SimulationError(_error.CombLoop, names)
+    return [(combs[i], outputs[i]) for i in order]
+
+
+class _CombWaiter(_Waiter):
+
+    """ Member of a _CombNetwork, subscribed to the inputs of a block.
+
+    When the kernel runs it, it only marks the network as pending. A
+    member that was evaluated by a network pass in the meantime is not
+    triggered anymore, so that running it is a no-op.
+    """
+
+    __slots__ = ('func', 'senslist', 'outputs', 'network', 'triggered',
+                 'hasRun')
+
+    def __init__(self, func, senslist, outputs, network):
+        self.func = func
+        self.senslist = senslist
+        self.outputs = outputs
+        self.network = network
+        self.triggered = False
+        self.hasRun = 0
+
+    def next(self, waiters, actives, exc):
+        if self.triggered:
+            self.network.pending = True
+
+
+class _CombNetwork(_Waiter):
+
+    """ Waiter that evaluates always_comb blocks in topological order. """
+
+    __slots__ = ('members', 'pending', 'hasRun')
+
+    def __init__(self, combs):
+        network = []
+        for comb, outputs in _levelize(combs):
+            network.append(_CombWaiter(comb.func, comb.senslist,
+                                       tuple(outputs), self))
+        self.members = network
+        self.pending = False
+        self.hasRun = 0
+
+    def next(self, waiters, actives, exc):
+        # first run: subscribe and evaluate all blocks
+        for m in self.members:
+            for s in m.senslist:
+                s._subscribe(m, s)
+            m.triggered = True
+        self.pending = True
+
+    def run(self, waiters):
+        """ Evaluate the triggered blocks and update their outputs. """
+        self.pending = False
+        append = waiters.append
+        for m in self.members:
+            if m.triggered:
+                m.triggered = False
+                m.func()
+                for s in m.outputs:
+                    if s._dirty:
+                        s._dirty = False
+                        # members further down are evaluated in this pass
+                        for w in s._update():
+                            if w.__class__ is not _CombWaiter:
+                                append(w)
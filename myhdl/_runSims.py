@@ -0,0 +1,177 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the runSims function and the SimResult class
+
+runSims runs a simulation for each of a list of parameter sets on a
+process pool. Each job elaborates the design with its parameters in a
+fresh simulation context, and runs it with the random module seeded
+from the job's seed. The results stream back as the jobs complete.
+
+"""
+import contextlib
+import importlib
+import io
+import random
+import signal
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from myhdl import StopSimulation
+from myhdl._simulator import SimulationContext
+from myhdl._Simulation import Simulation
+from myhdl._block import block
+
+
+class SimResult(object):
+
+    """ Result of a simulation job.
+
+    index -- position of the job's parameter set
+    params -- the parameter set
+    seed -- the seed of the random module
+    status -- 'pass', 'fail' or 'timeout'
+    time -- simulation time at the end of the job
+    walltime -- wall clock time of the job, in seconds
+    output -- captured standard output and error of the job
+    error -- formatted traceback of a failure, or None
+    """
+
+    def __init__(self, index, params, seed):
+        self.index = index
+        self.params = params
+        self.seed = seed
+        self.status = 'pass'
+        self.time = 0
+        self.walltime = 0.0
+        self.output = ''
+        self.error = None
+
+    @property
+    def passed(self):
+        return self.status == 'pass'
+
+    def __repr__(self):
+        return "<SimResult %s %s seed=%s time=%s walltime=%.3f>" % \
+            (self.index, self.status, self.seed, self.time, self.walltime)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _alarm(signum, frame):
+    raise _Timeout("Job timed out")
+
+
+def _factoryRef(factory):
+    """ Return a picklable reference to a factory. """
+    # a block decorator hides its function under the module level name
+    if isinstance(factory, block):
+        return factory.func.__module__, factory.func.__qualname__
+    return factory
+
+
+def _resolve(ref):
+    if not isinstance(ref, tuple):
+        return ref
+    modname, qualname = ref
+    obj = importlib.import_module(modname)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _runJob(ref, index, params, seed, duration, timeout):
+    """ Elaborate and run a single simulation job, and return its result. """
+    result = SimResult(index, params, seed)
+    out = io.StringIO()
+    timed = timeout is not None and hasattr(signal, 'setitimer')
+    if timed:
+        handler = signal.signal(signal.SIGALRM, _alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.time()
+    sim = None
+    context = SimulationContext()
+    try:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            random.seed(seed)
+            with context:
+                sim = Simulation(_resolve(ref)(**params))
+            sim.run(duration, quiet=1)
+    except _Timeout:
+        result.status = 'timeout'
+    except StopSimulation:
+        pass
+    except Exception:
+        result.status = 'fail'
+        result.error = traceback.format_exc()
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+        if sim is not None and not sim._finished:
+            sim.quit()
+    result.walltime = time.time() - start
+    result.time = context.now()
+    result.output = out.getvalue()
+    return result
+
+
+def runSims(factory, paramsets, workers=None, duration=None, timeout=None,
+            seed=0):
+    """ Run a simulation for each parameter set, on a process pool.
+
+    Return an iterator over SimResult objects, in order of completion.
+
+    factory -- a block, or a picklable function that returns the
+               instances to simulate
+    paramsets -- sequence of dicts of keyword arguments for the factory
+    workers -- number of worker processes (default: number of CPUs)
+    duration -- simulation duration of each job (default: until the
+                simulation stops)
+    timeout -- wall clock time limit of each job, in seconds (default:
+               none). Requires a platform with signal.setitimer.
+    seed -- base seed: job i seeds the random module with seed + i
+
+    """
+    ref = _factoryRef(factory)
+    paramsets = [dict(p or {}) for p in paramsets]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for i, params in enumerate(paramsets):
+            f = pool.submit(_runJob, ref, i, params, seed + i, duration,
+                            timeout)
+            futures[f] = i
+        try:
+            for f in as_completed(futures):
+                try:
+                    result = f.result()
+                except Exception:
+                    # the worker itself failed, e.g. because it died
+                    i = futures[f]
+                    result = SimResult(i, paramsets[i], seed + i)
+                    result.status = 'fail'
+                    result.error = traceback.format_exc()
+                yield result
+        finally:
+            # don't start the remaining jobs when the caller stops early
+            for f in futures:
+                f.cancel()
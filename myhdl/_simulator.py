@@ -21,19 +21,92 @@
 
 This module provides the following objects:
 now -- function that returns the current simulation time
+SimulationContext -- class that owns the state of a simulation
+
+The module itself is the default simulation context: its globals hold the
+state of simulations that are built outside any SimulationContext.
 
 """
+import sys
+import threading
+
+from myhdl._EventQueue import _EventQueue
 
 
 _signals = []
 _blocks = []
 _siglist = []
-_futureEvents = []
+_futureEvents = _EventQueue()
 _time = 0
 _tracing = 0
 _tf = None
+# signal update statistics
+_nrUpdates = 0
+_nrDupUpdates = 0
+# number of simulations using the context
+_nrSims = 0
+
+
+class SimulationContext(object):
+
+    """ State of a simulation, independent of other simulations.
+
+    Signals are bound to the context that is current when they are
+    constructed, and a simulation to the context that is current when it
+    is constructed. Use the object in a with statement to make it the
+    current context of the thread, to elaborate a design and construct
+    its simulation. The simulation makes its context current while it
+    runs, and can't use the signals of another context.
+
+    """
+
+    def __init__(self):
+        self._signals = []
+        self._siglist = []
+        self._futureEvents = _EventQueue()
+        self._time = 0
+        self._tracing = 0
+        self._tf = None
+        self._nrUpdates = 0
+        self._nrDupUpdates = 0
+        self._nrSims = 0
+
+    def __enter__(self):
+        _enter(self)
+        return self
+
+    def __exit__(self, *exc):
+        _exit()
+
+    def now(self):
+        """ Return the simulation time of the context """
+        return self._time
+
+
+class _State(threading.local):
+
+    def __init__(self):
+        self.context = sys.modules[__name__]
+        self.stack = []
+
+
+_state = _State()
+
+
+def _context():
+    """ Return the current simulation context of the thread. """
+    return _state.context
+
+
+def _enter(context):
+    _state.stack.append(_state.context)
+    _state.context = context
+
+
+def _exit():
+    _state.context = _state.stack.pop()
 
 
 def now():
     """ Return the current simulation time """
-    return _time
+    return _state.context._time
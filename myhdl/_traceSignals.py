@@ -24,12 +24,17 @@ import sys
 import time
 import os
 path = os.path
-import shutil
+import queue
+import threading
 import warnings
+from collections import deque
+from fnmatch import fnmatchcase
 
 from myhdl import _simulator, __version__, EnumItemType
 from myhdl._extractHierarchy import _HierExtr
 from myhdl import TraceSignalsError
+from myhdl._intbv import intbv
+from myhdl import _waveform
 from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
 from myhdl._block import _Block
 from myhdl._getHierarchy import _getHierarchy
@@ -37,6 +42,10 @@ from myhdl._getHierarchy import _getHierarchy
 _tracing = 0
 _profileFunc = None
 vcdpath = ''
+# number of records in the buffer of a VCD writer before it is flushed
+_bufsize = 1 << 16
+# number of full buffers that wait for the thread of a threaded VCD writer
+_queuesize = 4
 
 
 class _error:
@@ -46,6 +55,549 @@ class _error:
 _error.TopLevelName = "result of traceSignals call should be assigned to a top level name"
 _error.ArgType = "traceSignals first argument should be a classic function"
 _error.MultipleTraces = "Cannot trace multiple instances simultaneously"
+_error.Format = "Unknown trace format"
+_error.Compression = "Unknown trace compression"
+_error.CompressedFormat = "Only VCD output can be compressed"
+
+
+# compression levels of the trace compressors, for speed over size
+_compressions = {'gz': 6, 'bz2': 9, 'xz': 1}
+
+
+def _openVcd(filename, compression=None):
+    """ Open a VCD file for writing, through a compressor if any.
+
+    The compressors are imported when they are used, as they are
+    optional modules of Python.
+    """
+    if compression is None:
+        return open(filename, 'w')
+    level = _compressions[compression]
+    if compression == 'gz':
+        import gzip
+        return gzip.open(filename, 'wt', compresslevel=level)
+    if compression == 'bz2':
+        import bz2
+        return bz2.open(filename, 'wt', compresslevel=level)
+    import lzma
+    return lzma.open(filename, 'wt', preset=level)
+
+
+class _TraceWriter(object):
+
+    """ Base class of trace writers, that can pause and resume tracing.
+
+    While tracing is paused, the traced signals don't print their value
+    changes, and a timestep attribute shadows the timestep method, to
+    skip the time steps. The shadow also switches tracing on and off at
+    the times of a window.
+
+    """
+
+    def __init__(self):
+        self.traced = {}
+        self.on = True
+        # pending (time, on) switches, in time order
+        self.switches = []
+
+    def printer(self, s):
+        self.traced[id(s)] = s
+        return self._printer(s)
+
+    def window(self, start, stop=None):
+        """ Trace from time start up to time stop only. """
+        if stop is not None:
+            self.switches.append((stop, False))
+        if start > 0:
+            self.switches.insert(0, (start, True))
+            self.pause(0)
+        self.timestep = self._switch
+
+    def pause(self, t):
+        """ Pause tracing at time t. """
+        if self.on:
+            self.on = False
+            for s in self.traced.values():
+                s._tracing = 0
+            self.dumpoff(t)
+            self.timestep = self._switch
+
+    def resume(self, t):
+        """ Resume tracing at time t. """
+        if not self.on:
+            self.on = True
+            for s in self.traced.values():
+                s._tracing = 1
+            self.dumpon(t)
+            if not self.switches:
+                self.__dict__.pop('timestep', None)
+
+    def _switch(self, t):
+        """ Time step while tracing is paused or has pending switches. """
+        switches = self.switches
+        ts = None
+        while switches and switches[0][0] <= t:
+            ts, on = switches.pop(0)
+            if on:
+                self.resume(ts)
+            else:
+                self.pause(ts)
+        # a switch at time t has started the records of time t already
+        if self.on and ts != t:
+            type(self).timestep(self, t)
+            if not switches:
+                self.__dict__.pop('timestep', None)
+
+    def failure(self):
+        """ Called when an exception ends or interrupts a run.
+
+        Write what has been traced. An error of the writer is reported as
+        a warning, so that the exception of the run propagates.
+        """
+        try:
+            self.dump()
+        except Exception as e:
+            warnings.warn("trace writer failed: %s: %s" %
+                          (type(e).__name__, e), RuntimeWarning)
+
+    def dump(self):
+        self.flush()
+
+
+class _VcdWriter(_TraceWriter):
+
+    """ Buffered writer of a VCD file.
+
+    Records are appended as preformatted strings to an in-memory buffer,
+    which is written to the file in large chunks. The write attribute is
+    the append method of the buffer, so that print can write to the
+    object as well.
+
+    """
+
+    # whether signals write raw values instead of formatted records
+    raw = False
+
+    def __init__(self, f, bufsize=None):
+        _TraceWriter.__init__(self)
+        self.file = f
+        self.buf = []
+        self.write = self.buf.append
+        self.bufsize = bufsize or _bufsize
+
+    def header(self, timescale):
+        _writeVcdHeader(self, timescale)
+
+    def scope(self, name):
+        self.write("$scope module %s $end\n" % name)
+
+    def upscope(self):
+        self.write("$upscope $end\n")
+
+    def var(self, vartype, size, s, name):
+        self.write("$var %s %s %s %s $end\n" % (vartype, size, s._code, name))
+
+    def dumpvars(self, siglist):
+        """ End the definitions, and write the initial values. """
+        self.write("\n$enddefinitions $end\n$dumpvars\n")
+        for s in siglist:
+            s._printVcd()
+        self.write("$end\n")
+
+    def _printer(self, s):
+        return _vcdPrinter(s, self.raw)
+
+    def dumpoff(self, t):
+        type(self).timestep(self, t)
+        self.write("$dumpoff\n")
+        for s in self.traced.values():
+            if s._type is bool:
+                self.write("x%s\n" % s._code)
+            elif s._type is intbv and s._nrbits:
+                self.write("bx %s\n" % s._code)
+        self.write("$end\n")
+
+    def dumpon(self, t):
+        type(self).timestep(self, t)
+        self.write("$dumpon\n")
+        for s in self.traced.values():
+            s._printVcd()
+        self.write("$end\n")
+
+    def timestep(self, t):
+        """ Start the records of time t. """
+        if len(self.buf) >= self.bufsize:
+            self.flush()
+        self.write("#%s\n" % t)
+
+    def flush(self):
+        self.file.write("".join(self.buf))
+        del self.buf[:]
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        # later writes fail like writes to the closed file
+        self.write = self.file.write
+
+
+def _timeRecord(t):
+    return "#%s\n" % t
+
+
+class _VcdWriterThread(_VcdWriter):
+
+    """ VCD writer that formats and writes records in a background thread.
+
+    Besides preformatted strings, the buffer holds (format, value) tuples,
+    that the thread turns into records. Full buffers are handed to the
+    thread through a bounded queue, so that the simulation waits when
+    the thread falls behind. An error in the thread is raised again by
+    the next flush or close.
+
+    """
+
+    raw = True
+
+    def __init__(self, f, bufsize=None, queuesize=None):
+        _VcdWriter.__init__(self, f, bufsize)
+        self.queue = queue.Queue(queuesize or _queuesize)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="vcd writer")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        write = self.file.write
+        while 1:
+            buf = self.queue.get()
+            try:
+                if buf is None:
+                    return
+                if self.error is None:
+                    write("".join([r if r.__class__ is str else r[0](r[1])
+                                   for r in buf]))
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _handoff(self):
+        if self.buf:
+            self.queue.put(self.buf)
+            self.buf = []
+            self.write = self.buf.append
+
+    def _check(self):
+        if self.error is not None:
+            e, self.error = self.error, None
+            raise e
+
+    def timestep(self, t):
+        """ Start the records of time t. """
+        if len(self.buf) >= self.bufsize:
+            self._handoff()
+        self.write((_timeRecord, t))
+
+    def flush(self):
+        """ Wait until the thread has written all records. """
+        self._handoff()
+        self.queue.join()
+        self._check()
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._handoff()
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        self.write = self.file.write
+        self._check()
+
+
+class _VcdRecorder(_VcdWriter):
+
+    """ VCD writer that keeps the value changes of a time span in memory.
+
+    The records of each time step are kept in a list, and the records of
+    the time steps before the span are folded into the values at its
+    start. A dump writes a VCD file with the values at the start of the
+    span, and the records of the span. Nothing is written otherwise.
+
+    """
+
+    raw = True
+
+    def __init__(self, path, span, compression=None):
+        _VcdWriter.__init__(self, None)
+        self.path = path
+        self.span = span
+        self.compression = compression
+        self.time = 0
+        self.steps = deque()
+        self.values = {}
+        self.head = None
+
+    def _new(self):
+        self.buf = []
+        self.write = self.buf.append
+
+    def dumpvars(self, siglist):
+        self.head = "".join(self.buf) + "\n$enddefinitions $end\n"
+        self._new()
+        for s in siglist:
+            s._printVcd()
+        for record, val in self.buf:
+            self.values[record] = val
+        self._new()
+
+    def timestep(self, t):
+        """ Start the records of time t, and drop those before the span. """
+        steps = self.steps
+        if self.buf:
+            steps.append((self.time, self.buf))
+            self._new()
+        self.time = t
+        start = t - self.span
+        values = self.values
+        while steps and steps[0][0] < start:
+            for r in steps.popleft()[1]:
+                if r.__class__ is tuple:
+                    values[r[0]] = r[1]
+
+    def dump(self):
+        """ Write the span to the VCD file. """
+        out = [self.head, "#%s\n$dumpvars\n" % max(self.time - self.span, 0)]
+        out.extend([record(val) for record, val in self.values.items()])
+        out.append("$end\n")
+        for t, records in list(self.steps) + [(self.time, self.buf)]:
+            out.append("#%s\n" % t)
+            out.extend([r if r.__class__ is str else r[0](r[1])
+                        for r in records])
+        with _openVcd(self.path, self.compression) as f:
+            f.write("".join(out))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.steps.clear()
+        self.values.clear()
+        self.write = _closedWrite
+
+
+def _closedWrite(record):
+    raise ValueError("I/O operation on closed trace")
+
+
+class _WaveWriter(_TraceWriter):
+
+    """ Writer of a binary waveform file, with the interface of a VCD writer.
+
+    Signals append (number, value) tuples to a log, and the time steps
+    append the time. When the log is full, it is encoded as a block of
+    the file. The index of the blocks is written when the file is closed.
+
+    """
+
+    def __init__(self, f, bufsize=None):
+        _TraceWriter.__init__(self)
+        self.file = f
+        self.log = []
+        self.write = self.log.append
+        self.bufsize = bufsize or _bufsize
+        self.numbers = {}
+        self.sigs = []
+        self.kinds = []
+        self.signals = []
+        self.table = []
+        self.values = None
+        self.blocks = []
+        self.time = 0
+
+    def header(self, timescale):
+        self.date = time.asctime()
+        self.version = "MyHDL %s" % __version__
+        self.timescale = timescale
+
+    def scope(self, name):
+        self.table.append((_waveform._SCOPE, name))
+
+    def upscope(self):
+        self.table.append((_waveform._UPSCOPE,))
+
+    def var(self, vartype, size, s, name):
+        self.table.append((_waveform._VAR, vartype, size, self.numbers[id(s)],
+                           name))
+
+    def _printer(self, s):
+        n = self.numbers.get(id(s))
+        if n is None:
+            n = self.numbers[id(s)] = len(self.sigs)
+            self.sigs.append(s)
+            kind, width = _waveKind(s)
+            self.kinds.append(kind)
+            self.signals.append((kind, width, s._code))
+        return _wavePrinter(s, n)
+
+    def dumpvars(self, siglist):
+        """ Write the header, with the initial values of all signals. """
+        self.file.write(_waveform._magic)
+        self.file.write(_waveform._encodeHeader(self.date, self.version,
+                                                self.timescale, self.signals,
+                                                self.table))
+        for s in self.sigs:
+            s._printVcd()
+        self.values = [val for n, val in self.log]
+        del self.log[:]
+
+    def timestep(self, t):
+        """ Start the records of time t. """
+        if len(self.log) >= self.bufsize:
+            self._block()
+            self.time = t
+        else:
+            self.write(t)
+
+    def dumpoff(self, t):
+        # the values stay as they are
+        pass
+
+    def dumpon(self, t):
+        type(self).timestep(self, t)
+        for s in self.sigs:
+            s._printVcd()
+
+    def _block(self):
+        """ Encode the log as a block. """
+        t0 = self.time
+        block, self.time = _waveform._encodeLog(t0, self.log, self.kinds,
+                                                self.values)
+        self.blocks.append((self.file.tell(), t0, self.time))
+        self.file.write(block)
+        del self.log[:]
+
+    def flush(self):
+        if self.log:
+            self._block()
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.log or not self.blocks:
+            self._block()
+        self.file.write(_waveform._encodeIndex(self.file.tell(), self.blocks))
+        self.file.close()
+        # later writes fail like writes to the closed file
+        self.write = self.file.write
+
+
+def _waveKind(s):
+    """ Return the kind of the values of a signal, and its width. """
+    if s._type is bool:
+        return _waveform._BIT, 1
+    elif s._type is intbv:
+        if s._nrbits:
+            return _waveform._VEC, s._nrbits
+        return _waveform._HEX, 0
+    elif s._type == (int,):
+        return _waveform._INT, 0
+    return _waveform._STR, s._nrbits
+
+
+def _wavePrinter(s, n):
+    """ Return a function that logs the value changes of signal n. """
+    sim = s._sim
+    if s._type is bool:
+        def printVcd():
+            sim._tf.write((n, s._val))
+    elif s._type is intbv:
+        def printVcd():
+            # the intbv value of a signal is updated in place
+            val = s._val
+            sim._tf.write((n, None if val is None else val._val))
+    elif s._type == (int,):
+        def printVcd():
+            sim._tf.write((n, s._val))
+    else:
+        def printVcd():
+            val = s._val
+            sim._tf.write((n, None if val is None else str(val)))
+    return printVcd
+
+
+def _vcdPrinter(s, raw=False):
+    """ Return a function that prints the value changes of a signal.
+
+    The function does the work of the signal's _printVcd method, with
+    the constant parts of the records formatted in advance. For a raw
+    writer, it writes the value with the function that formats it.
+
+    """
+    sim = s._sim
+    suffix = " %s\n" % s._code
+    if s._type is bool:
+        z = "z%s\n" % s._code
+        records = ("0%s\n" % s._code, "1%s\n" % s._code)
+
+        def record(val):
+            return z if val is None else records[1 if val else 0]
+
+        if raw:
+            def printVcd():
+                sim._tf.write((record, s._val))
+        else:
+            def printVcd():
+                val = s._val
+                sim._tf.write(z if val is None else records[1 if val else 0])
+    elif s._type is intbv and s._nrbits:
+        z = "b%s%s" % ('z' * s._nrbits, suffix)
+        spec = "0%db" % s._nrbits
+        mask = (1 << s._nrbits) - 1
+
+        def record(val):
+            if val is None:
+                return z
+            return "b" + format(val & mask, spec) + suffix
+
+        if raw:
+            def printVcd():
+                # the intbv value of a signal is updated in place
+                val = s._val
+                sim._tf.write((record, None if val is None else val._val))
+        else:
+            def printVcd():
+                val = s._val
+                if val is None:
+                    sim._tf.write(z)
+                else:
+                    sim._tf.write("b" + format(val._val & mask, spec) + suffix)
+    elif not raw:
+        # other kinds are rare, and use the methods of the signal
+        if s._type is intbv:
+            return s._printVcdHex
+        return s._printVcdStr
+    elif s._type is intbv:
+        def record(val):
+            return "s%s%s" % ('z' if val is None else hex(val), suffix)
+
+        def printVcd():
+            val = s._val
+            sim._tf.write((record, None if val is None else val._val))
+    else:
+        def record(val):
+            return "s%s%s" % (val, suffix)
+
+        def printVcd():
+            # the value of other types is replaced, not updated in place
+            sim._tf.write((record, s._val))
+    return printVcd
 
 
 class _TraceSignalsClass(object):
@@ -55,7 +607,15 @@ class _TraceSignalsClass(object):
                 "filename",
                 "timescale",
                 "tracelists",
-                "tracebackup"
+                "include",
+                "exclude",
+                "depth",
+                "window",
+                "recorder",
+                "tracebackup",
+                "threaded",
+                "format",
+                "compression"
                 )
 
     def __init__(self):
@@ -64,17 +624,27 @@ class _TraceSignalsClass(object):
         self.filename = None
         self.timescale = "1ns"
         self.tracelists = True
+        self.include = None
+        self.exclude = None
+        self.depth = None
+        self.window = None
+        self.recorder = None
         self.tracebackup = True
+        self.threaded = False
+        self.format = 'vcd'
+        self.compression = None
 
     def __call__(self, dut, *args, **kwargs):
         global _tracing, vcdpath
+        context = _simulator._context()
         if isinstance(dut, _Block):
             # now we go bottom-up: so clean up and start over
             # TODO: consider a warning for the overruled block
-            if _simulator._tracing:
-                _simulator._tracing = 0
-                _simulator._tf.close()
-                os.remove(vcdpath)
+            if context._tracing:
+                context._tracing = 0
+                context._tf.close()
+                if path.exists(vcdpath):
+                    os.remove(vcdpath)
         else:  # deprecated
             if _tracing:
                 return dut(*args, **kwargs)  # skip
@@ -88,8 +658,17 @@ class _TraceSignalsClass(object):
         if not isinstance(dut, _Block):
             if not callable(dut):
                 raise TraceSignalsError(_error.ArgType, "got %s" % type(dut))
-        if _simulator._tracing:
+        if context._tracing:
             raise TraceSignalsError(_error.MultipleTraces)
+        if self.format not in ('vcd', 'mwf'):
+            raise TraceSignalsError(_error.Format, repr(self.format))
+        if self.compression is not None:
+            if self.compression not in _compressions:
+                raise TraceSignalsError(_error.Compression,
+                                        repr(self.compression))
+            if self.format != 'vcd':
+                raise TraceSignalsError(_error.CompressedFormat,
+                                        repr(self.format))
 
         _tracing = 1
         try:
@@ -119,24 +698,63 @@ class _TraceSignalsClass(object):
             else:
                 filename = str(self.filename)
 
-            vcdpath = os.path.join(directory, filename + ".vcd")
+            ext = "." + self.format
+            if self.compression is not None:
+                ext += "." + self.compression
+            base = os.path.join(directory, filename)
+            vcdpath = base + ext
 
             if path.exists(vcdpath):
                 if self.tracebackup :
-                    backup = vcdpath[:-4] + '.' + str(path.getmtime(vcdpath)) + '.vcd'
-                    shutil.copyfile(vcdpath, backup)
-                os.remove(vcdpath)
-            vcdfile = open(vcdpath, 'w')
-            _simulator._tracing = 1
-            _simulator._tf = vcdfile
-            _writeVcdHeader(vcdfile, self.timescale)
-            _writeVcdSigs(vcdfile, h.hierarchy, self.tracelists)
+                    # a rename, as copying a large file takes long
+                    backup = base + '.' + str(path.getmtime(vcdpath)) + ext
+                    os.replace(vcdpath, backup)
+                else:
+                    os.remove(vcdpath)
+            if self.recorder is not None:
+                vcdfile = _VcdRecorder(vcdpath, self.recorder,
+                                       self.compression)
+            elif self.format == 'mwf':
+                vcdfile = _WaveWriter(open(vcdpath, 'wb'))
+            elif self.threaded:
+                vcdfile = _VcdWriterThread(_openVcd(vcdpath, self.compression))
+            else:
+                vcdfile = _VcdWriter(_openVcd(vcdpath, self.compression))
+            context._tracing = 1
+            context._tf = vcdfile
+            vcdfile.header(self.timescale)
+            _writeVcdSigs(vcdfile, h.hierarchy, self.tracelists,
+                          self.include, self.exclude, self.depth)
+            if self.window is not None:
+                vcdfile.window(*self.window)
         finally:
             _tracing = 0
 
         return h.top
 
 
+    def start(self):
+        """ Resume tracing the current simulation at the current time. """
+        context = _simulator._context()
+        if context._tracing:
+            context._tf.resume(context._time)
+
+    def stop(self):
+        """ Pause tracing the current simulation at the current time. """
+        context = _simulator._context()
+        if context._tracing:
+            context._tf.pause(context._time)
+
+    def dump(self):
+        """ Write the trace of the current simulation.
+
+        In recorder mode, this writes the VCD file of the recorded span.
+        """
+        context = _simulator._context()
+        if context._tracing:
+            context._tf.dump()
+
+
 traceSignals = _TraceSignalsClass()
 
 _codechars = ""
@@ -184,23 +802,50 @@ def _getSval(s):
     return sval
 
 
-def _writeVcdSigs(f, hierarchy, tracelists):
+def _matches(path, patterns):
+    """ Return True if a path matches a glob pattern or compiled regex. """
+    if isinstance(patterns, str) or hasattr(patterns, 'fullmatch'):
+        patterns = [patterns]
+    for pattern in patterns:
+        if isinstance(pattern, str):
+            if fnmatchcase(path, pattern):
+                return True
+        elif pattern.fullmatch(path):
+            return True
+    return False
+
+
+def _selected(path, include, exclude):
+    if include is not None and not _matches(path, include):
+        return False
+    return exclude is None or not _matches(path, exclude)
+
+
+def _writeVcdSigs(f, hierarchy, tracelists, include=None, exclude=None,
+                  depth=None):
     curlevel = 0
     namegen = _genNameCode()
     siglist = []
+    scopes = []
     for inst in hierarchy:
         level = inst.level
         name = inst.name
         sigdict = inst.sigdict
         memdict = inst.memdict
+        if depth is not None and level > depth:
+            continue
+        scopes[level - 1:] = [name]
+        scope = ".".join(scopes)
         delta = curlevel - level
         curlevel = level
         assert(delta >= -1)
         if delta >= 0:
             for i in range(delta + 1):
-                print("$upscope $end", file=f)
-        print("$scope module %s $end" % name, file=f)
+                f.upscope()
+        f.scope(name)
         for n, s in sigdict.items():
+            if not _selected(scope + "." + n, include, exclude):
+                continue
             sval = _getSval(s)
             if sval is None:
                 raise ValueError("%s of module %s has no initial value" % (n, name))
@@ -208,29 +853,33 @@ def _writeVcdSigs(f, hierarchy, tracelists):
                 s._tracing = 1
                 s._code = next(namegen)
                 siglist.append(s)
+            # the signal may have been traced with another writer
+            s._printVcd = f.printer(s)
             w = s._nrbits
             # use real for enum strings
             if w:
                 if not isinstance(sval, EnumItemType):
-                    if w == 1:
-                        print("$var reg 1 %s %s $end" % (s._code, n), file=f)
-                    else:
-                        print("$var reg %s %s %s $end" % (w, s._code, n), file=f)
+                    f.var("reg", w, s, n)
                 else:
                     # 18-04-2014 jb
                     # it is an enum, and as Impulse doesn't know the awkward 'real' representation yet, so let's 'degrade' it to a binary type
                     # 30-04-2014 jb
                     # Impulse now has a 'string'type
-                    print("$var string %s %s %s $end" % (w, s._code, n), file=f)
+                    f.var("string", w, s, n)
 # print "30-04-2014 jb: Representing enum as string"  # leave a trace
             else:
-                print("$var real 1 %s %s $end" % (s._code, n), file=f)
+                f.var("real", 1, s, n)
         # Memory dump by Frederik Teichert, http://teichert-ing.de, date: 2011.03.28
         # The Value Change Dump standard doesn't support multidimensional arrays so
         # all memories are flattened and renamed.
         if tracelists:
             for n in memdict.keys():
-                print("$scope module {} $end" .format(n), file=f)
+                mempath = scope + "." + n
+                if tracelists is not True and not _matches(mempath, tracelists):
+                    continue
+                if not _selected(mempath, include, exclude):
+                    continue
+                f.scope(n)
                 memindex = 0
                 for s in memdict[n].mem:
                     sval = _getSval(s)
@@ -240,22 +889,15 @@ def _writeVcdSigs(f, hierarchy, tracelists):
                         s._tracing = 1
                         s._code = next(namegen)
                         siglist.append(s)
+                    s._printVcd = f.printer(s)
                     w = s._nrbits
                     # use real for enum strings
                     if w and not isinstance(sval, EnumItemType):
-                        if w == 1:
-                            print("$var reg 1 %s %s(%i) $end" % (s._code, n, memindex), file=f)
-                        else:
-                            print("$var reg %s %s %s(%i) $end" % (w, s._code, n, memindex), file=f)
+                        f.var("reg", w, s, "%s(%i)" % (n, memindex))
                     else:
-                        print("$var real 1 %s %s(%i) $end" % (s._code, n, memindex), file=f)
+                        f.var("real", 1, s, "%s(%i)" % (n, memindex))
                     memindex += 1
-                print("$upscope $end", file=f)
+                f.upscope()
     for i in range(curlevel):
-        print("$upscope $end", file=f)
-    print(file=f)
-    print("$enddefinitions $end", file=f)
-    print("$dumpvars", file=f)
-    for s in siglist:
-        s._printVcd()  # initial value
-    print("$end", file=f)
+        f.upscope()
+    f.dumpvars(siglist)
@@ -1,7 +1,6 @@
 import warnings
 
 from myhdl._Signal import _Signal, _DelayedSignal
-from myhdl._simulator import _siglist
 
 
 class BusContentionWarning(UserWarning):
@@ -63,7 +62,7 @@ class _TristateDriver(_Signal):
             self._next = None
         else:
             self._setNextVal(val)
-        _siglist.append(self._bus)
+        self._bus._markDirty()
 
 
 class _DelayedTristate(_DelayedSignal, _Tristate):
@@ -24,6 +24,7 @@ import __future__
 import ast
 import sys
 import inspect
+import weakref
 
 from tokenize import generate_tokens, untokenize, INDENT
 from io import StringIO
@@ -70,26 +71,39 @@ def _dedent(s):
     return untokenize(result)
 
 
+# the source of the functions that were parsed, by code object: the
+# functions of the instances in a block share theirs. An entry goes away
+# with its code object. Code objects compare by value, without their file
+# name, so an entry also records the file it was read from.
+_sources = weakref.WeakKeyDictionary()
+
+
 def _makeAST(f):
+    code = f.__code__
+    entry = _sources.get(code)
+    if entry is None or entry[0] != code.co_filename:
+        s = inspect.getsource(f)
+        entry = (code.co_filename, _dedent(s), inspect.getsourcefile(f),
+                 inspect.getsourcelines(f)[1] - 1)
+        _sources[code] = entry
+    filename, s, sourcefile, lineoffset = entry
     # Need to look at the flags used to compile the original function f and
     # pass these same flags to the compile() function. This ensures that
     # syntax-changing __future__ imports like print_function work correctly.
-    orig_f_co_flags = f.__code__.co_flags
+    orig_f_co_flags = code.co_flags
     # co_flags can contain various internal flags that we can't pass to
     # compile(), so strip them out here
     valid_flags = 0
     for future_feature in __future__.all_feature_names:
         feature = getattr(__future__, future_feature)
         valid_flags |= feature.compiler_flag
-    s = inspect.getsource(f)
-    s = _dedent(s)
     # use compile instead of ast.parse so that additional flags can be passed
     flags = ast.PyCF_ONLY_AST | (orig_f_co_flags & valid_flags)
     tree = compile(s, filename='<unknown>', mode='exec',
         flags=flags, dont_inherit=True)
     # tree = ast.parse(s)
-    tree.sourcefile = inspect.getsourcefile(f)
-    tree.lineoffset = inspect.getsourcelines(f)[1] - 1
+    tree.sourcefile = sourcefile
+    tree.lineoffset = lineoffset
     return tree
 
 
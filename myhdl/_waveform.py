@@ -0,0 +1,814 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the binary waveform format of traceSignals.
+
+A waveform file holds the same information as a VCD file, in a compact
+form that can be read from any point in time. All integers are unsigned
+LEB128 varints, and strings are a varint length followed by UTF-8 bytes.
+
+file    -- magic, header, blocks, index, trailer
+header  -- varint length, then the date, version and timescale strings,
+           the signal table and the hierarchy table
+signals -- number of signals, then kind, width and VCD code of each
+table   -- number of operations, then scope (name), upscope, or var
+           (VCD type, size, signal number, name) operations, in the order
+           of the scope walk of traceSignals
+block   -- varint length, then the start time, the last time minus the
+           start time, the values of all signals at the start, and the
+           value changes of the block
+changes -- number of changed signals, then the signal number increment
+           and byte size of the changes of each, then the changes: per
+           change, the time increment and the value
+index   -- number of blocks, then the offset increment, start time
+           increment and time span of each block
+trailer -- offset of the index as 8 bytes little endian, and the index
+           magic
+
+A value is 0 for None. Otherwise, a string is its size plus one, and
+an integer is its zigzag encoded difference with the previous integer
+value of the signal in the block, plus one.
+
+A file without a trailer, for example of a simulation that crashed, is
+read by following the lengths of the blocks.
+
+A VCD file can be converted to a waveform file as a stream, so that the
+waveform file serves as an index of the VCD file. Two waveforms are
+compared by merging the changes of their blocks in time order, so that
+only a few blocks are in memory at a time.
+
+"""
+import heapq
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from operator import itemgetter
+
+
+_magic = b"MYHDLWF1"
+_indexMagic = b"MWFINDEX"
+_trailer = struct.Struct("<Q8s")
+
+# kinds of signal values, with their VCD representation
+_BIT, _VEC, _HEX, _INT, _STR = range(5)
+# operations of the hierarchy table
+_SCOPE, _UPSCOPE, _VAR = range(3)
+# number of records of a VCD file in a block of its index
+_bufsize = 1 << 16
+
+
+def _putVarint(buf, n):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _getVarint(data, pos):
+    n = shift = 0
+    while 1:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _putString(buf, s):
+    b = s.encode('utf-8')
+    _putVarint(buf, len(b))
+    buf.extend(b)
+
+
+def _getString(data, pos):
+    n, pos = _getVarint(data, pos)
+    return data[pos:pos + n].decode('utf-8'), pos + n
+
+
+def _putValue(buf, kind, val, prev):
+    """ Encode a value, and return the previous value for the next one. """
+    if val is None:
+        buf.append(0)
+        return prev
+    if kind == _STR:
+        b = val.encode('utf-8')
+        _putVarint(buf, len(b) + 1)
+        buf.extend(b)
+        return prev
+    val = int(val)
+    d = val - prev
+    _putVarint(buf, (d << 1) + 1 if d >= 0 else (-d << 1))
+    return val
+
+
+def _getValue(data, pos, kind, prev):
+    """ Decode a value, and return it with the previous value and position. """
+    n, pos = _getVarint(data, pos)
+    if n == 0:
+        return None, prev, pos
+    if kind == _STR:
+        return data[pos:pos + n - 1].decode('utf-8'), prev, pos + n - 1
+    n -= 1
+    val = prev + (-((n + 1) >> 1) if n & 1 else n >> 1)
+    return val, val, pos
+
+
+def _encodeHeader(date, version, timescale, signals, table):
+    """ Return the encoded header.
+
+    signals -- list of (kind, width, code) tuples
+    table -- list of hierarchy table operations
+    """
+    body = bytearray()
+    for s in (date, version, timescale):
+        _putString(body, s)
+    _putVarint(body, len(signals))
+    for kind, width, code in signals:
+        body.append(kind)
+        _putVarint(body, width)
+        _putString(body, code)
+    _putVarint(body, len(table))
+    for op in table:
+        body.append(op[0])
+        if op[0] == _SCOPE:
+            _putString(body, op[1])
+        elif op[0] == _VAR:
+            vartype, size, index, name = op[1:]
+            _putString(body, vartype)
+            _putVarint(body, size)
+            _putVarint(body, index)
+            _putString(body, name)
+    buf = bytearray()
+    _putVarint(buf, len(body))
+    return bytes(buf + body)
+
+
+def _encodeBlock(t0, t1, kinds, snapshot, changes):
+    """ Return an encoded block.
+
+    kinds -- kind of each signal
+    snapshot -- values of the signals at the start of the block
+    changes -- list of (time, value) lists, or None, per signal
+    """
+    body = bytearray()
+    _putVarint(body, t0)
+    _putVarint(body, t1 - t0)
+    prevs = []
+    for kind, val in zip(kinds, snapshot):
+        _putValue(body, kind, val, 0)
+        prevs.append(0 if val is None or kind == _STR else int(val))
+    directory = bytearray()
+    data = bytearray()
+    nchanged = 0
+    last = 0
+    for i, ch in enumerate(changes):
+        if not ch:
+            continue
+        nchanged += 1
+        kind = kinds[i]
+        prev = prevs[i]
+        t = t0
+        start = len(data)
+        for ct, val in ch:
+            _putVarint(data, ct - t)
+            t = ct
+            prev = _putValue(data, kind, val, prev)
+        _putVarint(directory, i - last)
+        _putVarint(directory, len(data) - start)
+        last = i
+    _putVarint(body, nchanged)
+    body += directory
+    body += data
+    buf = bytearray()
+    _putVarint(buf, len(body))
+    return bytes(buf + body)
+
+
+def _encodeLog(t0, log, kinds, values):
+    """ Encode a log as a block, and return it with its last time.
+
+    log -- times, and (signal number, value) tuples of the changes at
+           the last time before them
+    values -- values of the signals at the start of the block, updated
+              to the values at its end
+    """
+    t = t0
+    changes = [None] * len(kinds)
+    for r in log:
+        if r.__class__ is tuple:
+            n, val = r
+            ch = changes[n]
+            if ch is None:
+                ch = changes[n] = []
+            ch.append((t, val))
+        else:
+            t = r
+    block = _encodeBlock(t0, t, kinds, values, changes)
+    for n, ch in enumerate(changes):
+        if ch:
+            values[n] = ch[-1][1]
+    return block, t
+
+
+def _encodeIndex(offset, blocks):
+    """ Return the encoded index and trailer, for an index at offset.
+
+    blocks -- list of (offset, t0, t1) tuples
+    """
+    buf = bytearray()
+    _putVarint(buf, len(blocks))
+    lastOffset = lastTime = 0
+    for boffset, t0, t1 in blocks:
+        _putVarint(buf, boffset - lastOffset)
+        _putVarint(buf, t0 - lastTime)
+        _putVarint(buf, t1 - t0)
+        lastOffset, lastTime = boffset, t0
+    return bytes(buf) + _trailer.pack(offset, _indexMagic)
+
+
+class _Block(object):
+
+    """ A decoded block header, with the undecoded changes. """
+
+    __slots__ = ('t0', 't1', 'snapshot', 'directory', 'data')
+
+    def __init__(self, data, kinds):
+        t0, pos = _getVarint(data, 0)
+        span, pos = _getVarint(data, pos)
+        self.t0, self.t1 = t0, t0 + span
+        snapshot = []
+        for kind in kinds:
+            val, prev, pos = _getValue(data, pos, kind, 0)
+            snapshot.append(val)
+        self.snapshot = snapshot
+        nchanged, pos = _getVarint(data, pos)
+        sizes = []
+        i = 0
+        for j in range(nchanged):
+            d, pos = _getVarint(data, pos)
+            size, pos = _getVarint(data, pos)
+            i += d
+            sizes.append((i, size))
+        directory = {}
+        for i, size in sizes:
+            directory[i] = (pos, pos + size)
+            pos += size
+        self.directory = directory
+        self.data = data
+
+    def changes(self, i, kind):
+        """ Return the value changes of signal i. """
+        if i not in self.directory:
+            return []
+        pos, end = self.directory[i]
+        data = self.data
+        val = self.snapshot[i]
+        prev = 0 if val is None or kind == _STR else val
+        t = self.t0
+        result = []
+        while pos < end:
+            dt, pos = _getVarint(data, pos)
+            t += dt
+            val, prev, pos = _getValue(data, pos, kind, prev)
+            result.append((t, val))
+        return result
+
+
+def _blockChanges(block, kinds, indices):
+    """ Return the changes of some signals in a block, in time order.
+
+    The changes are (time, signal number, value) tuples.
+    """
+    records = []
+    for i in indices:
+        for t, val in block.changes(i, kinds[i]):
+            records.append((t, i, val))
+    # stable, so the changes of a signal stay in order
+    records.sort(key=itemgetter(0))
+    return records
+
+
+class Waveform(object):
+
+    """ Reader of a waveform file written by traceSignals.
+
+    Signals are named by their hierarchical name, with the instance
+    names separated by dots, like 'top.inst.sig'. Values are integers,
+    strings for enums and other types, and None for high impedance.
+
+    """
+
+    # number of decoded blocks that are kept
+    _cachesize = 8
+
+    def __init__(self, filename):
+        self._file = f = open(filename, 'rb')
+        if f.read(len(_magic)) != _magic:
+            f.close()
+            raise ValueError("%s is not a waveform file" % filename)
+        size, hdrpos = _getVarint(f.read(10), 0)
+        f.seek(len(_magic) + hdrpos)
+        self._readHeader(f.read(size))
+        self._start = len(_magic) + hdrpos + size
+        self._cache = {}
+        if not self._readIndex():
+            self._scanBlocks()
+
+    @classmethod
+    def fromVcd(cls, vcdname, filename=None):
+        """ Return the reader of a waveform file that indexes a VCD file.
+
+        The VCD file can be compressed, with a .gz, .bz2 or .xz extension.
+        The waveform file is named after the VCD file, with the .mwf
+        extension appended, by default. An existing waveform file that is
+        newer than the VCD file is reused. Values with x or z bits are
+        read as None.
+        """
+        if filename is None:
+            filename = vcdname + ".mwf"
+        if not (os.path.exists(filename) and
+                os.path.getmtime(filename) >= os.path.getmtime(vcdname)):
+            tmpname = filename + ".tmp"
+            _indexVcd(vcdname, tmpname)
+            os.replace(tmpname, filename)
+        return cls(filename)
+
+    def _readHeader(self, data):
+        self.date, pos = _getString(data, 0)
+        self.version, pos = _getString(data, pos)
+        self.timescale, pos = _getString(data, pos)
+        n, pos = _getVarint(data, pos)
+        self._kinds, self._widths, self._codes = [], [], []
+        for i in range(n):
+            self._kinds.append(data[pos])
+            width, pos = _getVarint(data, pos + 1)
+            code, pos = _getString(data, pos)
+            self._widths.append(width)
+            self._codes.append(code)
+        n, pos = _getVarint(data, pos)
+        self._table = []
+        self.names = []
+        self._indices = {}
+        scopes = []
+        for i in range(n):
+            op = data[pos]
+            pos += 1
+            if op == _SCOPE:
+                name, pos = _getString(data, pos)
+                scopes.append(name)
+                self._table.append((op, name))
+            elif op == _UPSCOPE:
+                scopes.pop()
+                self._table.append((op,))
+            else:
+                vartype, pos = _getString(data, pos)
+                size, pos = _getVarint(data, pos)
+                index, pos = _getVarint(data, pos)
+                name, pos = _getString(data, pos)
+                self._table.append((op, vartype, size, index, name))
+                fullname = ".".join(scopes + [name])
+                if fullname not in self._indices:
+                    self.names.append(fullname)
+                self._indices[fullname] = index
+
+    def _readIndex(self):
+        f = self._file
+        f.seek(0, 2)
+        end = f.tell()
+        if end - self._start < _trailer.size:
+            return False
+        f.seek(end - _trailer.size)
+        offset, magic = _trailer.unpack(f.read(_trailer.size))
+        if magic != _indexMagic:
+            return False
+        f.seek(offset)
+        data = f.read(end - _trailer.size - offset)
+        n, pos = _getVarint(data, 0)
+        self._offsets, self._t0s, self._t1s = [], [], []
+        boffset = t0 = 0
+        for i in range(n):
+            d, pos = _getVarint(data, pos)
+            boffset += d
+            d, pos = _getVarint(data, pos)
+            t0 += d
+            span, pos = _getVarint(data, pos)
+            self._offsets.append(boffset)
+            self._t0s.append(t0)
+            self._t1s.append(t0 + span)
+        return True
+
+    def _scanBlocks(self):
+        f = self._file
+        f.seek(0, 2)
+        end = f.tell()
+        self._offsets, self._t0s, self._t1s = [], [], []
+        offset = self._start
+        while offset < end:
+            f.seek(offset)
+            head = f.read(30)
+            try:
+                size, pos = _getVarint(head, 0)
+                t0, p = _getVarint(head, pos)
+                span, p = _getVarint(head, p)
+            except IndexError:
+                break
+            if offset + pos + size > end:
+                # the last block is incomplete
+                break
+            self._offsets.append(offset)
+            self._t0s.append(t0)
+            self._t1s.append(t0 + span)
+            offset += pos + size
+
+    def _block(self, i):
+        block = self._cache.get(i)
+        if block is None:
+            f = self._file
+            f.seek(self._offsets[i])
+            size, pos = _getVarint(f.read(10), 0)
+            f.seek(self._offsets[i] + pos)
+            block = _Block(f.read(size), self._kinds)
+            if len(self._cache) >= self._cachesize:
+                self._cache.clear()
+            self._cache[i] = block
+        return block
+
+    def _index(self, name):
+        try:
+            return self._indices[name]
+        except KeyError:
+            raise ValueError("No signal %s in waveform" % name)
+
+    @property
+    def start(self):
+        """ Time of the first block. """
+        return self._t0s[0] if self._t0s else 0
+
+    @property
+    def end(self):
+        """ Last time in the waveform. """
+        return self._t1s[-1] if self._t1s else 0
+
+    def changes(self, name, start=0, stop=None):
+        """ Return the value changes of a signal, as (time, value) tuples.
+
+        start -- first time of the changes
+        stop -- time after the last change (default: end of the waveform)
+        """
+        i = self._index(name)
+        kind = self._kinds[i]
+        result = []
+        # blocks are cut at time steps, that can repeat the same time
+        for b in range(bisect_left(self._t1s, start), len(self._t0s)):
+            if stop is not None and self._t0s[b] >= stop:
+                break
+            for t, val in self._block(b).changes(i, kind):
+                if t >= start and (stop is None or t < stop):
+                    result.append((t, val))
+        return result
+
+    def value(self, name, t):
+        """ Return the value of a signal at time t. """
+        i = self._index(name)
+        if not self._t0s:
+            raise ValueError("Waveform has no values")
+        block = self._block(max(bisect_right(self._t0s, t) - 1, 0))
+        val = block.snapshot[i]
+        for ct, cval in block.changes(i, self._kinds[i]):
+            if ct > t:
+                break
+            val = cval
+        return val
+
+    def values(self, t):
+        """ Return a dict with the values of all signals at time t. """
+        return dict((name, self.value(name, t)) for name in self.names)
+
+    def arrays(self, name, start=0, stop=None):
+        """ Return the value changes of a signal as two NumPy arrays.
+
+        The times are 64 bit integers. The values are 64 bit integers if
+        they fit, and Python objects otherwise.
+        """
+        import numpy
+        changes = self.changes(name, start, stop)
+        times = numpy.array([t for t, val in changes], dtype=numpy.int64)
+        vals = [val for t, val in changes]
+        try:
+            values = numpy.array(vals, dtype=numpy.int64)
+        except (TypeError, ValueError, OverflowError):
+            values = numpy.empty(len(vals), dtype=object)
+            values[:] = vals
+        return times, values
+
+    def _vcdRecord(self, i, val):
+        kind, code = self._kinds[i], self._codes[i]
+        if kind == _BIT:
+            return "%s%s\n" % ('z' if val is None else val, code)
+        if kind == _VEC:
+            width = self._widths[i]
+            if val is None:
+                return "b%s %s\n" % ('z' * width, code)
+            return "b%s %s\n" % (format(val & ((1 << width) - 1),
+                                        '0%db' % width), code)
+        if kind == _HEX:
+            return "s%s %s\n" % ('z' if val is None else hex(val), code)
+        return "s%s %s\n" % (val, code)
+
+    def toVcd(self, filename):
+        """ Write the waveform to a VCD file. """
+        with open(filename, 'w') as f:
+            f.write("$date\n    %s\n$end\n" % self.date)
+            f.write("$version\n    %s\n$end\n" % self.version)
+            f.write("$timescale\n    %s\n$end\n\n" % self.timescale)
+            for op in self._table:
+                if op[0] == _SCOPE:
+                    f.write("$scope module %s $end\n" % op[1])
+                elif op[0] == _UPSCOPE:
+                    f.write("$upscope $end\n")
+                else:
+                    vartype, size, i, name = op[1:]
+                    f.write("$var %s %s %s %s $end\n" %
+                            (vartype, size, self._codes[i], name))
+            f.write("\n$enddefinitions $end\n$dumpvars\n")
+            if self._t0s:
+                for i, val in enumerate(self._block(0).snapshot):
+                    f.write(self._vcdRecord(i, val))
+            f.write("$end\n")
+            last = None
+            indices = range(len(self._kinds))
+            for b in range(len(self._t0s)):
+                records = _blockChanges(self._block(b), self._kinds, indices)
+                buf = []
+                for t, i, val in records:
+                    if t != last:
+                        buf.append("#%s\n" % t)
+                        last = t
+                    buf.append(self._vcdRecord(i, val))
+                f.write("".join(buf))
+                # don't keep all blocks in the cache
+                self._cache.clear()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _openText(filename):
+    """ Open a text file for reading, through a decompressor if any. """
+    if filename.endswith(".gz"):
+        import gzip
+        return gzip.open(filename, 'rt')
+    if filename.endswith(".bz2"):
+        import bz2
+        return bz2.open(filename, 'rt')
+    if filename.endswith(".xz"):
+        import lzma
+        return lzma.open(filename, 'rt')
+    return open(filename)
+
+
+def _vcdValue(kind, text):
+    if kind == _STR:
+        return text
+    try:
+        return int(text, 2)
+    except ValueError:
+        # x or z bits
+        return None
+
+
+def _readVcdHeader(lines):
+    """ Read the definitions of a VCD file from its lines.
+
+    Return the date, version and timescale, the signals and the hierarchy
+    table as for _encodeHeader, and the signal numbers of the VCD codes.
+    """
+    sections = {}
+    signals = []
+    table = []
+    numbers = {}
+    words = []
+    for line in lines:
+        words.extend(line.split())
+        while "$end" in words:
+            end = words.index("$end")
+            keyword, args = words[0], words[1:end]
+            words = words[end + 1:]
+            if keyword == "$enddefinitions":
+                return (sections.get("$date", ""),
+                        sections.get("$version", ""),
+                        sections.get("$timescale", ""),
+                        signals, table, numbers)
+            if keyword in ("$date", "$version"):
+                sections[keyword] = " ".join(args)
+            elif keyword == "$timescale":
+                sections[keyword] = "".join(args)
+            elif keyword == "$scope":
+                table.append((_SCOPE, args[-1]))
+            elif keyword == "$upscope":
+                table.append((_UPSCOPE,))
+            elif keyword == "$var":
+                # a bit range after the name is dropped
+                vartype, size, code, name = args[:4]
+                size = int(size)
+                n = numbers.get(code)
+                if n is None:
+                    n = numbers[code] = len(signals)
+                    if vartype in ("real", "realtime", "string"):
+                        signals.append((_STR, size, code))
+                    elif size == 1:
+                        signals.append((_BIT, 1, code))
+                    else:
+                        signals.append((_VEC, size, code))
+                table.append((_VAR, vartype, size, n, name))
+    raise ValueError("VCD file has no $enddefinitions")
+
+
+def _indexVcd(vcdname, filename, bufsize=None):
+    """ Convert a VCD file to a waveform file, as a stream. """
+    bufsize = bufsize or _bufsize
+    with _openText(vcdname) as f, open(filename, 'wb') as out:
+        date, version, timescale, signals, table, numbers = \
+            _readVcdHeader(f)
+        out.write(_magic)
+        out.write(_encodeHeader(date, version, timescale, signals, table))
+        kinds = [kind for kind, width, code in signals]
+        values = [None] * len(signals)
+        log = []
+        blocks = []
+        time = 0
+        started = comment = False
+        for line in f:
+            words = line.split()
+            i = 0
+            while i < len(words):
+                w = words[i]
+                i += 1
+                c = w[0]
+                if comment:
+                    comment = w != "$end"
+                    continue
+                if c == '#':
+                    t = int(w[1:])
+                    if len(log) >= bufsize:
+                        block, last = _encodeLog(time, log, kinds, values)
+                        blocks.append((out.tell(), time, last))
+                        out.write(block)
+                        del log[:]
+                        time = t
+                    else:
+                        log.append(t)
+                    started = True
+                    continue
+                if c == '$':
+                    comment = w == "$comment"
+                    continue
+                if c in "bBrRsS":
+                    text, code = w[1:], words[i]
+                    i += 1
+                else:
+                    text, code = c, w[1:]
+                n = numbers.get(code)
+                if n is None:
+                    continue
+                if started:
+                    log.append((n, _vcdValue(kinds[n], text)))
+                else:
+                    values[n] = _vcdValue(kinds[n], text)
+        if log or not blocks:
+            block, last = _encodeLog(time, log, kinds, values)
+            blocks.append((out.tell(), time, last))
+            out.write(block)
+        out.write(_encodeIndex(out.tell(), blocks))
+
+
+def _reader(arg):
+    """ Return a waveform reader for an argument, and whether to close it. """
+    if isinstance(arg, Waveform):
+        return arg, False
+    with open(arg, 'rb') as f:
+        magic = f.read(len(_magic))
+    if magic == _magic:
+        return Waveform(arg), True
+    return Waveform.fromVcd(arg), True
+
+
+def _changeStream(w, indices, side):
+    """ Yield the changes of some signals of a waveform, in time order.
+
+    The changes are (time, side, signal number, value) tuples.
+    """
+    for b in range(len(w._t0s)):
+        for t, i, val in _blockChanges(w._block(b), w._kinds, indices):
+            yield t, side, i, val
+
+
+def diffWaveforms(golden, new, names=None):
+    """ Return the first times at which the signals of two waveforms differ.
+
+    golden, new -- waveform files, VCD files, or Waveform objects. VCD
+                   files are indexed with Waveform.fromVcd.
+    names -- hierarchical names of the signals to compare (default: the
+             names that are in both waveforms)
+
+    Signals are compared at the end of each time step. The result is a
+    dict from the names of the signals that differ to the first time at
+    which they differ, in time order.
+    """
+    a, closeA = _reader(golden)
+    try:
+        b, closeB = _reader(new)
+        try:
+            return _diff(a, b, names)
+        finally:
+            if closeB:
+                b.close()
+    finally:
+        if closeA:
+            a.close()
+
+
+def _same(x, y, mask):
+    """ Return whether two values are the same.
+
+    The integers of vectors are compared on their bits, as a VCD file has
+    no sign. A string of a VCD file, such as a hex value, can be the same
+    as an integer of a waveform file.
+    """
+    if x == y:
+        return True
+    if isinstance(x, str) and isinstance(y, int):
+        x, y = y, x
+    if isinstance(x, int):
+        if isinstance(y, int):
+            return mask is not None and (x ^ y) & mask == 0
+        if isinstance(y, str):
+            try:
+                return x == int(y, 0)
+            except ValueError:
+                return False
+    return False
+
+
+def _diff(a, b, names):
+    if names is None:
+        names = [name for name in a.names if name in b._indices]
+    # a signal can have several names
+    positions = ({}, {})
+    values = ([], [])
+    masks = [None] * len(names)
+    for side, w in enumerate((a, b)):
+        snapshot = w._block(0).snapshot if w._t0s else None
+        for k, name in enumerate(names):
+            i = w._index(name)
+            positions[side].setdefault(i, []).append(k)
+            values[side].append(snapshot[i] if snapshot else None)
+            if w._kinds[i] in (_BIT, _VEC):
+                masks[k] = (1 << w._widths[i]) - 1
+    va, vb = values
+    result = {}
+    touched = set(range(len(names)))
+    now = 0
+    stream = heapq.merge(_changeStream(a, list(positions[0]), 0),
+                         _changeStream(b, list(positions[1]), 1),
+                         key=itemgetter(0))
+    # the end of the stream ends the last time step
+    for t, side, i, val in chain(stream, [(None, None, None, None)]):
+        if t != now:
+            for k in touched:
+                name = names[k]
+                if name not in result and not _same(va[k], vb[k], masks[k]):
+                    result[name] = now
+            if t is None or len(result) == len(names):
+                break
+            touched.clear()
+            now = t
+        vals = values[side]
+        for k in positions[side][i]:
+            vals[k] = val
+            touched.add(k)
+    return result
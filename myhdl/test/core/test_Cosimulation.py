@@ -19,15 +19,26 @@
 
 """ Run unit tests for Cosimulation """
 import gc
+import json
+import mmap
 import os
 import random
+import struct
 import sys
+import threading
 
 if sys.platform == "win32":
     import msvcrt
 
-from myhdl import Signal
-from myhdl._Cosimulation import Cosimulation, CosimulationError, _error
+import pytest
+
+from myhdl import (Signal, Simulation, StopSimulation, always, delay, instance,
+                   intbv, now)
+from myhdl import _Cosimulation
+from myhdl._Cosimulation import (Cosimulation, CosimulationError, _error,
+                                 _Channel, _ShmChannel, _shmRings, _servers,
+                                 _RESET,
+                                 cosimCompile)
 
 if __name__ != '__main__':
     from helpers import raises_kind
@@ -67,6 +78,61 @@ def wtrf():
     return wt, rf
 
 
+# binary protocol
+
+manySignames = ['signal_with_a_long_name_%d' % i for i in range(400)]
+manySizes = [1 + i % 300 for i in range(400)]
+wideSigs = {'wide': Signal(intbv(0)[200:]), 's': Signal(intbv(0, min=-8, max=8)),
+            'x': Signal(intbv(5)[8:]), 'z': Signal(None),
+            'xz': Signal(intbv(0)[40:])}
+wideNames = ['wide', 's', 'x', 'z', 'xz']
+wideSizes = [200, 4, 8, 8, 40]
+
+
+def send(wt, *parts):
+    msg = b"".join(parts)
+    os.write(wt, struct.pack('<I', len(msg)) + msg)
+
+
+def read(rf, n):
+    data = b""
+    while len(data) < n:
+        chunk = os.read(rf, n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def recv(rf):
+    header = read(rf, 4)
+    if header is None:
+        return None
+    return read(rf, struct.unpack('<I', header)[0])
+
+
+def sigs(names, sizes):
+    return b"".join(struct.pack('<IH', w, len(n)) + n.encode()
+                    for n, w in zip(names, sizes))
+
+
+def words(v, size):
+    return (v % (1 << size)).to_bytes((size + 31) // 32 * 4, 'little')
+
+
+def binaryStart(fromnames, fromsizes, tonames, tosizes, version=1):
+    wt, rf = wtrf()
+    assert int(os.environ['MYHDL_PROTOCOL']) >= version
+    os.write(wt, b"\0MYHDL\0" + bytes([version]))
+    send(wt, b"F", struct.pack('<Q', 0), sigs(fromnames, fromsizes))
+    assert recv(rf) == b"O"
+    send(wt, b"T", struct.pack('<Q', 0), sigs(tonames, tosizes))
+    assert recv(rf) == b"O"
+    send(wt, b"S")
+    assert recv(rf) == b"O"
+    return wt, rf
+
+
 class TestCosimulation:
 
     def setup_method(self, method):
@@ -256,5 +322,451 @@ class TestCosimulation:
             buf += " "
         os.write(wt, buf.encode())
 
+    def testBinarySignals(self):
+        many = dict((n, Signal(0)) for n in manySignames)
+        cosim = Cosimulation(exe + "cosimBinarySignals", **many)
+        assert cosim._channel is not None
+        assert cosim._fromSignames == manySignames[:200]
+        assert cosim._fromSizes == manySizes[:200]
+        assert cosim._toSignames == manySignames[200:]
+        assert cosim._toSizes == manySizes[200:]
+
+    @staticmethod
+    def cosimBinarySignals():
+        binaryStart(manySignames[:200], manySizes[:200],
+                    manySignames[200:], manySizes[200:])
+
+    def testBinaryFromSignalVals(self):
+        wideSigs['wide'].next = (1 << 199) | 0x1234
+        wideSigs['s'].next = -3
+        wideSigs['wide']._update()
+        wideSigs['s']._update()
+        cosim = Cosimulation(exe + "cosimBinaryFromSignalVals",
+                             **wideSigs)
+        cosim._getMode = 0
+        cosim._put(5)
+        cosim._hasChange = 1
+        cosim._put(7)
+        cosim._getMode = 0
+        cosim._put(9)
+        cosim._child.wait()
+        assert cosim._child.returncode == 0
+
+    @staticmethod
+    def cosimBinaryFromSignalVals():
+        wt, rf = binaryStart(wideNames[:2], wideSizes[:2], ['z'], [8])
+        assert recv(rf) == b"V" + struct.pack('<Q', 5)
+        assert recv(rf) == (b"V" + struct.pack('<Q', 7) +
+                            words((1 << 199) | 0x1234, 200) + words(-3, 4))
+        assert recv(rf) == b"V" + struct.pack('<Q', 9)
+
+    def testBinaryToSignalVals(self):
+        cosim = Cosimulation(exe + "cosimBinaryToSignalVals", **wideSigs)
+        cosim._get()
+        assert wideSigs['wide'].next == (1 << 150) + 3
+        assert wideSigs['s'].next == -2
+        cosim._put(0)
+        cosim._get()
+        assert wideSigs['x'].next == 5
+        assert wideSigs['z'].next is None
+        assert wideSigs['xz'].next == 0
+
+    @staticmethod
+    def cosimBinaryToSignalVals():
+        wt, rf = binaryStart([], [], wideNames, wideSizes)
+        send(wt, b"V", struct.pack('<Q', 0),
+             struct.pack('<I', 0), words((1 << 150) + 3, 200), words(0, 200),
+             struct.pack('<I', 1), words(0xE, 4), words(0, 4))
+        recv(rf)
+        send(wt, b"V", struct.pack('<Q', 0),
+             struct.pack('<I', 2), words(0xFF, 8), words(0xFF, 8),
+             struct.pack('<I', 3), words(0, 8), words(0xFF, 8),
+             struct.pack('<I', 4), words(0, 40), words(1 << 39, 40))
+
+    def testChanges(self, tmpdir):
+        log = str(tmpdir.join('log'))
+        sigs = dict(zip(fromSignames, [Signal(intbv(0)[w:]) for w in fromSizes]))
+        sigs['d'] = Signal(0)
+        expected = []
+
+        def stimulus():
+            for t in range(1, 20):
+                yield delay(1)
+                changes = []
+                for i, n in enumerate(fromSignames):
+                    if t % (i + 2) == 0:
+                        v = t * (i + 1) % (1 << fromSizes[i])
+                        if v != sigs[n].val:
+                            sigs[n].next = v
+                            changes.append([i, v])
+                if changes:
+                    expected.append([t, changes])
+            raise StopSimulation
+
+        cosim = Cosimulation(exe + "cosimChanges " + log, **sigs)
+        assert len(cosim._waiters()) == len(fromSignames)
+        Simulation(stimulus(), cosim).run(quiet=1)
+        assert cosim._child.returncode == 0
+        with open(log) as f:
+            log = json.load(f)
+        assert [[t, sorted(c)] for t, c in log] == expected
+
+    @staticmethod
+    def cosimChanges():
+        wt, rf = binaryStart(fromSignames, fromSizes, ['d'], [32], version=2)
+        time = 0
+        log = []
+        while 1:
+            try:
+                send(wt, b"V", struct.pack('<Q', time))
+            except BrokenPipeError:
+                break
+            msg = recv(rf)
+            if msg is None:
+                break
+            assert msg[:1] == b"V"
+            time, = struct.unpack_from('<Q', msg, 1)
+            changes = []
+            pos = 9
+            while pos < len(msg):
+                i, = struct.unpack_from('<I', msg, pos)
+                n = (fromSizes[i] + 31) // 32 * 4
+                changes.append([i, int.from_bytes(msg[pos + 4:pos + 4 + n],
+                                                  'little')])
+                pos += 4 + n
+            if changes:
+                log.append([time, changes])
+        with open(sys.argv[2], 'w') as f:
+            json.dump(log, f)
+
+    @pytest.mark.parametrize('transport', ['pipe', 'shm'])
+    def testPeer(self, transport, monkeypatch):
+        if transport == 'shm' and not hasattr(os, 'eventfd'):
+            pytest.skip("no eventfd")
+        din = Signal(intbv(0)[100:])
+        dout = Signal(intbv(0)[100:])
+
+        @instance
+        def stimulus():
+            for i in range(1, 50):
+                din.next = i << (i % 90)
+                yield delay(1)
+                assert dout == i << (i % 90)
+            raise StopSimulation
+
+        monkeypatch.setattr(Cosimulation, 'transport', transport)
+        cosim = Cosimulation([sys.executable, "-m", "myhdl._cosimPeer", "100"],
+                             din=din, dout=dout)
+        assert (cosim._mem is not None) == (transport == 'shm')
+        Simulation(stimulus, cosim).run(quiet=1)
+        assert cosim._child.returncode == 0
+
+    @pytest.mark.parametrize('mode', ['text', 'fallback', 'pipe', 'shm'])
+    def testPeerPipeline(self, mode, monkeypatch):
+        if mode == 'shm' and not hasattr(os, 'eventfd'):
+            pytest.skip("no eventfd")
+        din = Signal(intbv(0)[40:])
+        dout = Signal(intbv(0)[40:])
+        q = [Signal(intbv(0)[40:]) for i in range(3)]
+        log = []
+
+        @instance
+        def stimulus():
+            for i in range(1, 100):
+                din.next = i
+                yield delay(1)
+                assert dout == i
+                log.append([int(s) for s in q])
+            raise StopSimulation
+
+        exe = [sys.executable, "-m", "myhdl._cosimPeer", "40",
+               "--stages", "3", "--activity", "0.5"]
+        if mode == 'text':
+            monkeypatch.setattr(Cosimulation, 'protocol', 'text')
+        elif mode == 'fallback':
+            exe.append("--text")
+        elif mode == 'shm':
+            monkeypatch.setattr(Cosimulation, 'transport', 'shm')
+        cosim = Cosimulation(exe, din=din, dout=dout, q0=q[0], q1=q[1],
+                             q2=q[2])
+        Simulation(stimulus, cosim).run(quiet=1)
+        assert cosim._child.returncode == 0
+        for prev, cur in zip(log, log[1:]):
+            assert cur[1:] == prev[:-1]
+        # the activity factor
+        changes = sum(cur[0] != prev[0] for prev, cur in zip(log, log[1:]))
+        assert 20 < changes < 80
+
+    def pipelineRun(self, exe):
+        din = Signal(intbv(0)[8:])
+        dout = Signal(intbv(0)[8:])
+        q = [Signal(intbv(0)[8:]) for i in range(2)]
+        log = []
+
+        @instance
+        def stimulus():
+            for i in range(1, 20):
+                din.next = i
+                yield delay(1)
+                assert dout == i
+                log.append([int(s) for s in q])
+            raise StopSimulation
+
+        cosim = Cosimulation(exe, din=din, dout=dout, q0=q[0], q1=q[1])
+        Simulation(stimulus, cosim).run(quiet=1)
+        return cosim._child, log
+
+    @pytest.mark.parametrize('transport', ['pipe', 'shm'])
+    def testPersistent(self, transport, monkeypatch):
+        if transport == 'shm' and not hasattr(os, 'eventfd'):
+            pytest.skip("no eventfd")
+        monkeypatch.setattr(Cosimulation, 'persistent', True)
+        monkeypatch.setattr(Cosimulation, 'transport', transport)
+        exe = [sys.executable, "-m", "myhdl._cosimPeer", "8", "--stages", "2"]
+        try:
+            child, log = self.pipelineRun(exe)
+            assert child.returncode is None
+            # the reset simulator starts again from time 0
+            for i in range(2):
+                assert self.pipelineRun(exe) == (child, log)
+            assert len(_servers[(tuple(exe), 'binary', transport)]) == 1
+        finally:
+            Cosimulation.shutdown()
+        assert child.returncode == 0
+        assert not _servers
+
+    def testPersistentNoRestart(self, monkeypatch):
+        monkeypatch.setattr(Cosimulation, 'persistent', True)
+        exe = [sys.executable, "-m", "myhdl._cosimPeer", "8", "--stages", "2",
+               "--no-restart"]
+        sends = []
+        send = _Channel.send
+        monkeypatch.setattr(_Channel, 'send',
+                            lambda self, msg: sends.append(msg[:1]) or
+                            send(self, msg))
+        child, log = self.pipelineRun(exe)
+        # a simulator without the restart flag gets no RESET, and ends
+        assert child.returncode == 0
+        assert _RESET not in sends
+        assert not _servers
+
+    def testPersistentText(self, monkeypatch):
+        monkeypatch.setattr(Cosimulation, 'persistent', True)
+        exe = [sys.executable, "-m", "myhdl._cosimPeer", "8", "--stages", "2",
+               "--text"]
+        child, log = self.pipelineRun(exe)
+        assert child.returncode == 0
+        assert self.pipelineRun(exe)[0] is not child
+        assert not _servers
+
+    def testCosimCompile(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(cosimCompile, 'directory', str(tmpdir.join("cache")))
+        src = tmpdir.join("design.v")
+        out = str(tmpdir.join("design.o"))
+        count = tmpdir.join("count")
+        count.write("")
+        # a compiler that counts its runs
+        cmd = [sys.executable, "-c",
+               "import sys, shutil; open(sys.argv[3], 'a').write('x'); "
+               "shutil.copy(sys.argv[1], sys.argv[2])",
+               str(src), out, str(count)]
+        src.write("module a;")
+        assert cosimCompile(cmd, out, [str(src)]) == out
+        os.remove(out)
+        assert cosimCompile(cmd, out, [str(src)]) == out
+        assert open(out).read() == "module a;"
+        assert count.read() == "x"
+        src.write("module b;")
+        cosimCompile(cmd, out, [str(src)])
+        assert open(out).read() == "module b;"
+        assert count.read() == "xx"
+        with raises_kind(CosimulationError, _error.Compile):
+            cosimCompile([sys.executable, "-c", "1/0"], out, [str(src)])
+
+    def batchRun(self, window, monkeypatch, reader=None):
+        monkeypatch.setattr(Cosimulation, 'window', window)
+        din = Signal(intbv(0)[8:])
+        dout = Signal(intbv(0)[8:])
+        q = [Signal(intbv(0)[8:]) for i in range(2)]
+        log = []
+
+        @instance
+        def stimulus():
+            for i in range(1, 100):
+                din.next = i
+                yield delay(1)
+            cosim.sync()
+            yield delay(0)
+            raise StopSimulation
+
+        @always(q[1])
+        def monitor():
+            log.append((now(), int(q[1])))
+
+        @always(delay(1))
+        def sampler():
+            log.append((now(), int(q[1])))
+
+        low = q[1](4, 0)
+
+        @always(delay(1))
+        def shadowSampler():
+            log.append((now(), int(low)))
+
+        def value():
+            return int(q[1])
+
+        @always(delay(1))
+        def helperSampler():
+            log.append((now(), value()))
+
+        cosim = Cosimulation([sys.executable, "-m", "myhdl._cosimPeer", "8",
+                              "--stages", "2", "--activity", "0.3"],
+                             din=din, dout=dout, q0=q[0], q1=q[1])
+        # the window is taken at construction
+        monkeypatch.setattr(Cosimulation, 'window', 0)
+        sends = []
+        send = cosim._channel.send
+        cosim._channel.send = lambda msg: sends.append(msg) or send(msg)
+        close = cosim._close
+
+        def _close():
+            close()
+            # the last values, before the simulation clears the signals
+            log.append([int(dout.next)] + [int(s.next) for s in q])
+
+        cosim._close = _close
+        insts = {'event': [monitor], 'sampled': [sampler],
+                 'shadow': [shadowSampler],
+                 'helper': [helperSampler]}.get(reader, [])
+        sim = Simulation(cosim, stimulus, insts)
+        if reader == 'capture':
+            capture = sim.capture([q[1]])
+        sim.run(quiet=1)
+        if reader == 'capture':
+            log.append(capture.changes(q[1]))
+        assert cosim._child.returncode == 0
+        return log, len(sends)
+
+    def testBatch(self, monkeypatch):
+        log, lockstep = self.batchRun(0, monkeypatch)
+        assert log[-1][0] == 99
+        for window in (1, 10, 1000):
+            batched, sends = self.batchRun(window, monkeypatch)
+            assert batched == log
+            assert sends <= lockstep // window + 2
+
+    @pytest.mark.parametrize('reader', ['event', 'sampled', 'shadow',
+                                        'helper', 'capture'])
+    def testBatchReader(self, reader, monkeypatch):
+        log, lockstep = self.batchRun(0, monkeypatch, reader)
+        assert len(log[-1] if reader == 'capture' else log) > 20
+        # the time steps are synchronized, as the HDL signals are read
+        assert self.batchRun(10, monkeypatch, reader) == (log, lockstep)
+
+    def testRing(self, monkeypatch):
+        if not hasattr(os, 'eventfd'):
+            pytest.skip("no eventfd")
+        # messages wrap around and don't fit in the ring
+        monkeypatch.setattr(_Cosimulation, '_ringsize', 100)
+        mem = mmap.mmap(-1, 2 * (_Cosimulation._ringheader + 100))
+        r, w = os.pipe()
+        efds = (os.eventfd(0), os.eventfd(0))
+        channel = _ShmChannel(r, w, *_shmRings(mem, efds, r))
+        peer = _ShmChannel(r, w, *_shmRings(mem, efds, r, peer=True))
+        msgs = [bytes(random.randrange(256) for j in range(i * 7 % 300))
+                for i in range(200)]
+
+        def send():
+            for msg in msgs:
+                peer.send(msg)
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        try:
+            for msg in msgs:
+                assert channel.recv() == msg
+        finally:
+            thread.join()
+            for fd in (r, w) + efds:
+                os.close(fd)
+
+    def testRingStress(self, monkeypatch):
+        if not hasattr(os, 'eventfd') or not hasattr(os, 'fork'):
+            pytest.skip("no eventfd or fork")
+        # the sides run in two processes. The data wraps around at all
+        # offsets of a ring of a prime size, and the counts cross 32 bits.
+        size = 61
+        monkeypatch.setattr(_Cosimulation, '_ringsize', size)
+        ring = _Cosimulation._ringheader + size
+        mem = mmap.mmap(-1, 2 * ring)
+        start = (1 << 32) - 1000
+        for offset in (0, 64, ring, ring + 64):
+            struct.pack_into('<Q', mem, offset, start)
+        r, w = os.pipe()
+        efds = (os.eventfd(0), os.eventfd(0))
+        rand = random.Random(2)
+        msgs = [bytes(rand.randrange(256) for j in range(rand.randrange(150)))
+                for i in range(2000)]
+        pid = os.fork()
+        if pid == 0:
+            try:
+                peer = _ShmChannel(r, w, *_shmRings(mem, efds, r, peer=True))
+                for msg in msgs:
+                    peer.send(msg)
+            finally:
+                os._exit(0)
+        try:
+            channel = _ShmChannel(r, w, *_shmRings(mem, efds, r))
+            for msg in msgs:
+                assert channel.recv() == msg
+            channel.close()
+        finally:
+            os.waitpid(pid, 0)
+            for fd in (r, w) + efds:
+                os.close(fd)
+        counts = [struct.unpack_from('<Q', mem, offset)[0]
+                  for offset in (0, 64, ring, ring + 64)]
+        total = sum(len(msg) + 4 for msg in msgs)
+        assert sorted(counts) == [start, start, start + total, start + total]
+        mem.close()
+
+    def testTransport(self, monkeypatch):
+        monkeypatch.setattr(Cosimulation, 'transport', 'tcp')
+        with raises_kind(CosimulationError, _error.Transport):
+            Cosimulation(exe + "cosimFromSignals", **allSigs)
+
+    def testShmFallback(self, monkeypatch):
+        if not hasattr(os, 'eventfd'):
+            pytest.skip("no eventfd")
+        monkeypatch.setattr(Cosimulation, 'transport', 'shm')
+        many = dict((n, Signal(0)) for n in manySignames)
+        cosim = Cosimulation(exe + "cosimBinarySignals", **many)
+        assert cosim._channel.__class__.__name__ == '_Channel'
+        cosim._close()
+
+    def testProtocolVersion(self):
+        with raises_kind(CosimulationError, _error.Protocol):
+            Cosimulation(exe + "cosimProtocolVersion", **allSigs)
+
+    @staticmethod
+    def cosimProtocolVersion():
+        wt, rf = wtrf()
+        os.write(wt, b"\0MYHDL\0\x63")
+
+    def testTextProtocol(self, monkeypatch):
+        monkeypatch.setattr(Cosimulation, 'protocol', 'text')
+        cosim = Cosimulation(exe + "cosimTextProtocol", **allSigs)
+        assert cosim._channel is None
+        assert cosim._toSignames == ['a']
+        monkeypatch.setattr(Cosimulation, 'protocol', 'hex')
+        with raises_kind(CosimulationError, _error.Protocol):
+            Cosimulation(exe + "cosimTextProtocol", **allSigs)
+
+    @staticmethod
+    def cosimTextProtocol():
+        assert 'MYHDL_PROTOCOL' not in os.environ
+        TestCosimulation.cosimFromSignals()
+
 if __name__ == "__main__":
     getattr(TestCosimulation, sys.argv[1])()
@@ -0,0 +1,278 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for CycleSimulation """
+import pytest
+
+from myhdl import (CycleSimulation, ResetSignal, Signal, Simulation,
+                   SimulationError, StopSimulation, always_comb, always_seq,
+                   block, delay, instance, intbv, now, traceSignals)
+from myhdl._CycleSimulation import _error
+from helpers import raises_kind
+
+
+QUIET = 1
+
+
+@block
+def lfsr(dout, clock, reset):
+    """ 16 bit LFSR with an asynchronous reset """
+
+    @always_seq(clock.posedge, reset=reset)
+    def logic():
+        fb = dout[15] ^ dout[13] ^ dout[12] ^ dout[10]
+        dout.next = (dout[15:] << 1) | fb
+
+    return logic
+
+
+@block
+def adder(dout, a, b):
+
+    @always_comb
+    def logic():
+        dout.next = (a + b) % 2**16
+
+    return logic
+
+
+@block
+def datapath(acc, parity, din, clock, reset, srst):
+    """ combinatorial chain and an accumulator with a synchronous reset """
+    stages = [Signal(intbv(0)[16:]) for i in range(4)]
+    low = din(8, 0)
+
+    # instantiated out of order on purpose
+    adders = [adder(stages[3], stages[2], stages[1]),
+              adder(stages[1], stages[0], low),
+              adder(stages[2], stages[1], stages[0]),
+              adder(stages[0], din, low)]
+
+    @always_comb
+    def par():
+        parity.next = bin(stages[3]).count('1') % 2
+
+    @always_seq(clock.posedge, reset=srst)
+    def accumulate():
+        acc.next = (acc + stages[3]) % 2**20
+
+    return adders, par, accumulate
+
+
+@block
+def resetgen(reset, srst, clock):
+    """ drive both resets from the design itself """
+    count = Signal(intbv(0)[8:])
+
+    @always_seq(clock.posedge, reset=None)
+    def logic():
+        count.next = (count + 1) % 256
+        reset.next = count in (2, 3) or count == 40
+        srst.next = count == 20
+
+    return logic
+
+
+class Design(object):
+
+    def __init__(self):
+        self.clock = Signal(bool(0))
+        self.reset = ResetSignal(0, active=1, isasync=True)
+        self.srst = ResetSignal(0, active=1, isasync=False)
+        self.din = Signal(intbv(1)[16:])
+        self.acc = Signal(intbv(0)[20:])
+        self.parity = Signal(bool(0))
+
+    def top(self):
+        return (lfsr(self.din, self.clock, self.reset),
+                datapath(self.acc, self.parity, self.din, self.clock,
+                         self.reset, self.srst),
+                resetgen(self.reset, self.srst, self.clock))
+
+    def sample(self):
+        return int(self.din), int(self.acc), int(self.parity), \
+            int(self.reset), int(self.srst)
+
+
+def eventTrace(cycles):
+    d = Design()
+    trace = []
+
+    @instance
+    def clkgen():
+        while 1:
+            yield delay(5)
+            d.clock.next = not d.clock
+
+    @instance
+    def monitor():
+        for i in range(cycles):
+            yield d.clock.negedge
+            trace.append(d.sample())
+        raise StopSimulation
+
+    sim = Simulation(d.top(), clkgen, monitor)
+    sim.run(quiet=QUIET)
+    return trace
+
+
+def cycleTrace(cycles):
+    d = Design()
+    trace = []
+    sim = CycleSimulation(d.top(), clock=d.clock)
+    for i in range(cycles):
+        sim.run(1, quiet=QUIET)
+        trace.append(d.sample())
+    sim.quit()
+    return trace
+
+
+class TestCycleSimulation:
+
+    def testSameValues(self):
+        trace = cycleTrace(60)
+        assert trace == eventTrace(60)
+        # the design must actually do something
+        assert len(set(trace)) > 30
+
+    def testInputs(self):
+        clock = Signal(bool(0))
+        din = Signal(intbv(0)[8:])
+        dout = Signal(intbv(0)[8:])
+        q = Signal(intbv(0)[8:])
+
+        @always_comb
+        def comb():
+            dout.next = (din + 1) % 256
+
+        @always_seq(clock.posedge, reset=None)
+        def reg():
+            q.next = dout
+
+        sim = CycleSimulation(comb, reg, clock=clock)
+        sim.run(1, quiet=QUIET)
+        assert dout == 1 and q == 1
+        din.next = 5
+        sim.run(1, quiet=QUIET)
+        assert dout == 6 and q == 6
+        assert now() == 4
+        sim.quit()
+
+    def testTrace(self, tmpdir):
+        clock = Signal(bool(0))
+        q = Signal(bool(0))
+
+        @block
+        def toggle(q, clock):
+
+            @always_seq(clock.posedge, reset=None)
+            def logic():
+                q.next = not q
+
+            return logic
+
+        traceSignals.directory = str(tmpdir)
+        try:
+            inst = traceSignals(toggle(q, clock))
+        finally:
+            traceSignals.directory = None
+        sim = CycleSimulation(inst, clock=clock)
+        sim.run(3, quiet=QUIET)
+        sim.quit()
+        # the time steps of the value changes of the clock and of q
+        codes = {}
+        changes = {'clock': [], 'q': []}
+        t = None
+        with open(str(tmpdir.join('toggle.vcd'))) as f:
+            for line in f:
+                if line.startswith('$var'):
+                    code, name = line.split()[3:5]
+                    codes[code] = changes[name]
+                elif line.startswith('#'):
+                    t = int(line[1:])
+                elif t is not None and line[1:-1] in codes:
+                    codes[line[1:-1]].append((t, int(line[0])))
+        # each edge of the clock takes a time step
+        assert changes['clock'] == [(2, 1), (3, 0), (4, 1), (5, 0), (6, 1)]
+        assert changes['q'] == [(2, 1), (4, 0), (6, 1)]
+
+    def testStop(self):
+        clock = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        log = []
+
+        @always_seq(clock.negedge, reset=None)
+        def logic():
+            log.append(int(count))
+            if count == 9:
+                raise StopSimulation
+            count.next = count + 1
+
+        sim = CycleSimulation(logic, clock=clock)
+        assert sim.run(quiet=QUIET) == 0
+        assert log == list(range(10))
+        with pytest.raises(StopSimulation):
+            sim.run(quiet=QUIET)
+
+    def testNotSynchronous(self):
+        clock = Signal(bool(0))
+
+        @instance
+        def gen():
+            yield delay(10)
+
+        with raises_kind(SimulationError, _error.NotSynchronous):
+            CycleSimulation(gen, clock=clock)
+
+    def testOtherClock(self):
+        clock, other = Signal(bool(0)), Signal(bool(0))
+        q = Signal(bool(0))
+
+        @always_seq(other.posedge, reset=None)
+        def logic():
+            q.next = not q
+
+        with raises_kind(SimulationError, _error.NotSynchronous):
+            CycleSimulation(logic, clock=clock)
+
+    def testMixedEdges(self):
+        clock = Signal(bool(0))
+        a, b = Signal(bool(0)), Signal(bool(0))
+
+        @always_seq(clock.posedge, reset=None)
+        def rise():
+            a.next = b
+
+        @always_seq(clock.negedge, reset=None)
+        def fall():
+            b.next = a
+
+        with raises_kind(SimulationError, _error.MixedEdges):
+            CycleSimulation(rise, fall, clock=clock)
+
+    def testCombClock(self):
+        clock = Signal(bool(0))
+        q = Signal(bool(0))
+
+        @always_comb
+        def logic():
+            q.next = not clock
+
+        with raises_kind(SimulationError, _error.CombClock):
+            CycleSimulation(logic, clock=clock)
@@ -0,0 +1,195 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the unit tests for the future event queue """
+import random
+from random import randrange
+
+import pytest
+
+from myhdl import Signal, Simulation, delay, now
+from myhdl._EventQueue import _EventQueue, _TimingWheel, _schedulers
+
+random.seed(1)  # random, but deterministic
+
+
+QUIET=1
+
+
+def smallWheel():
+    return _TimingWheel(size=16)
+
+
+queueTypes = [_EventQueue, _TimingWheel, smallWheel]
+
+
+@pytest.mark.parametrize('Queue', queueTypes)
+class TestEventQueue:
+
+    def testEmpty(self, Queue):
+        q = Queue()
+        assert not q
+        assert len(q) == 0
+        assert q.pop(0) == []
+
+    def testOrder(self, Queue):
+        q = Queue()
+        events = [(randrange(40), i) for i in range(200)]
+        for t, e in events:
+            q.push(t, e)
+        assert len(q) == len(events)
+        result = []
+        while q:
+            t = q.nextTime()
+            for e in q.pop(t):
+                result.append((t, e))
+        # stable sort keeps insertion order for equal times
+        assert result == sorted(events, key=lambda ev: ev[0])
+
+    def testInterleaved(self, Queue):
+        """ push relative to the current time while popping """
+        q = Queue()
+        pushed = {}
+        popped = {}
+        now = 0
+        n = 0
+        for i in range(20):
+            t = randrange(5)
+            q.push(t, n)
+            pushed[n] = t
+            n += 1
+        while q:
+            t = q.nextTime()
+            assert t >= now
+            now = t
+            for e in q.pop(now):
+                popped[e] = now
+                if now < 1000:
+                    t = now + randrange(0, 50, 7)
+                    q.push(t, n)
+                    pushed[n] = t
+                    n += 1
+        assert popped == pushed
+
+    def testPopBatch(self, Queue):
+        q = Queue()
+        q.push(10, 'a')
+        q.push(5, 'b')
+        q.push(10, 'c')
+        q.push(5, 'd')
+        assert q.nextTime() == 5
+        assert q.pop(5) == ['b', 'd']
+        assert q.nextTime() == 10
+        assert q.pop(10) == ['a', 'c']
+        assert not q
+
+    def testClear(self, Queue):
+        q = Queue()
+        for i in range(10):
+            q.push(i, i)
+        q.clear()
+        assert not q
+
+
+def testWheelSize():
+    with pytest.raises(ValueError):
+        _TimingWheel(size=100)
+
+
+def testWheelOverflowOrder():
+    """ far events for a time come before near events pushed later """
+    q = _TimingWheel(size=8)
+    q.push(10, 'far')
+    q.push(3, 'a')
+    assert q.nextTime() == 3
+    assert q.pop(3) == ['a']
+    q.push(10, 'near')
+    assert q.nextTime() == 10
+    assert q.pop(10) == ['far', 'near']
+    assert not q
+
+
+@pytest.mark.parametrize('scheduler', sorted(_schedulers))
+class TestScheduling:
+
+    def testManyDelays(self, scheduler):
+        """ waiters with many distinct delays wake up at the right time """
+        N = 200
+        periods = [randrange(1, 50) for i in range(N)]
+        log = []
+
+        def gen(i, period):
+            for k in range(5):
+                yield delay(period)
+                log.append((now(), i))
+
+        sim = Simulation([gen(i, p) for i, p in enumerate(periods)],
+                         scheduler=scheduler)
+        sim.run(quiet=QUIET)
+        expected = sorted(((k + 1) * p, i)
+                          for i, p in enumerate(periods) for k in range(5))
+        assert sorted(log) == expected
+        # events at equal times are handled in scheduling order
+        times = [t for t, i in log]
+        assert times == sorted(times)
+
+    def testFarDelays(self, scheduler):
+        log = []
+
+        def gen(period):
+            for k in range(3):
+                yield delay(period)
+                log.append((now(), period))
+
+        periods = (1, 1500, 5000, 1024, 1023)
+        sim = Simulation([gen(p) for p in periods], scheduler=scheduler)
+        sim.run(quiet=QUIET)
+        expected = sorted(((k + 1) * p, p) for p in periods for k in range(3))
+        assert log == expected
+
+    def testRunDuration(self, scheduler):
+        def clkgen(clk):
+            while 1:
+                yield delay(10)
+                clk.next = not clk
+
+        clk = Signal(bool(0))
+        sim = Simulation(clkgen(clk), scheduler=scheduler)
+        sim.run(2000, quiet=QUIET)
+        assert now() == 2000
+        sim.run(35, quiet=QUIET)
+        assert now() == 2035
+        sim.quit()
+
+    def testDelayedSignal(self, scheduler):
+        s = Signal(0, delay=3)
+        log = []
+
+        def stimulus():
+            for i in range(1, 6):
+                s.next = i
+                yield delay(5)
+
+        def monitor():
+            while 1:
+                yield s
+                log.append((now(), int(s)))
+
+        Simulation(stimulus(), monitor(), scheduler=scheduler).run(quiet=QUIET)
+        assert log == [(5 * (i - 1) + 3, i) for i in range(1, 6)]
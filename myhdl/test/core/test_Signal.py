@@ -205,7 +205,7 @@ class TestSig:
         assert s1._negedgeWaiters == self.negedgeWaiters
 
     def testNextAccess(self):
-        """ each next attribute access puts a sig in a global siglist """
+        """ next attribute access puts a sig in a global siglist once """
         del _siglist[:]
         s = [None] * 4
         for i in range(len(s)):
@@ -216,8 +216,12 @@ class TestSig:
         s[3].next = 0
         s[3].next = 1
         s[3].next = 3
+        assert _siglist.count(s[0]) == 0
+        for i in range(1, len(s)):
+            assert _siglist.count(s[i]) == 1
         for i in range(len(s)):
-            assert _siglist.count(s[i]) == i
+            s[i]._clear()
+        del _siglist[:]
 
 
 class TestSignalAsNum:
@@ -24,6 +24,7 @@ from unittest import TestCase
 
 from myhdl import (Signal, Simulation, SimulationError, StopSimulation, delay,
                    intbv, join, now)
+from myhdl import _simulator
 from myhdl._Simulation import _error
 from helpers import raises_kind
 
@@ -51,6 +52,12 @@ class SimArgs(TestCase):
         with raises_kind(SimulationError, _error.DuplicatedArg):
             Simulation(i, i)
 
+    def test3(self):
+        def g():
+            yield delay(10)
+        with raises_kind(SimulationError, _error.Scheduler):
+            Simulation(g(), scheduler='calendar')
+
 
 class YieldNone(TestCase):
     """ Basic test of yield None behavior """
@@ -264,6 +271,35 @@ class JoinedGen(TestCase):
         Simulation(self.bench()).run(quiet=QUIET)
 
 
+class SignalUpdateOnce(TestCase):
+
+    """ Check that a signal is updated once per delta cycle """
+
+    def bench(self, log):
+
+        a = Signal(intbv(0)[8:])
+
+        def writer(v):
+            yield delay(10)
+            a.next = v
+            yield delay(10)
+            a.next[7] = 1
+
+        def monitor():
+            while 1:
+                yield a
+                log.append((now(), int(a)))
+
+        return [writer(v) for v in range(3, 8)], monitor()
+
+    def testSignalUpdateOnce(self):
+        log = []
+        Simulation(self.bench(log)).run(quiet=QUIET)
+        # last writer wins, a new delta cycle enqueues the signal again
+        assert log == [(10, 7), (20, 135)]
+        assert _simulator._nrDupUpdates == 8
+
+
 class SignalUpdateFirst(TestCase):
 
     """ Check that signal updates are done first, as in VHDL """
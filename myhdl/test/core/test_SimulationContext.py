@@ -0,0 +1,177 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for SimulationContext """
+import threading
+
+from myhdl import (CycleSimulation, ResetSignal, Signal, Simulation,
+                   SimulationContext, SimulationError, StopSimulation,
+                   always, always_seq, delay, instance, intbv, now)
+from myhdl import _simulator
+from myhdl._Simulation import _error
+from helpers import raises_kind
+
+
+QUIET = 1
+
+
+def counter(step, log):
+    """ count by step on a clock, and log the time of each count """
+    clock = Signal(bool(0))
+    count = Signal(intbv(0)[16:])
+
+    @always(delay(5))
+    def clkgen():
+        clock.next = not clock
+
+    @always(clock.posedge)
+    def logic():
+        count.next = (count + step) % 2**16
+
+    @instance
+    def monitor():
+        while 1:
+            yield count
+            log.append((now(), int(count)))
+
+    return clkgen, logic, monitor
+
+
+def reference(step, duration):
+    log = []
+    sim = Simulation(counter(step, log))
+    sim.run(duration, quiet=QUIET)
+    sim.quit()
+    return log
+
+
+class TestSimulationContext:
+
+    def testInterleaved(self):
+        logs = [[], []]
+        sims = []
+        t = now()
+        for step, log in zip((1, 3), logs):
+            with SimulationContext() as context:
+                sims.append((Simulation(counter(step, log)), context))
+        for i in range(10):
+            for sim, context in sims:
+                sim.run(10, quiet=QUIET)
+                assert context.now() == 10 * (i + 1)
+        # the default context is not affected
+        assert now() == t
+        for sim, context in sims:
+            sim.quit()
+        assert logs[0] == reference(1, 100)
+        assert logs[1] == reference(3, 100)
+
+    def testThreads(self):
+        steps = list(range(1, 9))
+        logs = [[] for step in steps]
+
+        def worker(step, log):
+            with SimulationContext():
+                sim = Simulation(counter(step, log))
+            sim.run(1000, quiet=QUIET)
+            sim.quit()
+
+        threads = [threading.Thread(target=worker, args=(step, log))
+                   for step, log in zip(steps, logs)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for step, log in zip(steps, logs):
+            assert log == reference(step, 1000)
+
+    def testCycleSimulation(self):
+        t = now()
+        with SimulationContext() as context:
+            clock = Signal(bool(0))
+            reset = ResetSignal(0, active=1, isasync=False)
+            count = Signal(intbv(0)[8:])
+
+            @always_seq(clock.posedge, reset=reset)
+            def logic():
+                count.next = (count + 1) % 256
+
+            sim = CycleSimulation(logic, clock=clock)
+        sim.run(5, quiet=QUIET)
+        assert count == 5
+        assert context.now() == 10
+        assert now() == t
+        sim.quit()
+
+    def testSignalBinding(self):
+        with SimulationContext() as context:
+            s = Signal(bool(0))
+        assert any(x is s for x in context._signals)
+        assert not any(x is s for x in _simulator._signals)
+        s.next = 1
+        assert len(context._siglist) == 1 and context._siglist[0] is s
+        assert not any(x is s for x in _simulator._siglist)
+        del context._siglist[:]
+
+    def testMultipleSim(self):
+        with SimulationContext():
+            sim = Simulation(counter(1, []))
+            with raises_kind(SimulationError, _error.MultipleSim):
+                Simulation(counter(1, []))
+        # another context can run a simulation
+        other = Simulation(counter(1, []))
+        other.quit()
+        sim.quit()
+
+    def testStop(self):
+        with SimulationContext():
+            @instance
+            def stop():
+                yield delay(10)
+                raise StopSimulation
+
+            sim = Simulation(stop)
+        assert sim.run(quiet=QUIET) == 0
+        assert _simulator._context() is _simulator
+
+    def testOtherContext(self):
+        # a clock of the default context, driven and read in another one
+        clock = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        with SimulationContext():
+            @always(delay(5))
+            def clkgen():
+                clock.next = not clock
+
+            @always(clock.posedge)
+            def logic():
+                count.next = count + 1
+
+            with raises_kind(SimulationError, _error.OtherContext):
+                Simulation(clkgen, logic)
+            with raises_kind(SimulationError, _error.OtherContext):
+                Simulation(logic)
+            with raises_kind(SimulationError, _error.OtherContext):
+                CycleSimulation(clock=clock)
+            # the context can still run a simulation
+            Simulation().quit()
+        with SimulationContext():
+            # a shadow signal of a signal of the default context
+            count(0)
+            with raises_kind(SimulationError, _error.OtherContext):
+                Simulation()
@@ -24,7 +24,8 @@ from myhdl import (AlwaysError, Signal, Simulation, StopSimulation, delay,
                    instances, intbv, now)
 from myhdl._always import _error, always
 from myhdl._Waiter import (_DelayWaiter, _EdgeTupleWaiter, _EdgeWaiter,
-                           _SignalTupleWaiter, _SignalWaiter, _Waiter)
+                           _SignalTupleWaiter, _SignalWaiter, _StaticWaiter,
+                           _Waiter)
 from helpers import raises_kind
 
 # random.seed(3) # random, but deterministic
@@ -177,3 +178,93 @@ class TestInferWaiter:
     def testGeneral(self):
         sim = Simulation(self.bench(GeneralFunc, _Waiter))
         sim.run()
+
+
+class TestStaticWaiter:
+
+    def bench(self, MyHDLFunc, static):
+
+        a, b, c, d, r, s = [Signal(intbv(0)) for i in range(6)]
+
+        inst_r = MyHDLFunc(a, b, c, d, r)
+        if static:
+            assert type(inst_r.staticWaiter) == _StaticWaiter
+        inst_s = MyHDLFunc(a, b, c, d, s)
+        nrCalls = [0]
+
+        def stimulus():
+            for i in range(1000):
+                yield delay(randrange(1, 10))
+                if randrange(2):
+                    a.next = randrange(32)
+                if randrange(2):
+                    b.next = randrange(32)
+                c.next = randrange(2)
+                d.next = randrange(2)
+            raise StopSimulation
+
+        def check():
+            while 1:
+                yield r, s
+                nrCalls[0] += 1
+                assert r == s
+
+        sim = Simulation(inst_r, _Waiter(inst_s.gen), _Waiter(stimulus()),
+                         _Waiter(check()), static=static)
+        return sim, nrCalls
+
+    def testDelay(self):
+        a = Signal(0)
+        inst = DelayFunc(a, a, a, a, a)
+        assert inst.staticWaiter is None
+
+    def testSignal1(self):
+        sim, nrCalls = self.bench(SignalFunc1, True)
+        sim.run(quiet=QUIET)
+        assert nrCalls[0] > 0
+
+    def testSignalTuple1(self):
+        sim, nrCalls = self.bench(SignalTupleFunc1, True)
+        sim.run(quiet=QUIET)
+        assert nrCalls[0] > 0
+
+    def testEdge1(self):
+        sim, nrCalls = self.bench(EdgeFunc1, True)
+        sim.run(quiet=QUIET)
+        assert nrCalls[0] > 0
+
+    def testEdgeTuple1(self):
+        sim, nrCalls = self.bench(EdgeTupleFunc1, True)
+        sim.run(quiet=QUIET)
+        assert nrCalls[0] > 0
+
+    def testGeneral(self):
+        sim, nrCalls = self.bench(GeneralFunc, True)
+        sim.run(quiet=QUIET)
+        assert nrCalls[0] > 0
+
+    def testNotStatic(self):
+        sim, nrCalls = self.bench(SignalTupleFunc1, False)
+        assert not any(isinstance(w, _StaticWaiter) for w in sim._waiters)
+        sim.run(quiet=QUIET)
+
+    def testOncePerDelta(self):
+        """ a static waiter runs once when several triggers fire """
+        a, b = Signal(0), Signal(0)
+        log = []
+
+        @always(a, b)
+        def logic():
+            log.append(now())
+
+        def stimulus():
+            yield delay(10)
+            a.next = 1
+            b.next = 1
+            yield delay(10)
+            a.next = 2
+            yield delay(10)
+            b.next = 2
+
+        Simulation(logic, stimulus()).run(quiet=QUIET)
+        assert log == [10, 20, 30]
@@ -426,3 +426,91 @@ class TestInferWaiter:
     def testSignalTuple1(self):
         sim = Simulation(self.bench(SignalTupleGen1, _SignalTupleWaiter))
         sim.run()
+
+
+def CombStage(dout, din, nrCalls):
+
+    @always_comb
+    def logic():
+        nrCalls[0] += 1
+        dout.next = din + 1
+
+    return logic
+
+
+def CombChain(sigs, nrCalls):
+    # instantiate in reverse order, the worst case for LIFO wakeup
+    stages = [CombStage(sigs[i + 1], sigs[i], nrCalls)
+              for i in range(len(sigs) - 1)]
+    stages.reverse()
+    return stages
+
+
+def CombLoop(a, b, c, d):
+
+    @always_comb
+    def loop1():
+        b.next = a + c
+
+    @always_comb
+    def loop2():
+        c.next = b
+
+    @always_comb
+    def sink():
+        a.next = d
+
+    return loop1, loop2, sink
+
+
+class TestLevelize:
+
+    def bench(self, levelize, N=10):
+        sigs = [Signal(intbv(0)[16:]) for i in range(N + 1)]
+        nrCalls = [0]
+        log = []
+        chain = CombChain(sigs, nrCalls)
+
+        def stimulus():
+            random.seed(3)
+            for i in range(1, 50):
+                yield delay(10)
+                v = randrange(1000)
+                if v != sigs[0]:
+                    log.append(now())
+                sigs[0].next = v
+                yield delay(5)
+                assert sigs[-1] == sigs[0] + N
+            raise StopSimulation
+
+        sim = Simulation(chain, stimulus(), levelize=levelize)
+        sim.run(quiet=QUIET)
+        return nrCalls[0], log
+
+    def testChain(self):
+        nrCalls, log = self.bench(True)
+        nrCallsRef, logRef = self.bench(False)
+        assert log == logRef
+        # each block is evaluated once initially and once per input change
+        assert nrCalls == 10 * (len(log) + 1)
+        assert nrCalls < nrCallsRef
+
+    def testOrder(self):
+        from myhdl._levelize import _levelize
+        sigs = [Signal(intbv(0)[16:]) for i in range(6)]
+        nrCalls = [0]
+        chain = CombChain(sigs, nrCalls)
+        order = [comb for comb, outputs in _levelize(chain)]
+        assert order == chain[::-1]
+
+    def testLoop(self):
+        from myhdl import SimulationError
+        from myhdl._levelize import _error as _levelizeError
+        a, b, c, d = [Signal(intbv(0)[8:]) for i in range(4)]
+        with raises_kind(SimulationError, _levelizeError.CombLoop):
+            Simulation(CombLoop(a, b, c, d), levelize=True)
+        try:
+            Simulation(CombLoop(a, b, c, d), levelize=True)
+        except SimulationError as e:
+            assert 'loop1' in e.msg and 'loop2' in e.msg
+            assert 'sink' not in e.msg
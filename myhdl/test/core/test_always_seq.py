@@ -47,3 +47,42 @@ def test_reset():
             pass
     except:
         assert False
+
+
+def _counter_bench(static, isasync):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=isasync)
+    count = Signal(intbv(0)[8:])
+    log = []
+
+    @always_seq(clock.posedge, reset=reset)
+    def counter():
+        count.next = count + 1
+
+    @instance
+    def stimulus():
+        for i in range(40):
+            yield delay(5)
+            clock.next = not clock
+            if i in (13, 14, 15):
+                reset.next = 1
+            elif i == 16:
+                reset.next = 0
+        raise StopSimulation
+
+    @instance
+    def monitor():
+        while 1:
+            yield count, reset
+            log.append((now(), int(count)))
+
+    Simulation(counter, stimulus, monitor, static=static).run(quiet=1)
+    return log
+
+
+def test_static():
+    """ static and generator based waiters should behave the same """
+    for isasync, treset in ((True, 70), (False, 75)):
+        log = _counter_bench(True, isasync)
+        assert log == _counter_bench(False, isasync)
+        assert (treset, 0) in log
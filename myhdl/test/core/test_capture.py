@@ -0,0 +1,173 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for the in-memory capture of value changes """
+from array import array
+
+import pytest
+
+from myhdl import (CycleSimulation, Signal, Simulation, SimulationError,
+                   TristateSignal, always_seq, block, delay, enum, instance,
+                   intbv, now, traceSignals)
+from myhdl._capture import _error
+from helpers import raises_kind
+
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'DONE')
+
+
+class Design(object):
+
+    """ signals of all kinds, with their changes logged """
+
+    def __init__(self):
+        self.bit = Signal(bool(0))
+        self.vec = Signal(intbv(0, min=-8, max=8))
+        self.wide = Signal(intbv(0)[80:])
+        self.num = Signal(0)
+        self.state = Signal(t_state.IDLE)
+        self.tri = TristateSignal(intbv(0)[4:])
+        self.sigs = [self.bit, self.vec, self.wide, self.num, self.state,
+                     self.tri]
+        self.log = [[(0, self.value(s))] for s in self.sigs]
+
+    @staticmethod
+    def value(s):
+        val = s.val
+        return int(val) if isinstance(val, (bool, intbv)) else val
+
+
+@block
+def design(d):
+    drv = d.tri.driver()
+
+    @instance
+    def stimulus():
+        for i in range(100):
+            yield delay(1 + i % 3)
+            d.bit.next = i % 2
+            if i % 5:
+                d.vec.next = i % 16 - 8
+            # beyond 64 bits from the middle of the run
+            d.wide.next = i << (i % 73)
+            d.num.next = -i
+            d.state.next = t_state.RUN if i % 2 else t_state.DONE
+            drv.next = None if i % 3 == 0 else i % 16
+            yield delay(0)
+            for s, log in zip(d.sigs, d.log):
+                val = d.value(s)
+                if val != log[-1][1]:
+                    log.append((now(), val))
+
+    return stimulus
+
+
+class TestCapture:
+
+    def testChanges(self):
+        d = Design()
+        sim = Simulation(design(d))
+        capture = sim.capture(d.sigs)
+        sim.run(quiet=QUIET)
+        for s, log in zip(d.sigs, d.log):
+            assert capture.changes(s) == log
+        # integers in typed arrays, other values in lists
+        assert isinstance(capture.times(d.wide), array)
+        assert isinstance(capture.values(d.bit), array)
+        assert isinstance(capture.values(d.num), array)
+        assert isinstance(capture.values(d.wide), list)
+        assert isinstance(capture.values(d.tri), list)
+        assert isinstance(capture.values(d.state), list)
+
+    def testStop(self):
+        d = Design()
+        sim = Simulation(design(d))
+        capture = sim.capture([d.num])
+        sim.run(20, quiet=QUIET)
+        capture.stop()
+        changes = capture.changes(d.num)
+        assert changes[-1][0] <= 20
+        sim.run(quiet=QUIET)
+        assert capture.changes(d.num) == changes
+        # a signal can be captured again
+        other = Simulation(design(d))
+        assert len(other.capture([d.num]).changes(d.num)) == 1
+        other.quit()
+
+    def testFinish(self):
+        d = Design()
+        sim = Simulation(design(d))
+        capture = sim.capture(d.sigs)
+        sim.run(quiet=QUIET)
+        assert capture.changes(d.num) == d.log[3]
+        assert all(s._capture is None for s in d.sigs)
+
+    def testWithTrace(self, tmpdir):
+        d = Design()
+        traceSignals.directory = str(tmpdir)
+        try:
+            sim = Simulation(traceSignals(design(d)))
+        finally:
+            traceSignals.directory = None
+        capture = sim.capture(d.sigs)
+        sim.run(quiet=QUIET)
+        for s, log in zip(d.sigs, d.log):
+            assert capture.changes(s) == log
+
+    def testCycleSimulation(self):
+        clock = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+
+        @always_seq(clock.posedge, reset=None)
+        def logic():
+            count.next = count + 3
+
+        sim = CycleSimulation(logic, clock=clock)
+        capture = sim.capture([count])
+        sim.run(5, quiet=QUIET)
+        sim.quit()
+        assert capture.changes(count) == [(2 * t, 3 * t) for t in range(6)]
+
+    def testArrays(self):
+        numpy = pytest.importorskip('numpy')
+        d = Design()
+        sim = Simulation(design(d))
+        capture = sim.capture(d.sigs)
+        sim.run(quiet=QUIET)
+        times, values = capture.arrays(d.num)
+        assert times.dtype == numpy.int64
+        assert values.dtype == numpy.int64
+        assert list(zip(times, values)) == d.log[3]
+        times, values = capture.arrays(d.wide)
+        assert values.dtype == object
+        assert list(zip(times, values)) == d.log[2]
+
+    def testErrors(self):
+        d = Design()
+        sim = Simulation(design(d))
+        with raises_kind(SimulationError, _error.ArgType):
+            sim.capture([d.num, 1])
+        capture = sim.capture([d.num])
+        with raises_kind(SimulationError, _error.Captured):
+            sim.capture([d.num])
+        with raises_kind(SimulationError, _error.NotCaptured):
+            capture.changes(d.bit)
+        sim.quit()
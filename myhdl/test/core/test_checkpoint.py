@@ -0,0 +1,237 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for Simulation checkpoints and forks """
+import gzip
+import os
+import pickle
+
+import pytest
+
+from myhdl import (ResetSignal, Signal, Simulation, SimulationError,
+                   StopSimulation, always, always_comb, always_seq, block,
+                   delay, instance, intbv, now, traceSignals)
+from myhdl._checkpoint import _error
+from myhdl._Simulation import _error as _simError
+from helpers import raises_kind
+
+
+QUIET = 1
+
+
+class Design(object):
+
+    """ registers, a memory and variables in always blocks """
+
+    def __init__(self, stop=None):
+        self.clock = Signal(bool(0))
+        self.reset = ResetSignal(0, active=1, isasync=True)
+        self.din = Signal(intbv(0)[8:])
+        self.dout = Signal(intbv(0)[8:])
+        self.total = Signal(intbv(0)[16:])
+        self.slow = Signal(intbv(0)[8:], delay=3)
+        self.stop = stop
+
+    def top(self):
+        clock, reset, din = self.clock, self.reset, self.din
+        dout, total, slow = self.dout, self.total, self.slow
+        mem = [0] * 16
+        count = 0
+
+        @always(delay(5))
+        def clkgen():
+            clock.next = not clock
+
+        @always_comb
+        def comb():
+            din.next = (dout * 7 + 3) % 256
+
+        @always_seq(clock.posedge, reset=reset)
+        def reg():
+            dout.next = (din + mem[int(din) % 16]) % 256
+            total.next = (total + dout) % 2**16
+            slow.next = dout
+
+        @always(clock.negedge)
+        def memory():
+            nonlocal count
+            count += 1
+            mem[count % 16] = (int(dout) + count) % 256
+            if count == self.stop:
+                raise StopSimulation
+
+        @instance
+        def resetgen():
+            reset.next = 1
+            yield delay(23)
+            reset.next = 0
+
+        return clkgen, comb, reg, memory, resetgen
+
+    def sample(self):
+        return now(), int(self.dout), int(self.total), int(self.slow)
+
+
+def trace(sim, d, steps):
+    result = []
+    for i in range(steps):
+        sim.run(7, quiet=QUIET)
+        result.append(d.sample())
+    return result
+
+
+class TestCheckpoint:
+
+    @pytest.mark.parametrize('scheduler', ['heap', 'wheel'])
+    def testRestore(self, scheduler):
+        d = Design()
+        sim = Simulation(d.top(), scheduler=scheduler)
+        sim.run(100, quiet=QUIET)
+        checkpoint = sim.checkpoint()
+        first = trace(sim, d, 30)
+        assert len(set(first)) == 30
+        sim.restore(checkpoint)
+        assert now() == 100
+        assert trace(sim, d, 30) == first
+        # a checkpoint can be restored more than once
+        sim.restore(checkpoint)
+        assert trace(sim, d, 30) == first
+        sim.quit()
+
+    def testRestoreFinished(self):
+        d = Design(stop=30)
+        sim = Simulation(d.top())
+        sim.run(100, quiet=QUIET)
+        checkpoint = sim.checkpoint()
+        assert sim.run(quiet=QUIET) == 0
+        end = d.sample()
+        sim.restore(checkpoint)
+        assert sim.run(quiet=QUIET) == 0
+        assert d.sample() == end
+        assert end[0] > 100
+
+    def testGenerator(self):
+        d = Design()
+        sim = Simulation(d.top())
+        sim.run(10, quiet=QUIET)
+        with raises_kind(SimulationError, _error.Generator):
+            sim.checkpoint()
+        sim.quit()
+
+    def testCell(self):
+        clock = Signal(bool(0))
+        counts = {}
+
+        @always(delay(5))
+        def clkgen():
+            clock.next = not clock
+
+        @always(clock.posedge)
+        def count():
+            counts[now()] = 1
+
+        sim = Simulation(clkgen, count)
+        sim.run(20, quiet=QUIET)
+        with raises_kind(SimulationError, _error.Cell):
+            sim.checkpoint()
+        sim.quit()
+
+    def testFinished(self):
+        d = Design(stop=5)
+        sim = Simulation(d.top())
+        sim.run(quiet=QUIET)
+        with raises_kind(SimulationError, _error.Finished):
+            sim.checkpoint()
+
+    def testOtherSim(self):
+        d = Design(stop=20)
+        sim = Simulation(d.top())
+        sim.run(100, quiet=QUIET)
+        checkpoint = sim.checkpoint()
+        sim.run(quiet=QUIET)
+        other = Simulation(Design().top())
+        with raises_kind(SimulationError, _error.OtherSim):
+            other.restore(checkpoint)
+        # only one simulation at a time
+        with raises_kind(SimulationError, _simError.MultipleSim):
+            sim.restore(checkpoint)
+        other.quit()
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+    def testFork(self):
+        d = Design()
+        sim = Simulation(d.top())
+        sim.run(100, quiet=QUIET)
+        rfd, wfd = os.pipe()
+        pid = sim.fork()
+        if pid == 0:
+            try:
+                os.close(rfd)
+                with os.fdopen(wfd, 'wb') as f:
+                    pickle.dump(trace(sim, d, 30), f)
+            finally:
+                os._exit(0)
+        os.close(wfd)
+        with os.fdopen(rfd, 'rb') as f:
+            child = pickle.load(f)
+        os.waitpid(pid, 0)
+        assert now() == 100
+        assert trace(sim, d, 30) == child
+        sim.quit()
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+    def testForkTrace(self, tmpdir):
+
+        @block
+        def top(clock, count):
+
+            @always(delay(5))
+            def clkgen():
+                clock.next = not clock
+
+            @always(clock.posedge)
+            def counter():
+                count.next = (count + 1) % 256
+
+            return clkgen, counter
+
+        clock = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        traceSignals.directory = str(tmpdir)
+        traceSignals.compression = 'gz'
+        try:
+            sim = Simulation(traceSignals(top(clock, count)))
+        finally:
+            traceSignals.directory = None
+            traceSignals.compression = None
+        sim.run(100, quiet=QUIET)
+        pid = sim.fork()
+        if pid == 0:
+            try:
+                sim.run(100, quiet=QUIET)
+                sim.quit()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        sim.run(300, quiet=QUIET)
+        sim.quit()
+        # the trace is that of the parent only, in a valid compressed file
+        with gzip.open(str(tmpdir.join('top.vcd.gz')), 'rt') as f:
+            times = [int(line[1:]) for line in f if line.startswith('#')]
+        assert times == list(range(5, 401, 5))
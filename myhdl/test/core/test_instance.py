@@ -53,3 +53,64 @@ class TestInstanceCompilation:
             @instance
             def h(n):
                 yield n
+
+
+class TestInstanceContext:
+
+    def testCallInfo(self):
+        from myhdl import block
+
+        @block
+        def cell(dout, din):
+            tmp = 1
+
+            @instance
+            def logic():
+                while 1:
+                    yield din
+                    dout.next = din + tmp
+            return logic
+
+        @block
+        def top(dout, din):
+            return [cell(dout[i], din[i]) for i in range(2)]
+
+        dout = [Signal(intbv(0)[8:]) for i in range(2)]
+        din = [Signal(intbv(0)[8:]) for i in range(2)]
+        t = top(dout, din)
+        assert t.callername == 'testCallInfo'
+        assert not t.modctxt
+        for i, c in enumerate(t.subs):
+            assert c.callername == 'top'
+            assert c.modctxt
+            logic = c.subs[0]
+            assert logic.callername == 'cell'
+            assert logic.modctxt
+            assert logic.symdict['tmp'] == 1
+            assert logic.symdict['din'] is din[i]
+            assert logic.sigdict['din'] is din[i]
+            assert logic.sigdict['dout'] is dout[i]
+
+    def testSourceCache(self, tmpdir):
+        import gc
+        import importlib.util
+        from myhdl import _util
+
+        def load(name):
+            path = tmpdir.join(name + ".py")
+            path.write("def f():\n    return 1\n")
+            spec = importlib.util.spec_from_file_location(name, str(path))
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            return mod.f
+
+        f, g = load("a"), load("b")
+        # equal code objects from two files
+        assert f.__code__ == g.__code__
+        for func in (f, g, f):
+            _util._makeAST(func)
+            assert _util._sources[func.__code__][2] == func.__code__.co_filename
+        n = len(_util._sources)
+        del f, g, func
+        gc.collect()
+        assert len(_util._sources) == n - 1
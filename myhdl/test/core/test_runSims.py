@@ -0,0 +1,111 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for runSims """
+import random
+
+from myhdl import (Signal, StopSimulation, always, block, delay, instance,
+                   intbv, runSims)
+
+
+@block
+def bench(n, limit=None, hang=False):
+    """ add random numbers to an accumulator, and check a limit """
+    acc = Signal(intbv(0)[32:])
+    data = Signal(intbv(0)[8:])
+
+    @always(data)
+    def logic():
+        acc.next = acc + data
+
+    @instance
+    def stimulus():
+        for i in range(n):
+            data.next = random.randrange(256)
+            yield delay(10)
+            if limit is not None:
+                assert acc <= limit
+        print("acc", int(acc))
+        raise StopSimulation
+
+    @instance
+    def spin():
+        while hang:
+            yield delay(0)
+
+    return logic, stimulus, spin
+
+
+def nobench(n):
+    """ a plain function factory """
+    count = Signal(intbv(0)[8:])
+
+    @instance
+    def logic():
+        for i in range(n):
+            yield delay(5)
+            count.next = count + 1
+
+    return logic
+
+
+def collect(*args, **kwargs):
+    return sorted(runSims(*args, **kwargs), key=lambda r: r.index)
+
+
+class TestRunSims:
+
+    def testResults(self):
+        paramsets = [dict(n=n) for n in range(1, 9)]
+        results = collect(bench, paramsets, workers=2)
+        assert [r.index for r in results] == list(range(8))
+        for r in results:
+            assert r.passed
+            assert r.params == paramsets[r.index]
+            assert r.time == 10 * r.params['n']
+            assert r.output.startswith("acc ")
+            assert r.error is None
+            assert r.walltime > 0
+
+    def testSeeds(self):
+        paramsets = [dict(n=20)] * 4
+        outputs = [r.output for r in collect(bench, paramsets, seed=5)]
+        assert len(set(outputs)) == 4
+        again = collect(bench, paramsets, workers=1, seed=5)
+        assert [r.output for r in again] == outputs
+        assert [r.seed for r in again] == [5, 6, 7, 8]
+
+    def testFail(self):
+        paramsets = [dict(n=10, limit=0), dict(n=10)]
+        fail, ok = collect(bench, paramsets, workers=2)
+        assert fail.status == 'fail'
+        assert 'AssertionError' in fail.error
+        assert ok.passed
+
+    def testTimeout(self):
+        paramsets = [dict(n=10, hang=True), dict(n=10)]
+        hung, ok = collect(bench, paramsets, workers=2, timeout=0.5)
+        assert hung.status == 'timeout'
+        assert not hung.passed
+        assert ok.passed
+
+    def testDuration(self):
+        results = collect(nobench, [dict(n=100), dict(n=200)], duration=50)
+        assert [r.time for r in results] == [50, 50]
+        assert all(r.passed for r in results)
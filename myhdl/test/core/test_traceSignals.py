@@ -18,12 +18,18 @@
 #  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
 
 """ Run the unit tests for traceSignals """
+import bz2
+import gzip
+import lzma
 import os
 import random
+import re
 
 import pytest
 
-from myhdl import block, Signal, Simulation, _simulator, delay, instance, intbv
+from myhdl import (block, Signal, Simulation, _simulator, delay, instance,
+                   intbv, now)
+from myhdl import _traceSignals
 from myhdl._traceSignals import TraceSignalsError, _error, traceSignals
 from helpers import raises_kind
 
@@ -114,6 +120,88 @@ def topTristate():
     return inst
 
 
+@block
+def regs(clk, q, sigs):
+    d = Signal(intbv(0)[4:])
+    mem = [Signal(intbv(0)[4:]) for i in range(4)]
+    sigs.extend([d] + mem)
+
+    @instance
+    def logic():
+        while 1:
+            yield clk.posedge
+            d.next = (d + 1) % 16
+            q.next = d
+            mem[int(d) % 4].next = d
+    return logic
+
+@block
+def nested(sigs):
+    clk = Signal(bool(0))
+    q = Signal(intbv(0)[4:])
+    cnt = [Signal(intbv(0)[4:]) for i in range(2)]
+    sigs.extend([clk, q] + cnt)
+    clkgen = gen(clk)
+    inst = regs(clk, q, sigs)
+
+    @instance
+    def count():
+        while 1:
+            yield clk.posedge
+            cnt[0].next = q
+    return clkgen, inst, count
+
+def tracedPaths(p):
+    """ paths of the vars in a VCD file """
+    paths = []
+    scopes = []
+    with open(p) as f:
+        for line in f:
+            words = line.split()
+            if line.startswith('$scope'):
+                scopes.append(words[2])
+            elif line.startswith('$upscope'):
+                scopes.pop()
+            elif line.startswith('$var'):
+                paths.append(".".join(scopes + [words[4]]))
+    return paths
+
+@block
+def switched(start=None, stop=None, error=None):
+    clk = Signal(bool(0))
+    clkgen = gen(clk)
+
+    @instance
+    def control():
+        for t, action in sorted([(start, traceSignals.start),
+                                 (stop, traceSignals.stop),
+                                 (error, None)],
+                                key=lambda x: x[0] or 0):
+            if t is None:
+                continue
+            yield delay(t - now())
+            if action is None:
+                raise ValueError("error at %s" % now())
+            action()
+    return clkgen, control
+
+def changeTimes(p):
+    """ times of the value changes in a VCD file, with the dump sections """
+    times = []
+    sections = []
+    t = None
+    with open(p) as f:
+        for line in f:
+            if line[0] == '#':
+                t = int(line[1:])
+            elif line.startswith('$dump'):
+                sections.append((t, line.strip()))
+            elif line[0] in '01xbs' and t is not None and \
+                    sections[-1][1] != '$dumpoff':
+                times.append(t)
+    return times, sections
+
+
 @pytest.fixture
 def vcd_dir(tmpdir):
     with tmpdir.as_cwd():
@@ -196,3 +284,194 @@ class TestTraceSigs:
         assert not path.exists(psub)
         assert path.exists(pdutd)
         assert not path.exists(psubd)
+
+    def testThreaded(self, vcd_dir, monkeypatch):
+        # small buffers, so that the writer thread gets many of them
+        monkeypatch.setattr(_traceSignals, '_bufsize', 5)
+        monkeypatch.setattr(_traceSignals, '_queuesize', 1)
+        p = "%s.vcd" % tristate.__name__
+        vcds = []
+        for threaded in (False, True):
+            traceSignals.threaded = threaded
+            try:
+                sim = Simulation(topTristate())
+            finally:
+                traceSignals.threaded = False
+            sim.run(200, quiet=QUIET)
+            sim.quit()
+            with open(p) as f:
+                # instance names differ, compare the value changes
+                vcds.append(f.read().split("$enddefinitions", 1)[1])
+        assert vcds[0] == vcds[1]
+
+    def testThreadedError(self, vcd_dir):
+        traceSignals.threaded = True
+        try:
+            sim = Simulation(top())
+        finally:
+            traceSignals.threaded = False
+        sim.run(100, quiet=QUIET)
+        # a record that the writer thread can't format
+        _simulator._tf.write((None, 0))
+        with pytest.raises(TypeError):
+            sim.quit()
+        assert not _simulator._tracing
+        assert _simulator._nrSims == 0
+
+    def testThreadedErrorInRun(self, vcd_dir):
+
+        @instance
+        def fail():
+            yield delay(150)
+            raise ValueError("design error")
+
+        traceSignals.threaded = True
+        try:
+            sim = Simulation(top(), fail)
+        finally:
+            traceSignals.threaded = False
+        sim.run(100, quiet=QUIET)
+        _simulator._tf.write((None, 0))
+        # the error of the design propagates, that of the writer is a warning
+        with pytest.warns(RuntimeWarning, match="TypeError"):
+            with pytest.raises(ValueError, match="design error"):
+                sim.run(quiet=QUIET)
+        assert not _simulator._tracing
+        assert _simulator._nrSims == 0
+
+    @pytest.mark.parametrize('attrs, paths', [
+        (dict(include="*.q"), ['nested.q', 'nested.regs.q']),
+        (dict(include=re.compile(r".*\.regs\d+\..*"), tracelists=False),
+         ['nested.regs.clk', 'nested.regs.q', 'nested.regs.d']),
+        (dict(exclude=["*.clk", "*.regs*"], tracelists=["*.cnt"]),
+         ['nested.q', 'nested.cnt.cnt(0)', 'nested.cnt.cnt(1)']),
+        (dict(depth=1, tracelists=False), ['nested.clk', 'nested.q']),
+    ])
+    def testSelect(self, vcd_dir, attrs, paths):
+        for attr, value in attrs.items():
+            setattr(traceSignals, attr, value)
+        sigs = []
+        try:
+            dut = traceSignals(nested(sigs))
+        finally:
+            traceSignals.include = traceSignals.exclude = None
+            traceSignals.depth = None
+            traceSignals.tracelists = True
+        sim = Simulation(dut)
+        sim.run(100, quiet=QUIET)
+        sim.quit()
+        found = [re.sub(r"regs\d+", "regs", x)
+                 for x in tracedPaths("nested.vcd")]
+        assert sorted(found) == sorted(paths)
+        # the other signals have no trace cost, and a port is traced once
+        traced = [s for s in sigs if s._tracing]
+        assert len(traced) == len(set(x.split('.')[-1] for x in paths))
+
+    def testWindow(self, vcd_dir):
+        traceSignals.window = (100, 200)
+        try:
+            sim = Simulation(traceSignals(fun()))
+        finally:
+            traceSignals.window = None
+        sim.run(400, quiet=QUIET)
+        sim.quit()
+        times, sections = changeTimes("fun.vcd")
+        assert sections == [(None, '$dumpvars'), (0, '$dumpoff'),
+                            (100, '$dumpon'), (200, '$dumpoff')]
+        assert times[0] == 100 and times[-1] < 200
+        assert len(set(times)) == 10
+
+    def testStartStop(self, vcd_dir):
+        sim = Simulation(traceSignals(switched(stop=55, start=155)))
+        sim.run(300, quiet=QUIET)
+        sim.quit()
+        times, sections = changeTimes("switched.vcd")
+        assert sections == [(None, '$dumpvars'), (55, '$dumpoff'),
+                            (155, '$dumpon')]
+        assert not [t for t in times if 55 <= t < 155]
+        assert max(times) == 300
+
+    def testRecorder(self, vcd_dir):
+        traceSignals.recorder = 100
+        try:
+            sim = Simulation(traceSignals(switched()))
+            sim.run(1000, quiet=QUIET)
+            sim.quit()
+            # nothing is written when all goes well
+            assert not path.exists("switched.vcd")
+            sim = Simulation(traceSignals(switched(error=505)))
+        finally:
+            traceSignals.recorder = None
+        with pytest.raises(ValueError):
+            sim.run(quiet=QUIET)
+        times, sections = changeTimes("switched.vcd")
+        assert sections == [(405, '$dumpvars')]
+        # the values at the start of the span, and the changes in it
+        assert times[0] == 405 and min(times[1:]) > 405
+        assert max(times) == 500
+        assert len(set(times)) == 11
+
+    def testDump(self, vcd_dir):
+        traceSignals.recorder = 50
+        try:
+            sim = Simulation(traceSignals(switched(start=200)))
+        finally:
+            traceSignals.recorder = None
+        sim.run(300, quiet=QUIET)
+        assert not path.exists("switched.vcd")
+        traceSignals.dump()
+        sim.quit()
+        times, sections = changeTimes("switched.vcd")
+        assert sections == [(250, '$dumpvars')]
+        assert max(times) == 300
+
+    @pytest.mark.parametrize('compression, opener', [
+        ('gz', gzip.open), ('bz2', bz2.open), ('xz', lzma.open)])
+    @pytest.mark.parametrize('threaded', [False, True])
+    def testCompression(self, vcd_dir, compression, opener, threaded):
+        p = "%s.vcd" % tristate.__name__
+        vcds = []
+        for attrs in ({}, dict(compression=compression, threaded=threaded)):
+            for attr, value in attrs.items():
+                setattr(traceSignals, attr, value)
+            try:
+                sim = Simulation(topTristate())
+            finally:
+                traceSignals.compression = None
+                traceSignals.threaded = False
+            sim.run(200, quiet=QUIET)
+            sim.quit()
+            op = opener if attrs else open
+            with op(p + ("." + compression if attrs else ""), 'rt') as f:
+                vcds.append(f.read().split("$enddefinitions", 1)[1])
+        assert vcds[0] == vcds[1]
+
+    def testCompressionBackup(self, vcd_dir):
+        traceSignals.compression = 'gz'
+        try:
+            traceSignals(fun())
+            _simulator._tf.close()
+            _simulator._tracing = 0
+            p = "fun.vcd.gz"
+            size = path.getsize(p)
+            pbak = "fun.%s.vcd.gz" % path.getmtime(p)
+            traceSignals(fun())
+            _simulator._tf.close()
+            _simulator._tracing = 0
+        finally:
+            traceSignals.compression = None
+        assert path.getsize(pbak) == size
+        assert path.exists(p)
+
+    def testCompressionErrors(self, vcd_dir):
+        traceSignals.compression = 'zip'
+        try:
+            with raises_kind(TraceSignalsError, _error.Compression):
+                traceSignals(fun())
+            traceSignals.compression = 'gz'
+            traceSignals.format = 'mwf'
+            with raises_kind(TraceSignalsError, _error.CompressedFormat):
+                traceSignals(fun())
+        finally:
+            traceSignals.compression = None
+            traceSignals.format = 'vcd'
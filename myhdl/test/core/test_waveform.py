@@ -0,0 +1,254 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for the binary waveform format """
+import os
+
+import pytest
+
+from myhdl import (Signal, Simulation, TristateSignal, Waveform, block, delay,
+                   diffWaveforms, enum, instance, intbv, now, traceSignals)
+from myhdl import _traceSignals, _waveform
+from myhdl._traceSignals import TraceSignalsError, _error
+from helpers import raises_kind
+
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'DONE')
+
+
+def expected(value):
+    """ value of a signal as read from a waveform """
+    if value is None:
+        return None
+    if isinstance(value, type(t_state.IDLE)):
+        return str(value)
+    return int(value)
+
+
+@block
+def design(log, flip=None):
+    """ signals of all kinds, with their changes logged """
+    bit = Signal(bool(0))
+    vec = Signal(intbv(0, min=-8, max=8))
+    hexa = Signal(intbv(0))
+    num = Signal(0)
+    state = Signal(t_state.IDLE)
+    tri = TristateSignal(intbv(0)[4:])
+    drv = tri.driver()
+    mem = [Signal(intbv(0)[3:]) for i in range(3)]
+    sigs = dict(bit=bit, vec=vec, hexa=hexa, num=num, state=state, tri=tri)
+
+    @instance
+    def stimulus():
+        for i in range(200):
+            yield delay(1 + i % 3)
+            bit.next = i % 2
+            if i % 5:
+                vec.next = i % 16 - 8
+            hexa.next = i * 1000
+            num.next = -i if i != flip else 0
+            state.next = t_state.RUN if i % 2 else t_state.DONE
+            drv.next = None if i % 3 == 0 else i % 16
+            mem[i % 3].next = i % 8
+            yield delay(0)
+            for name, s in sigs.items():
+                log.setdefault(name, {})[now()] = expected(s.val)
+
+    return stimulus
+
+
+def trace(tmpdir, bufsize, fmt='mwf', compression=None, flip=None):
+    log = {}
+    traceSignals.format = fmt
+    traceSignals.compression = compression
+    traceSignals.directory = str(tmpdir)
+    traceSignals.filename = "design%s" % (flip or "")
+    try:
+        dut = traceSignals(design(log, flip))
+    finally:
+        traceSignals.format = 'vcd'
+        traceSignals.compression = None
+        traceSignals.directory = None
+        traceSignals.filename = None
+    sim = Simulation(dut)
+    sim.run(quiet=QUIET)
+    p = os.path.join(str(tmpdir), "design%s.%s" % (flip or "", fmt))
+    if compression:
+        p += "." + compression
+    return log, p
+
+
+class TestWaveform:
+
+    @pytest.mark.parametrize('bufsize', [5, 1000, None])
+    def testValues(self, tmpdir, monkeypatch, bufsize):
+        if bufsize:
+            monkeypatch.setattr(_traceSignals, '_bufsize', bufsize)
+        log, p = trace(tmpdir, bufsize)
+        with Waveform(p) as w:
+            assert w.timescale == "1ns"
+            assert 'design.mem.mem(1)' in w.names
+            for name, values in log.items():
+                full = 'design.' + name
+                for t, value in values.items():
+                    assert w.value(full, t) == value
+            # the changes in a window
+            times = sorted(log['hexa'])
+            changes = w.changes('design.hexa', times[50], times[60])
+            assert changes == [(t, log['hexa'][t])
+                               for t in times[50:60]]
+            assert w.values(times[10])['design.num'] == -10
+            assert w.end == times[-1]
+
+    def testSeek(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(_traceSignals, '_bufsize', 5)
+        log, p = trace(tmpdir, 5)
+        with Waveform(p) as w:
+            assert len(w._t0s) > 50
+            reads = []
+            read = w._block
+            monkeypatch.setattr(w, '_block', lambda i: reads.append(i) or read(i))
+            t = sorted(log['num'])[100]
+            assert w.value('design.num', t) == -100
+            assert len(reads) == 1
+
+    def testNoIndex(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(_traceSignals, '_bufsize', 5)
+        log, p = trace(tmpdir, 5)
+        with open(p, 'rb') as f:
+            data = f.read()
+        # as if the simulation had crashed in the middle of a block
+        with open(p, 'wb') as f:
+            f.write(data[:len(data) * 2 // 3])
+        with Waveform(p) as w:
+            t = w.end
+            assert 0 < t < max(log['num'])
+            assert w.value('design.num', t) == log['num'][t]
+
+    def testToVcd(self, tmpdir):
+        log, p = trace(tmpdir, None)
+        vcd = os.path.join(str(tmpdir), "design.vcd")
+        with Waveform(p) as w:
+            w.toVcd(vcd)
+        values = {}
+        codes = {}
+        t = 0
+        with open(vcd) as f:
+            for line in f:
+                if line.startswith('$var'):
+                    words = line.split()
+                    codes[words[3]] = words[4]
+                elif line.startswith('#'):
+                    t = int(line[1:])
+                elif line.startswith('b') or line.startswith('s'):
+                    value, code = line[1:].split()
+                    values[codes[code], t] = value
+        assert values['num', max(log['num'])] == '-199'
+        assert values['state', 6] == 'DONE'
+        # two's complement of -6
+        assert values['vec', 6] == '1010'
+
+    def testFormat(self, tmpdir):
+        traceSignals.format = 'fst'
+        try:
+            with raises_kind(TraceSignalsError, _error.Format):
+                traceSignals(design({}))
+        finally:
+            traceSignals.format = 'vcd'
+
+    def testArrays(self, tmpdir):
+        numpy = pytest.importorskip('numpy')
+        log, p = trace(tmpdir, None)
+        with Waveform(p) as w:
+            times, values = w.arrays('design.num')
+        assert times.dtype == numpy.int64
+        assert list(values[1:]) == [-i for i in range(1, 200)]
+
+    @pytest.mark.parametrize('compression', [None, 'gz'])
+    def testFromVcd(self, tmpdir, monkeypatch, compression):
+        monkeypatch.setattr(_waveform, '_bufsize', 5)
+        log, p = trace(tmpdir, None, 'vcd', compression)
+        with Waveform.fromVcd(p) as w:
+            assert len(w._t0s) > 50
+            assert w.timescale == "1ns"
+            assert 'design.mem.mem(1)' in w.names
+            for name in ('bit', 'tri', 'state'):
+                for t, value in log[name].items():
+                    assert w.value('design.' + name, t) == value
+            # vectors have no sign in a VCD file, and others are strings
+            for t, value in log['vec'].items():
+                assert w.value('design.vec', t) == value % 16
+            for t, value in log['num'].items():
+                assert w.value('design.num', t) == str(value)
+        # the index is reused
+        mtime = os.path.getmtime(p + ".mwf")
+        Waveform.fromVcd(p).close()
+        assert os.path.getmtime(p + ".mwf") == mtime
+
+    def testVcdText(self, tmpdir):
+        # as written by a Verilog simulator
+        p = os.path.join(str(tmpdir), "tb.vcd")
+        with open(p, 'w') as f:
+            f.write("""$date Mon Jan 1 $end
+$version Icarus Verilog $end
+$timescale 1 ps $end
+$scope module tb $end $var wire 1 ! clk $end
+$var reg 8 " data [7:0] $end
+$scope module dut $end
+$var wire 8 " data [7:0] $end
+$var real 1 # gain $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+$comment
+  initial values
+$end
+#0
+$dumpvars
+0!
+bx "
+r0.5 #
+$end
+#5
+1! b101 "
+#10
+0!
+bz "
+""")
+        with Waveform.fromVcd(p) as w:
+            assert w.timescale == "1ps"
+            assert w.names == ['tb.clk', 'tb.data', 'tb.dut.data',
+                               'tb.dut.gain']
+            assert w.changes('tb.dut.data') == [(0, None), (5, 5),
+                                                (10, None)]
+            assert w.value('tb.clk', 7) == 1
+            assert w.value('tb.dut.gain', 7) == "0.5"
+
+    def testDiff(self, tmpdir):
+        log, golden = trace(tmpdir, None, 'vcd')
+        # the same run, as a waveform file
+        log, same = trace(tmpdir, None)
+        assert diffWaveforms(golden, same) == {}
+        log, new = trace(tmpdir, None, flip=150)
+        t = sorted(log['num'])[150]
+        assert diffWaveforms(golden, new) == {'design.num': t}
+        with Waveform(new) as w:
+            assert diffWaveforms(golden, w, names=['design.vec']) == {}
@@ -0,0 +1,67 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare the in-memory capture of value changes with VCD tracing.
+
+Usage: python perf_capture.py
+
+Each design runs without tracing, with all signals traced to a VCD
+file, and with all signals captured in memory.
+"""
+import time
+
+from myhdl import Simulation
+from myhdl._block import _Block
+
+from perf_trace import benches, run
+
+
+def signals(top):
+    """ Return the signals of a block and its subblocks. """
+    sigs = {}
+    blocks = [top]
+    while blocks:
+        b = blocks.pop()
+        for s in b.sigdict.values():
+            sigs[id(s)] = s
+        blocks.extend(sub for sub in b.subs if isinstance(sub, _Block))
+    return list(sigs.values())
+
+
+def capture(bench):
+    top = bench()
+    sim = Simulation(top)
+    sigs = signals(top)
+    c = sim.capture(sigs)
+    start = time.time()
+    sim.run(quiet=1)
+    elapsed = time.time() - start
+    return elapsed, sum(len(c.times(s)) for s in sigs)
+
+
+if __name__ == '__main__':
+    print("%-10s %-10s %10s %8s" % ("design", "mode", "time", "overhead"))
+    for name, bench in benches:
+        tplain, _ = run(bench, False)
+        print("%-10s %-10s %10.3f" % (name, "no trace", tplain))
+        t, size = run(bench, True)
+        print("%-10s %-10s %10.3f %8.2f" % (name, "vcd", t, t / tplain))
+        t, changes = capture(bench)
+        print("%-10s %-10s %10.3f %8.2f   %d changes" %
+              (name, "capture", t, t / tplain, changes))
@@ -0,0 +1,111 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare the per-test wall time of tests that share a warm-up phase.
+
+Usage: python perf_checkpoint.py [tests]
+
+Each test runs a pipeline design for a short time after a long warm-up.
+
+fresh -- elaborate, warm up and run each test from scratch
+restore -- warm up once, and restore a checkpoint before each test
+fork -- warm up once, and fork the simulation for each test
+"""
+import os
+import sys
+import time
+
+from myhdl import (Signal, ResetSignal, Simulation, always, always_seq,
+                   delay, instance, intbv)
+
+from perf_static import stage
+
+WARMUP = 20000 * 20
+TEST = 500 * 20
+
+
+def soc(n=20):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=True)
+    sigs = [Signal(intbv(0)[16:]) for i in range(n + 1)]
+    stages = [stage(sigs[i + 1], sigs[i], clock, reset) for i in range(n)]
+
+    @always(delay(10))
+    def clkgen():
+        clock.next = not clock
+
+    @always_seq(clock.posedge, reset=reset)
+    def source():
+        sigs[0].next = (sigs[0] + 1) % 2**16
+
+    @instance
+    def resetgen():
+        reset.next = 1
+        yield delay(25)
+        reset.next = 0
+
+    return stages, clkgen, source, resetgen
+
+
+def fresh(tests):
+    for i in range(tests):
+        sim = Simulation(soc())
+        sim.run(WARMUP, quiet=1)
+        sim.run(TEST, quiet=1)
+        sim.quit()
+
+
+def restore(tests):
+    sim = Simulation(soc())
+    sim.run(WARMUP, quiet=1)
+    checkpoint = sim.checkpoint()
+    start = time.time()
+    for i in range(tests):
+        sim.restore(checkpoint)
+        sim.run(TEST, quiet=1)
+    sim.quit()
+    return start
+
+
+def fork(tests):
+    sim = Simulation(soc())
+    sim.run(WARMUP, quiet=1)
+    start = time.time()
+    for i in range(tests):
+        pid = sim.fork()
+        if pid == 0:
+            try:
+                sim.run(TEST, quiet=1)
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+    sim.quit()
+    return start
+
+
+if __name__ == '__main__':
+    tests = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print("%-10s %10s %14s" % ("method", "warm-up", "per test (s)"))
+    for name, method in [("fresh", fresh), ("restore", restore),
+                         ("fork", fork)]:
+        start = time.time()
+        warm = method(tests) or start
+        end = time.time()
+        print("%-10s %10.3f %14.4f" % (name, warm - start,
+                                       (end - warm) / tests))
@@ -0,0 +1,129 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the throughput and the protocol overhead of a cosimulation.
+
+Usage: python perf_cosim.py [steps] [stages] [width] [activity]
+
+The HDL side is the stand-in of myhdl._cosimPeer: a register copied to
+a net, and a pipeline of registers in which a new value enters with the
+given activity factor. A process drives a new value on the register at
+each time step and checks the copy, so that every step is a full round
+trip between MyHDL and the stand-in. The run is repeated with the text
+protocol, and with the binary protocol over pipes and shared memory.
+Batched runs don't check the copy, and exchange 100 time steps at once.
+The overhead is the time per step beyond that of the process alone.
+Last, a series of short simulations is run with a new stand-in for each
+one, and with a persistent stand-in.
+"""
+import sys
+import time
+
+from myhdl import (Cosimulation, Signal, Simulation, StopSimulation, delay,
+                   instance, intbv)
+
+
+def bench(steps, width, check=True):
+    din = Signal(intbv(0)[width:])
+    dout = Signal(intbv(0)[width:])
+    mask = (1 << width) - 1
+
+    @instance
+    def stimulus():
+        for i in range(steps):
+            din.next = i & mask
+            yield delay(1)
+        raise StopSimulation
+
+    # a batched cosimulation synchronizes each time step for a reader
+    @instance
+    def checked():
+        for i in range(steps):
+            din.next = i & mask
+            yield delay(1)
+            assert dout == i & mask
+        raise StopSimulation
+
+    return (checked if check else stimulus), din, dout
+
+
+def short(persistent, runs, width):
+    Cosimulation.persistent = persistent
+    exe = [sys.executable, "-m", "myhdl._cosimPeer", str(width)]
+    start = time.time()
+    try:
+        for i in range(runs):
+            stimulus, din, dout = bench(10, width)
+            Simulation(Cosimulation(exe, din=din, dout=dout),
+                       stimulus).run(quiet=1)
+    finally:
+        Cosimulation.persistent = False
+        Cosimulation.shutdown()
+    return time.time() - start
+
+
+def run(protocol, transport, window, steps, stages, width, activity):
+    stimulus, din, dout = bench(steps, width, check=not window)
+    q = dict(('q%d' % i, Signal(intbv(0)[width:])) for i in range(stages))
+    exe = [sys.executable, "-m", "myhdl._cosimPeer", str(width),
+           "--stages", str(stages), "--activity", str(activity)]
+    Cosimulation.protocol = protocol
+    Cosimulation.transport = transport
+    Cosimulation.window = window
+    try:
+        cosim = Cosimulation(exe, din=din, dout=dout, **q)
+    finally:
+        Cosimulation.protocol = 'binary'
+        Cosimulation.transport = 'pipe'
+        Cosimulation.window = 0
+    start = time.time()
+    Simulation(cosim, stimulus).run(quiet=1)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    stages = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    width = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    activity = float(sys.argv[4]) if len(sys.argv) > 4 else 0.5
+    start = time.time()
+    Simulation(bench(steps, width, check=False)[0]).run(quiet=1)
+    base = (time.time() - start) / steps * 1e6
+    print("%d steps, %d stages of %d bits, activity %.2f" %
+          (steps, stages, width, activity))
+    print("%-12s %10s %10s %10s %10s" %
+          ("mode", "time", "steps/s", "us/step", "overhead"))
+    print("%-12s %10s %10s %10.1f" % ("myhdl only", "", "", base))
+    for protocol, transport, window in (('text', 'pipe', 0),
+                                        ('binary', 'pipe', 0),
+                                        ('binary', 'shm', 0),
+                                        ('binary', 'pipe', 100),
+                                        ('binary', 'shm', 100)):
+        t = run(protocol, transport, window, steps, stages, width, activity)
+        mode = protocol if protocol == 'text' else transport
+        if window:
+            mode += " batched"
+        us = t / steps * 1e6
+        print("%-12s %10.3f %10.0f %10.1f %10.1f" %
+              (mode, t, steps / t, us, us - base))
+    print("%-12s %10s %10s" % ("short runs", "time", "ms/run"))
+    for persistent in (False, True):
+        t = short(persistent, 50, width)
+        print("%-12s %10.3f %10.1f" %
+              ("persistent" if persistent else "new", t, t / 50 * 1e3))
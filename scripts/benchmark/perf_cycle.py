@@ -0,0 +1,137 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare the event-driven and the cycle-based simulation engines.
+
+Usage: python perf_cycle.py [cycles]
+
+pipeline -- a chain of always_seq registers with always_comb logic in
+            between, fed by an LFSR, all with an asynchronous reset
+combnet -- a few registers feeding a deep network of always_comb adders,
+           where each adder reads the outputs of the two before it
+
+The event-driven engine runs each design with a clock generator, the
+cycle-based engine drives the clock itself. The final signal values of
+both runs are compared.
+"""
+import sys
+import time
+
+from myhdl import (CycleSimulation, ResetSignal, Signal, Simulation, block,
+                   always_comb, always_seq, delay, instance, intbv)
+
+
+@block
+def lfsr(dout, clock, reset):
+
+    @always_seq(clock.posedge, reset=reset)
+    def logic():
+        fb = dout[15] ^ dout[13] ^ dout[12] ^ dout[10]
+        dout.next = (dout[15:] << 1) | fb
+
+    return logic
+
+
+@block
+def stage(dout, din, clock, reset):
+    tmp = Signal(intbv(0)[16:])
+
+    @always_comb
+    def comb():
+        tmp.next = (din + 3) % 2**16
+
+    @always_seq(clock.posedge, reset=reset)
+    def reg():
+        dout.next = tmp
+
+    return comb, reg
+
+
+@block
+def adder(dout, a, b):
+
+    @always_comb
+    def logic():
+        dout.next = (a + b) % 2**16
+
+    return logic
+
+
+def pipeline(clock, n=50):
+    reset = ResetSignal(0, active=1, isasync=True)
+    sigs = [Signal(intbv(1)[16:]) for i in range(n + 1)]
+    stages = [stage(sigs[i + 1], sigs[i], clock, reset) for i in range(n)]
+    return [lfsr(sigs[0], clock, reset), stages], sigs[-1]
+
+
+def combnet(clock, n=50):
+    reset = ResetSignal(0, active=1, isasync=True)
+    sigs = [Signal(intbv(1)[16:]) for i in range(n + 2)]
+    adders = [adder(sigs[i + 2], sigs[i + 1], sigs[i]) for i in range(n)]
+    adders.reverse()
+    return [lfsr(sigs[0], clock, reset), lfsr(sigs[1], clock, reset),
+            adders], sigs[-1]
+
+
+def runEvent(bench, cycles):
+    clock = Signal(bool(0))
+    top, out = bench(clock)
+
+    @instance
+    def clkgen():
+        while 1:
+            yield delay(5)
+            clock.next = not clock
+
+    sim = Simulation(top, clkgen)
+    start = time.time()
+    sim.run(10 * cycles, quiet=1)
+    elapsed = time.time() - start
+    val = int(out)
+    sim.quit()
+    return elapsed, val
+
+
+def runCycle(bench, cycles):
+    clock = Signal(bool(0))
+    top, out = bench(clock)
+    sim = CycleSimulation(top, clock=clock)
+    start = time.time()
+    sim.run(cycles, quiet=1)
+    elapsed = time.time() - start
+    val = int(out)
+    sim.quit()
+    return elapsed, val
+
+
+benches = [
+    ("pipeline", pipeline),
+    ("combnet", combnet),
+]
+
+
+if __name__ == '__main__':
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print("%-10s %10s %10s %8s %6s" %
+          ("design", "event", "cycle", "speedup", "same"))
+    for name, bench in benches:
+        tevent, vevent = runEvent(bench, cycles)
+        tcycle, vcycle = runCycle(bench, cycles)
+        print("%-10s %10.3f %10.3f %8.2f %6s" %
+              (name, tevent, tcycle, tevent / tcycle, vevent == vcycle))
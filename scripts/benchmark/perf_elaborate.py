@@ -0,0 +1,91 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the elaboration of block hierarchies of increasing size.
+
+Usage: python perf_elaborate.py [fanout] [maxdepth]
+
+A hierarchy is a tree of blocks with the given fanout. Each leaf is a
+cell with an always_comb, an always_seq, an always and an instance
+process. The script reports the time to elaborate the top block, per
+process.
+"""
+import sys
+import time
+
+from myhdl import (Signal, ResetSignal, always, always_comb, always_seq,
+                   block, instance, intbv)
+
+
+@block
+def cell(dout, din, clock, reset):
+    tmp = Signal(intbv(0)[8:])
+    count = Signal(intbv(0)[8:])
+
+    @always_comb
+    def comb():
+        tmp.next = (din + 1) % 256
+
+    @always_seq(clock.posedge, reset=reset)
+    def reg():
+        dout.next = tmp
+
+    @always(clock.negedge)
+    def counter():
+        count.next = (count + 1) % 256
+
+    @instance
+    def check():
+        while 1:
+            yield dout
+            assert dout < 256
+
+    return comb, reg, counter, check
+
+
+@block
+def tree(dout, din, clock, reset, depth, fanout):
+    if depth == 0:
+        return cell(dout, din, clock, reset)
+    wires = [Signal(intbv(0)[8:]) for i in range(fanout - 1)]
+    ins = [din] + wires
+    outs = wires + [dout]
+    return [tree(outs[i], ins[i], clock, reset, depth - 1, fanout)
+            for i in range(fanout)]
+
+
+def elaborate(depth, fanout):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=True)
+    din = Signal(intbv(0)[8:])
+    dout = Signal(intbv(0)[8:])
+    start = time.time()
+    tree(dout, din, clock, reset, depth, fanout)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    fanout = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    maxdepth = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print("%6s %10s %10s %12s" % ("depth", "processes", "time", "us/process"))
+    for depth in range(1, maxdepth + 1):
+        processes = 4 * fanout ** depth
+        t = elaborate(depth, fanout)
+        print("%6d %10d %10.3f %12.1f" %
+              (depth, processes, t, t / processes * 1e6))
@@ -0,0 +1,107 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Benchmark the future event queue with a growing number of pending events.
+
+Usage: python perf_futureEvents.py [duration]
+
+Each row of the report is a simulation with N free-running delay
+processes with distinct periods, so that N events are pending at any
+time. The 'heap' and 'wheel' columns are the schedulers that can be
+selected with the scheduler argument of Simulation. The 'sorted' column
+uses a list that is sorted on every time step, which is how the simulator
+used to manage its future events.
+"""
+import sys
+import time
+import random
+from operator import itemgetter
+
+from myhdl import Signal, Simulation, delay
+from myhdl._EventQueue import _schedulers
+
+random.seed(1)  # random, but deterministic
+
+
+class SortedListQueue(object):
+
+    """ Reference queue: sort on each time step, pop from the front """
+
+    def __init__(self):
+        self._list = []
+
+    def __len__(self):
+        return len(self._list)
+
+    def push(self, t, event):
+        self._list.append((t, event))
+
+    def nextTime(self):
+        self._list.sort(key=itemgetter(0))
+        return self._list[0][0]
+
+    def pop(self, t):
+        l = self._list
+        events = []
+        while l and l[0][0] == t:
+            events.append(l[0][1])
+            del l[0]
+        return events
+
+    def clear(self):
+        del self._list[:]
+
+
+def bench(n):
+    sigs = [Signal(bool(0)) for i in range(n)]
+    insts = []
+    for i in range(n):
+        period = random.randrange(5, 500)
+
+        def gen(sig=sigs[i], period=period):
+            while 1:
+                yield delay(period)
+                sig.next = not sig
+
+        insts.append(gen())
+    return insts
+
+
+_schedulers['sorted'] = SortedListQueue
+
+
+def run(n, duration, scheduler):
+    random.seed(1)
+    sim = Simulation(bench(n), scheduler=scheduler)
+    start = time.time()
+    sim.run(duration, quiet=1)
+    elapsed = time.time() - start
+    sim.quit()
+    return elapsed
+
+
+if __name__ == '__main__':
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("%8s %10s %10s %10s %8s" % ("N", "heap", "wheel", "sorted", "speedup"))
+    for n in (10, 100, 1000, 5000, 10000):
+        theap = run(n, duration, 'heap')
+        twheel = run(n, duration, 'wheel')
+        tsort = run(n, duration, 'sorted')
+        print("%8d %10.3f %10.3f %10.3f %8.1f" %
+              (n, theap, twheel, tsort, tsort / theap))
@@ -0,0 +1,76 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare levelized and event-driven evaluation of always_comb chains.
+
+Usage: python perf_levelize.py
+
+Each design is a chain of N always_comb stages, instantiated in reverse
+order, where each stage adds the outputs of the two stages before it.
+A stimulus changes the chain input every 10 time units. The number of block evaluations and the wall time are reported
+with and without the levelize option of Simulation.
+"""
+import time
+
+from myhdl import Signal, Simulation, StopSimulation, always_comb, delay, \
+    instance, intbv
+
+
+def stage(dout, a, b, nrCalls):
+
+    @always_comb
+    def logic():
+        nrCalls[0] += 1
+        dout.next = (a + b) % 2**16
+
+    return logic
+
+
+def chain(n, nrCalls, vectors=2000):
+    sigs = [Signal(intbv(0)[16:]) for i in range(n + 2)]
+    stages = [stage(sigs[i + 2], sigs[i + 1], sigs[i], nrCalls)
+              for i in range(n)]
+    stages.reverse()
+
+    @instance
+    def stimulus():
+        for i in range(1, vectors):
+            yield delay(10)
+            sigs[1].next = i % 2**16
+        raise StopSimulation
+
+    return stages, stimulus
+
+
+def run(n, levelize):
+    nrCalls = [0]
+    sim = Simulation(chain(n, nrCalls), levelize=levelize)
+    start = time.time()
+    sim.run(quiet=1)
+    return nrCalls[0], time.time() - start
+
+
+if __name__ == '__main__':
+    print("%6s %10s %10s %10s %10s %8s" %
+          ("N", "evals", "time", "evals-lev", "time-lev", "speedup"))
+    for n in (4, 16, 64):
+        ncalls, tdelta = run(n, False)
+        ncallsLev, tlev = run(n, True)
+        print("%6d %10d %10.3f %10d %10.3f %8.2f" %
+              (n, ncalls, tdelta, ncallsLev, tlev, tdelta / tlev))
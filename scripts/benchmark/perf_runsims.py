@@ -0,0 +1,72 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare serial and process pool runs of many randomized testcases.
+
+Usage: python perf_runsims.py [jobs]
+
+Each job runs the timer benchmark design with a random load value.
+"""
+import os
+import random
+import sys
+import time
+
+from myhdl import (Signal, Simulation, StopSimulation, delay, instance,
+                   runSims)
+
+from timer import timer_sig
+
+
+def testcase(cycles=5000):
+    clock = Signal(bool(0))
+    reset = Signal(bool(0))
+    flag = Signal(bool(0))
+    dut = timer_sig(flag, clock, reset, random.randrange(100, 2000))
+
+    @instance
+    def clkgen():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+        raise StopSimulation
+
+    return dut, clkgen
+
+
+if __name__ == '__main__':
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    paramsets = [{}] * jobs
+
+    start = time.time()
+    for i in range(jobs):
+        random.seed(i)
+        sim = Simulation(testcase())
+        sim.run(quiet=1)
+    tserial = time.time() - start
+
+    start = time.time()
+    results = list(runSims(testcase, paramsets))
+    tpool = time.time() - start
+    assert all(r.passed for r in results)
+
+    print("%d jobs, %d CPUs" % (jobs, os.cpu_count()))
+    print("%-10s %10s %10s %8s" % ("", "serial", "pool", "speedup"))
+    print("%-10s %10.3f %10.3f %8.2f" % ("testcase", tserial, tpool,
+                                         tserial / tpool))
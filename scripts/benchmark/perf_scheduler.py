@@ -0,0 +1,79 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare the simulation schedulers on clock-dominated designs.
+
+Usage: python perf_scheduler.py
+
+clocks -- many clock generators with a few fixed periods, each driving
+          a counter and a delayed signal with a constant delay
+longdiv -- the long divider benchmark with a reduced number of vectors
+"""
+import time
+
+from myhdl import Signal, Simulation, always, delay, instance, intbv
+
+from test_longdiv import test_longdiv
+
+
+def clocked_counter(period):
+    clk = Signal(bool(0))
+    count = Signal(intbv(0)[8:])
+    dcount = Signal(intbv(0)[8:], delay=3)
+
+    @instance
+    def clkgen():
+        while 1:
+            yield delay(period)
+            clk.next = not clk
+
+    @always(clk.posedge)
+    def counter():
+        count.next = (count + 1) % 256
+        dcount.next = count
+
+    return clkgen, counter
+
+
+def clocks(n):
+    return [clocked_counter((5, 10, 20)[i % 3]) for i in range(n)]
+
+
+def run(bench, duration, scheduler):
+    sim = Simulation(bench(), scheduler=scheduler)
+    start = time.time()
+    sim.run(duration, quiet=1)
+    elapsed = time.time() - start
+    sim.quit()
+    return elapsed
+
+
+benches = [
+    ("clocks 100", lambda: clocks(100), 20000),
+    ("clocks 1000", lambda: clocks(1000), 2000),
+    ("longdiv", lambda: test_longdiv(2**9), None),
+]
+
+
+if __name__ == '__main__':
+    print("%-12s %10s %10s %8s" % ("design", "heap", "wheel", "speedup"))
+    for name, bench, duration in benches:
+        theap = run(bench, duration, 'heap')
+        twheel = run(bench, duration, 'wheel')
+        print("%-12s %10.3f %10.3f %8.2f" % (name, theap, twheel, theap / twheel))
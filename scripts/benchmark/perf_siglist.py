@@ -0,0 +1,77 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Report signal update statistics of the simulation kernel.
+
+Usage: python perf_siglist.py
+
+For each design, the number of signal updates done by the kernel and the
+number of duplicate updates avoided by the per-delta dirty flag are
+reported, together with the wall time.
+
+longdiv -- the long divider benchmark with a reduced number of vectors
+regbank -- a register bank where every register is written several times
+           per clock cycle, and read through its next attribute
+"""
+import time
+
+from myhdl import Signal, Simulation, always, delay, instance, intbv
+from myhdl import _simulator
+
+from test_longdiv import test_longdiv
+
+
+def regbank(n=64, writers=4, cycles=2000):
+    clock = Signal(bool(0))
+    regs = [Signal(intbv(0)[16:]) for i in range(n)]
+
+    def writer(k):
+        @always(clock.posedge)
+        def logic():
+            for i in range(n):
+                if (i + k) % writers == 0:
+                    regs[i].next = regs[i] + 1
+                else:
+                    regs[i].next[k] = not regs[i][k]
+        return logic
+
+    @instance
+    def clkgen():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+
+    return clkgen, [writer(k) for k in range(writers)]
+
+
+benches = [
+    ("longdiv", lambda: test_longdiv(2**9)),
+    ("regbank", regbank),
+]
+
+
+if __name__ == '__main__':
+    print("%-10s %10s %10s %10s" % ("design", "updates", "avoided", "time"))
+    for name, bench in benches:
+        sim = Simulation(bench())
+        start = time.time()
+        sim.run(quiet=1)
+        elapsed = time.time() - start
+        print("%-10s %10d %10d %10.3f" %
+              (name, _simulator._nrUpdates, _simulator._nrDupUpdates, elapsed))
@@ -0,0 +1,102 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare static and per-event waiter subscription on RTL designs.
+
+Usage: python perf_static.py
+
+timer -- the timer benchmark design with a signal counter (@always)
+pipeline -- a chain of @always_seq registers with @always_comb logic
+            in between, all with an asynchronous reset
+"""
+import time
+
+from myhdl import (Signal, ResetSignal, Simulation, StopSimulation,
+                   always_comb, always_seq, delay, instance, intbv)
+
+from timer import timer_sig
+
+
+def stage(dout, din, clock, reset):
+    tmp = Signal(intbv(0)[16:])
+
+    @always_comb
+    def comb():
+        tmp.next = (din + 3) % 2**16
+
+    @always_seq(clock.posedge, reset=reset)
+    def reg():
+        dout.next = tmp
+
+    return comb, reg
+
+
+def pipeline(n=50, cycles=5000):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=True)
+    sigs = [Signal(intbv(0)[16:]) for i in range(n + 1)]
+    stages = [stage(sigs[i + 1], sigs[i], clock, reset) for i in range(n)]
+
+    @instance
+    def stimulus():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+            if clock:
+                sigs[0].next = i % 2**16
+        raise StopSimulation
+
+    return stages, stimulus
+
+
+def timer(cycles=50000):
+    clock = Signal(bool(0))
+    reset = Signal(bool(0))
+    flag = Signal(bool(0))
+    dut = timer_sig(flag, clock, reset, 1234)
+
+    @instance
+    def clkgen():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+        raise StopSimulation
+
+    return dut, clkgen
+
+
+benches = [
+    ("timer", timer),
+    ("pipeline", pipeline),
+]
+
+
+def run(bench, static):
+    sim = Simulation(bench(), static=static)
+    start = time.time()
+    sim.run(quiet=1)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    print("%-10s %10s %10s %8s" % ("design", "dynamic", "static", "speedup"))
+    for name, bench in benches:
+        tdyn = run(bench, False)
+        tstat = run(bench, True)
+        print("%-10s %10.3f %10.3f %8.2f" % (name, tdyn, tstat, tdyn / tstat))
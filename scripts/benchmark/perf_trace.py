@@ -0,0 +1,163 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the overhead of waveform tracing on RTL designs.
+
+Usage: python perf_trace.py
+
+Modes:
+
+trace -- trace all signals
+threaded -- format and write the records in a background thread
+selected -- trace the signals of the first two pipeline stages only
+window -- trace the first 10000 time units only
+recorder -- keep the last 1000 time units in memory, and write nothing
+gz, bz2, xz -- write a compressed VCD file
+gz threaded -- compress in the background thread
+
+timer -- a timer with a signal counter and a clock generator
+pipeline -- a chain of registers with combinatorial logic in between,
+            all with an asynchronous reset
+"""
+import os
+import tempfile
+import time
+
+from myhdl import (Signal, ResetSignal, Simulation, StopSimulation, always,
+                   always_comb, always_seq, block, delay, instance, intbv,
+                   modbv, traceSignals)
+
+
+@block
+def timer(cycles=50000):
+    clock = Signal(bool(0))
+    count = Signal(modbv(0)[16:])
+    flag = Signal(bool(0))
+
+    @always(clock.posedge)
+    def logic():
+        count.next = count + 1
+        flag.next = count == 1233
+
+    @instance
+    def clkgen():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+        raise StopSimulation
+
+    return logic, clkgen
+
+
+@block
+def stage(dout, din, clock, reset):
+    tmp = Signal(intbv(0)[16:])
+
+    @always_comb
+    def comb():
+        tmp.next = (din + 3) % 2**16
+
+    @always_seq(clock.posedge, reset=reset)
+    def reg():
+        dout.next = tmp
+
+    return comb, reg
+
+
+@block
+def pipeline(n=20, cycles=5000):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=True)
+    sigs = [Signal(intbv(0)[16:]) for i in range(n + 1)]
+    stages = [stage(sigs[i + 1], sigs[i], clock, reset) for i in range(n)]
+
+    @instance
+    def stimulus():
+        for i in range(2 * cycles):
+            yield delay(10)
+            clock.next = not clock
+            if clock:
+                sigs[0].next = i % 2**16
+        raise StopSimulation
+
+    return stages, stimulus
+
+
+benches = [
+    ("timer", timer),
+    ("pipeline", pipeline),
+]
+
+# traceSignals attributes of each mode
+modes = [
+    ("trace", {}),
+    ("threaded", dict(threaded=True)),
+    # the signals of the first two stages
+    ("selected", dict(include=["*.stage[01].*", "timer.*"])),
+    ("window", dict(window=(0, 10000))),
+    ("recorder", dict(recorder=1000)),
+    ("gz", dict(compression='gz')),
+    ("gz thread", dict(compression='gz', threaded=True)),
+    ("bz2", dict(compression='bz2')),
+    ("xz", dict(compression='xz')),
+]
+
+
+def run(bench, trace, attrs={}):
+    top = bench()
+    if trace:
+        traceSignals.directory = tempfile.mkdtemp()
+        traceSignals.tracebackup = False
+        for attr, value in attrs.items():
+            setattr(traceSignals, attr, value)
+        top = traceSignals(top)
+    sim = Simulation(top)
+    start = time.time()
+    sim.run(quiet=1)
+    # the file is complete when the simulation has finished
+    elapsed = time.time() - start
+    if trace:
+        ext = ".vcd"
+        if traceSignals.compression:
+            ext += "." + traceSignals.compression
+        path = os.path.join(traceSignals.directory, bench.func.__name__ + ext)
+        size = 0
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            os.remove(path)
+        os.rmdir(traceSignals.directory)
+        traceSignals.directory = None
+        traceSignals.threaded = False
+        traceSignals.include = None
+        traceSignals.window = traceSignals.recorder = None
+        traceSignals.compression = None
+        return elapsed, size
+    return elapsed, 0
+
+
+if __name__ == '__main__':
+    print("%-10s %-10s %10s %8s %10s" % ("design", "mode", "time",
+                                         "overhead", "file (MB)"))
+    for name, bench in benches:
+        tplain, _ = run(bench, False)
+        print("%-10s %-10s %10.3f" % (name, "no trace", tplain))
+        for mode, attrs in modes:
+            t, size = run(bench, True, attrs)
+            print("%-10s %-10s %10.3f %8.2f %10.1f" %
+                  (name, mode, t, t / tplain, size / 1e6))
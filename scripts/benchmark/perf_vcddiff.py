@@ -0,0 +1,71 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the indexing and the comparison of VCD files.
+
+Usage: python perf_vcddiff.py [cycles]
+
+Two runs of a pipeline design are traced to VCD files. The script
+reports the time to index each file, the time to compare them, and the
+peak memory use of the process, that shouldn't grow with the files.
+"""
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from myhdl import Simulation, Waveform, diffWaveforms, traceSignals
+
+from perf_trace import pipeline
+
+
+def trace(directory, name, cycles):
+    traceSignals.directory = directory
+    traceSignals.filename = name
+    traceSignals.tracebackup = False
+    Simulation(traceSignals(pipeline(cycles=cycles))).run(quiet=1)
+    traceSignals.directory = traceSignals.filename = None
+    return os.path.join(directory, name + ".vcd")
+
+
+def maxrss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+if __name__ == '__main__':
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    directory = tempfile.mkdtemp()
+    golden = trace(directory, "golden", cycles)
+    new = trace(directory, "new", cycles)
+    size = os.path.getsize(golden) / 1e6
+    print("VCD size: %.1f MB, peak memory: %.0f MB" % (size, maxrss()))
+    for p in (golden, new):
+        start = time.time()
+        Waveform.fromVcd(p).close()
+        elapsed = time.time() - start
+        print("index %-6s %8.3f s %8.1f MB/s" %
+              (os.path.basename(p), elapsed, size / elapsed))
+    start = time.time()
+    result = diffWaveforms(golden, new)
+    print("diff         %8.3f s  %d signals differ" %
+          (time.time() - start, len(result)))
+    print("peak memory: %.0f MB" % maxrss())
+    shutil.rmtree(directory)
@@ -0,0 +1,92 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare VCD files with binary waveform files.
+
+Usage: python perf_waveform.py [cycles]
+
+Both formats trace a pipeline design. For each format, the script
+reports the simulation time with tracing, the file size, and the time
+to get the changes of a signal in a short window at the end: the VCD
+file is read up to the window, the waveform file is read at the window.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from myhdl import Simulation, Waveform, traceSignals
+
+from perf_trace import pipeline
+
+WINDOW = 1000
+
+
+def trace(fmt, cycles):
+    traceSignals.directory = tempfile.mkdtemp()
+    traceSignals.tracebackup = False
+    traceSignals.format = fmt
+    sim = Simulation(traceSignals(pipeline(cycles=cycles)))
+    start = time.time()
+    sim.run(quiet=1)
+    elapsed = time.time() - start
+    path = os.path.join(traceSignals.directory, "pipeline." + fmt)
+    traceSignals.directory = None
+    traceSignals.format = 'vcd'
+    return elapsed, path
+
+
+def vcdWindow(path, name, start, stop):
+    """ Return the changes of the last signal with a name in a window. """
+    code = None
+    changes = []
+    t = 0
+    with open(path) as f:
+        for line in f:
+            if line.startswith('$var') and line.split()[4] == name:
+                code = line.split()[3]
+            elif line[0] == '#':
+                t = int(line[1:])
+                if t >= stop:
+                    break
+            elif t >= start and line.endswith(" %s\n" % code):
+                changes.append((t, line.split()[0][1:]))
+    return changes
+
+
+if __name__ == '__main__':
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    stop = 20 * cycles
+    print("%-8s %10s %10s %12s" % ("format", "trace (s)", "size (MB)",
+                                   "window (s)"))
+    for fmt in ('vcd', 'mwf'):
+        elapsed, path = trace(fmt, cycles)
+        size = os.path.getsize(path)
+        start = time.time()
+        if fmt == 'vcd':
+            changes = vcdWindow(path, 'tmp', stop - WINDOW, stop)
+        else:
+            with Waveform(path) as w:
+                name = [n for n in w.names if n.endswith('.tmp')][-1]
+                changes = w.changes(name, stop - WINDOW, stop)
+        window = time.time() - start
+        assert changes
+        print("%-8s %10.3f %10.1f %12.4f" % (fmt, elapsed, size / 1e6, window))
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))